@@ -0,0 +1,370 @@
+"""
+Modo em lote (headless): aplica uma cadeia de filtros de `filters.py` sobre
+arquivos de vídeo ou pastas de imagens, sem display e sem webcam.
+
+Imagens são distribuídas uma por tarefa; vídeos são divididos em blocos de
+quadros processados em paralelo. Cada worker comprime seus quadros em JPEG
+uma única vez; o processo principal só copia esses bytes, na ordem original,
+para um AVI Motion-JPEG (sem decodificar nem comprimir de novo), em
+partes OpenDML (AVI 2.0) quando passa do limite de um RIFF.
+"""
+import os
+import shutil
+import struct
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from filter_chain import FilterChain
+from blur import BlurEngine
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v')
+
+# Codec do vídeo final (AVI Motion-JPEG) e qualidade dos JPEGs
+OUTPUT_FOURCC = 'MJPG'
+OUTPUT_VIDEO_EXT = '.avi'
+OUTPUT_JPEG_QUALITY = 95
+# Limite de cada RIFF do AVI (o tamanho é um campo de 32 bits; 1 GB como o
+# ffmpeg, por compatibilidade) e quantos RIFFs o índice de índices comporta
+RIFF_MAX_BYTES = 1 << 30
+SUPER_INDEX_ENTRIES = 256
+
+
+def collect_inputs(paths):
+    """Expande pastas e separa os caminhos em (imagens, vídeos)."""
+    images, videos = [], []
+    for path in paths:
+        if os.path.isdir(path):
+            entries = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+        else:
+            entries = [path]
+        for entry in entries:
+            ext = os.path.splitext(entry)[1].lower()
+            if ext in IMAGE_EXTENSIONS:
+                images.append(entry)
+            elif ext in VIDEO_EXTENSIONS:
+                videos.append(entry)
+    return images, videos
+
+
+# Cadeia compilada uma vez por processo (ver _init_worker)
+_chain = None
+
+
+def _init_worker(filter_names, sobel_quality, blur_radius):
+    global _chain
+    # Cada processo já ocupa um núcleo: evita que o OpenCV abra mais threads
+    cv2.setNumThreads(1)
+    _chain = FilterChain(filter_names, sobel_quality=sobel_quality, blur=BlurEngine(blur_radius))
+
+
+def _process_image(src, dst):
+    frame = cv2.imread(src, cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError(f"Não foi possível ler a imagem: {src}")
+    frame = _chain(frame)
+    if not cv2.imwrite(dst, frame):
+        raise ValueError(f"Não foi possível salvar a imagem: {dst}")
+    return 1
+
+
+def _process_video_chunk(src, dst, start, count):
+    """
+    Processa `count` quadros a partir de `start` (None = até o fim do vídeo)
+    e grava os JPEGs em sequência em `dst`.
+    Retorna (tamanho de cada JPEG, (largura, altura)).
+    """
+    cap = cv2.VideoCapture(src)
+    if not cap.isOpened():
+        raise ValueError(f"Não foi possível abrir o vídeo: {src}")
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, OUTPUT_JPEG_QUALITY]
+    sizes = []
+    frame_size = None
+    try:
+        with open(dst, 'wb') as segment:
+            while count is None or len(sizes) < count:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frame = _chain(frame)
+                if frame.ndim == 2:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+                if frame_size is None:
+                    frame_size = (frame.shape[1], frame.shape[0])
+                ok, data = cv2.imencode('.jpg', frame, params)
+                if not ok:
+                    raise ValueError(f"Não foi possível comprimir um quadro de {src}")
+                segment.write(data.tobytes())
+                sizes.append(len(data))
+    finally:
+        cap.release()
+    return sizes, frame_size
+
+
+def _video_chunks(src, chunk_size):
+    """
+    Divide o vídeo em blocos (início, quantidade) conforme o total de quadros.
+    O último bloco lê até o fim: CAP_PROP_FRAME_COUNT é só uma estimativa
+    do container e pode vir menor que o real.
+    """
+    cap = cv2.VideoCapture(src)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    if total <= 0:
+        # Total desconhecido (ex.: alguns streams): um único bloco até o fim
+        return [(0, None)], fps
+    starts = list(range(0, total, chunk_size))
+    chunks = [(start, chunk_size) for start in starts[:-1]]
+    chunks.append((starts[-1], None))
+    return chunks, fps
+
+
+def _chunk(fourcc, data):
+    # Chunk RIFF: fourcc, tamanho e dados alinhados em 2 bytes
+    return fourcc + struct.pack('<I', len(data)) + data + (b'\0' if len(data) % 2 else b'')
+
+
+def _plan_riffs(lengths, riff_max_bytes=RIFF_MAX_BYTES):
+    """
+    Quantos quadros (de tamanhos `lengths`) vão em cada RIFF do AVI, para
+    que nenhum passe de `riff_max_bytes` contando o índice ('ix00') do RIFF
+    e, no primeiro, o índice legado ('idx1').
+    """
+    plan = []
+    used = _avi_header_size() + 12  # + 'LIST....movi'
+    count = 0
+    for length in lengths:
+        chunk = 8 + length + length % 2
+        index = 32 + 8 * (count + 1)
+        if not plan:
+            index += 8 + 16 * (count + 1)
+        if count and used + chunk + index > riff_max_bytes:
+            plan.append(count)
+            used, count = 24, 0  # 'RIFF....AVIX' + 'LIST....movi'
+        used += chunk
+        count += 1
+    plan.append(count)
+    return plan
+
+
+def _segment_frames(segments):
+    for path, sizes, _ in segments:
+        with open(path, 'rb') as segment:
+            for length in sizes:
+                yield segment.read(length)
+
+
+def _end_chunk(out, start):
+    """Grava o tamanho do chunk/lista aberto em `start`, que termina na posição atual."""
+    end = out.tell()
+    out.seek(start + 4)
+    out.write(struct.pack('<I', end - start - 8))
+    out.seek(end)
+
+
+def _concat_segments(segments, dst, fps, riff_max_bytes=RIFF_MAX_BYTES):
+    """
+    Junta os segmentos (JPEGs já comprimidos pelos workers) na ordem original
+    num AVI Motion-JPEG. Os bytes são só copiados: nenhum quadro é
+    decodificado ou comprimido de novo. Retorna o total de quadros.
+
+    Vídeos maiores que um RIFF seguem a extensão OpenDML (AVI 2.0): RIFFs
+    'AVIX' a mais, um índice 'ix00' em cada um e o índice de índices 'indx'
+    no cabeçalho. O primeiro RIFF continua legível por leitores AVI 1.0.
+    """
+    lengths = [length for _, sizes, _ in segments for length in sizes]
+    plan = _plan_riffs(lengths, riff_max_bytes)
+    if len(plan) > SUPER_INDEX_ENTRIES:
+        raise ValueError(
+            f"Vídeo grande demais para {dst}: {sum(lengths) / 1e9:.1f} GB de quadros "
+            f"(limite de {SUPER_INDEX_ENTRIES} partes de {riff_max_bytes / 1e9:.1f} GB)"
+        )
+    frame_size = next((size for _, _, size in segments if size is not None), None)
+    frames = _segment_frames(segments)
+    super_index = []  # (posição do 'ix00', tamanho do chunk, quadros)
+    try:
+        with open(dst, 'wb') as out:
+            # Cabeçalhos com tamanhos provisórios: reescritos no final
+            out.write(b'\0' * _avi_header_size())
+            for part, count in enumerate(plan):
+                riff_start = 0 if part == 0 else out.tell()
+                if part:
+                    out.write(b'RIFF\0\0\0\0AVIX')
+                movi_start = out.tell()
+                out.write(b'LIST\0\0\0\0movi')
+                chunks = []  # (posição do chunk '00dc', tamanho)
+                for _ in range(count):
+                    data = next(frames)
+                    chunks.append((out.tell(), len(data)))
+                    out.write(_chunk(b'00dc', data))
+                # Índice padrão do OpenDML: deslocamento dos dados a partir do início do RIFF
+                ix_start = out.tell()
+                entries = b''.join(struct.pack('<II', pos + 8 - riff_start, length) for pos, length in chunks)
+                out.write(_chunk(b'ix00', struct.pack('<HBBI4sQI', 2, 0, 1, count, b'00dc', riff_start, 0) + entries))
+                super_index.append((ix_start, out.tell() - ix_start, count))
+                _end_chunk(out, movi_start)
+                if part == 0:
+                    # Índice legado (AVI 1.0), relativo ao 'movi' do primeiro RIFF
+                    index = b''.join(
+                        struct.pack('<4sIII', b'00dc', 0x10, pos - (movi_start + 8), length) for pos, length in chunks
+                    )
+                    out.write(_chunk(b'idx1', index))
+                    first_riff_end = out.tell()
+                else:
+                    _end_chunk(out, riff_start)
+
+            width, height = frame_size or (0, 0)
+            out.seek(0)
+            out.write(_avi_header(
+                first_riff_end, width, height, fps, plan[0], len(lengths),
+                max(lengths, default=0), super_index
+            ))
+    except BaseException:
+        # Não deixa um AVI pela metade na saída
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise
+    return len(lengths)
+
+
+def _avi_header_size():
+    return len(_avi_header(0, 0, 0, 30.0, 0, 0, 0, []))
+
+
+def _avi_header(riff_end, width, height, fps, riff_frames, frame_count, max_frame_bytes, super_index):
+    """
+    RIFF/hdrl de um AVI com um stream de vídeo MJPG. `riff_frames` são os
+    quadros do primeiro RIFF e `super_index` as entradas do 'indx'
+    (tamanho fixo: SUPER_INDEX_ENTRIES, o resto fica zerado).
+    """
+    rate, scale = int(round(fps * 1000)) or 30000, 1000
+    avih = struct.pack(
+        '<IIIIIIIIII16x',
+        int(round(1000000 / (rate / scale))),  # microssegundos por quadro
+        0, 0,
+        0x10,                                  # AVIF_HASINDEX
+        riff_frames, 0, 1,
+        max_frame_bytes,
+        width, height
+    )
+    strh = struct.pack(
+        '<4s4sIHHIIIIIIIIhhhh',
+        b'vids', OUTPUT_FOURCC.encode('ascii'),
+        0, 0, 0, 0,
+        scale, rate, 0, frame_count,
+        max_frame_bytes, 0xFFFFFFFF, 0,
+        0, 0, width, height
+    )
+    strf = struct.pack(
+        '<IiiHH4sIiiII',
+        40, width, height, 1, 24, OUTPUT_FOURCC.encode('ascii'),
+        width * height * 3, 0, 0, 0, 0
+    )
+    indx = struct.pack('<HBBI4s12x', 4, 0, 0, len(super_index), b'00dc')
+    indx += b''.join(struct.pack('<QII', *entry) for entry in super_index)
+    indx += b'\0' * (16 * (SUPER_INDEX_ENTRIES - len(super_index)))
+    strl = b'strl' + _chunk(b'strh', strh) + _chunk(b'strf', strf) + _chunk(b'indx', indx)
+    odml = b'odml' + _chunk(b'dmlh', struct.pack('<I244x', frame_count))
+    hdrl = b'hdrl' + _chunk(b'avih', avih) + _chunk(b'LIST', strl) + _chunk(b'LIST', odml)
+    return b'RIFF' + struct.pack('<I', max(0, riff_end - 8)) + b'AVI ' + _chunk(b'LIST', hdrl)
+
+
+def _output_path(src, output_dir, extension, used):
+    """
+    Caminho de saída para `src`, fora de `used` (as entradas e as saídas já
+    escolhidas). Nomes repetidos (mesmo arquivo em pastas diferentes, ou
+    saída na pasta de entrada) ganham um sufixo _1, _2...
+    """
+    stem = os.path.splitext(os.path.basename(src))[0]
+    dst = os.path.join(output_dir, stem + extension)
+    n = 1
+    while os.path.normcase(os.path.abspath(dst)) in used:
+        dst = os.path.join(output_dir, f"{stem}_{n}{extension}")
+        n += 1
+    key = os.path.normcase(os.path.abspath(dst))
+    used.add(key)
+    return dst
+
+
+def run_batch(
+    inputs,
+    output_dir,
+    filter_names,
+    workers=None,
+    chunk_size=240,
+    sobel_quality='exact',
+    blur_radius=7,
+    log=print
+):
+    """
+    Executa a cadeia `filter_names` sobre todas as entradas usando um pool de processos.
+
+    Retorna um dicionário com o total de quadros, o tempo gasto e os quadros/s.
+    """
+    # Valida a cadeia antes de abrir o pool (erros aparecem no processo principal)
+    FilterChain(filter_names, sobel_quality=sobel_quality)
+
+    images, videos = collect_inputs(inputs)
+    if not images and not videos:
+        raise ValueError("Nenhuma imagem ou vídeo encontrado nas entradas.")
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    # As entradas entram em `used` primeiro: nenhuma saída pode cair sobre elas
+    used = {os.path.normcase(os.path.abspath(src)) for src in images + videos}
+    image_outputs = []
+    for src in images:
+        dst = _output_path(src, output_dir, os.path.splitext(src)[1], used)
+        image_outputs.append((src, dst))
+    video_outputs = [(src, _output_path(src, output_dir, OUTPUT_VIDEO_EXT, used)) for src in videos]
+
+    start_time = time.perf_counter()
+    total_frames = 0
+    tmp_dir = tempfile.mkdtemp(prefix="webcammax_batch_")
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(filter_names, sobel_quality, blur_radius)
+        ) as pool:
+            image_jobs = [pool.submit(_process_image, src, dst) for src, dst in image_outputs]
+
+            video_jobs = []
+            for index, (src, dst) in enumerate(video_outputs):
+                chunks, fps = _video_chunks(src, chunk_size)
+                segments = []
+                futures = []
+                for n, (start, count) in enumerate(chunks):
+                    segment = os.path.join(tmp_dir, f"{index:04d}_{n:06d}.mjpeg")
+                    segments.append(segment)
+                    futures.append(pool.submit(_process_video_chunk, src, segment, start, count))
+                video_jobs.append((src, dst, fps, segments, futures))
+
+            for job in image_jobs:
+                total_frames += job.result()
+            if images:
+                log(f"{len(images)} imagem(ns) processada(s).")
+
+            for src, dst, fps, segments, futures in video_jobs:
+                results = [f.result() for f in futures]
+                frames = _concat_segments(
+                    [(segment, sizes, size) for segment, (sizes, size) in zip(segments, results)],
+                    dst,
+                    fps
+                )
+                total_frames += frames
+                log(f"{src}: {frames} quadros -> {dst}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - start_time
+    fps = total_frames / elapsed if elapsed > 0 else 0.0
+    log(f"Total: {total_frames} quadros em {elapsed:.2f} s ({fps:.1f} quadros/s, {workers} processos)")
+    return {"frames": total_frames, "seconds": elapsed, "fps": fps, "workers": workers}
@@ -0,0 +1,283 @@
+"""
+Benchmark dos filtros de `filters.py` e do despacho `SecondWindow.apply_filter`.
+
+Usa quadros BGR sintéticos (sem webcam e sem display) e mede, por caso,
+os percentis p50/p95/p99 em ms por quadro e o pico de memória alocada por chamada.
+Com --tiled-threads mede também a execução em faixas (tiling.py) e o ganho
+em relação a uma thread, conferindo que a saída é idêntica.
+Nos casos gaussian[...,auto] registra também o erro da rota escolhida em
+relação ao desfoque exato (erro médio, erro máximo e PSNR).
+
+Exemplos:
+    python benchmark.py --save base.json
+    python benchmark.py --save novo.json --compare base.json --threshold 0.10
+    python benchmark.py --resolutions 1080p --tiled-threads 1 2 4 8 --cv2-threads 1
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import types
+
+import cv2
+import numpy as np
+
+from filters import FILTERS, SOBEL_QUALITIES, apply_sobel
+from noise import SaltPepperNoise
+from blur import BlurEngine
+from filter_chain import FilterChain
+from tiling import TiledExecutor
+
+RESOLUTIONS = {
+    '480p': (640, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+}
+
+# Raios do Gaussiano medidos (tempo do kernel exato e da rota 'auto')
+BLUR_RADII = (15, 31, 63)
+
+# Cadeias medidas na execução em faixas
+TILED_CHAINS = (['gaussian'], ['gray', 'sobel'], ['sobel', 'gaussian'])
+
+DTYPES = {
+    'uint8': np.uint8,
+    'float32': np.float32,
+}
+
+
+def make_frame(width, height, dtype, seed=0):
+    """Quadro BGR sintético com bordas e texturas (não apenas ruído uniforme)."""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = (x + y) * 0.5
+    noise = rng.normal(0, 12, (height, width)).astype(np.float32)
+    frame = np.empty((height, width, 3), np.float32)
+    frame[..., 0] = base + noise
+    frame[..., 1] = base[::-1] + noise
+    frame[..., 2] = 255 - base + noise
+    # Retângulos sólidos para criar bordas fortes
+    frame[height // 4:height // 2, width // 4:width // 2] = 200
+    np.clip(frame, 0, 255, out=frame)
+    return frame.astype(dtype)
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000.0)
+
+
+def build_cases():
+    """Lista de (nome, função(frame)) com todos os filtros e o despacho da janela."""
+    cases = [(name, fn) for name, fn in FILTERS.items()]
+    for quality in SOBEL_QUALITIES:
+        if quality != 'exact':
+            cases.append((f"sobel[{quality}]", lambda frame, q=quality: apply_sobel(frame, q)))
+    for radius in BLUR_RADII:
+        for mode in ('exact', 'auto'):
+            cases.append((f"gaussian[r={radius},{mode}]", BlurEngine(radius, mode).apply))
+    try:
+        from second_window import SecondWindow
+    except ImportError as e:
+        print(f"Aviso: despacho SecondWindow.apply_filter ignorado ({e})", file=sys.stderr)
+        return cases
+
+    chains = [[name] for name in FILTERS] + [['gray', 'sobel'], ['sobel', 'gaussian']]
+    for chain in chains:
+        # A janela não é criada (exigiria display e webcam): chama o método
+        # com um objeto que só tem o estado usado pelo despacho.
+        window_state = types.SimpleNamespace(
+            compiled_chain=FilterChain(chain, salt_pepper=SaltPepperNoise(seed=0)),
+            tiled_executor=None
+        )
+        name = '+'.join(chain)
+        cases.append((f"dispatch:{name}", lambda frame, s=window_state: SecondWindow.apply_filter(s, frame)))
+    return cases
+
+
+def bench_case(fn, frame, repeat, warmup):
+    for _ in range(warmup):
+        fn(frame)
+
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(frame)
+        samples.append(time.perf_counter() - t0)
+
+    # Medição de alocação separada: o tracemalloc distorce os tempos
+    alloc_calls = min(repeat, 5)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_calls):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            fn(frame)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": percentile_ms(samples, 50),
+        "p95_ms": percentile_ms(samples, 95),
+        "p99_ms": percentile_ms(samples, 99),
+        "mean_ms": float(np.mean(samples) * 1000.0),
+        "alloc_peak_bytes": int(np.median(peaks)),
+        "frame_bytes": int(frame.nbytes),
+        "repeat": repeat,
+    }
+
+
+def blur_error(fn, frame):
+    """Erro da rota 'auto' do BlurEngine em relação ao exato; {} para os demais casos."""
+    engine = getattr(fn, '__self__', None)
+    if not isinstance(engine, BlurEngine) or engine.mode != 'auto':
+        return {}
+    error = engine.measure_error(frame)
+    return {
+        "route": error["route"],
+        "mae": error["mae"],
+        "max_error": error["max"],
+        # JSON não tem infinito: rota exata fica com PSNR nulo
+        "psnr_db": None if error["psnr"] == float('inf') else error["psnr"],
+    }
+
+
+def bench_tiled(frame, threads_list, repeat, warmup, log=print):
+    """
+    Mede cada cadeia de TILED_CHAINS (as com Sobel, em cada qualidade) em uma
+    thread e em faixas com cada quantidade de threads. Retorna {caso: resultado} com o ganho ('speedup')
+    e se a saída bateu exatamente com a da cadeia em uma thread ('exact').
+    """
+    results = {}
+    variants = []
+    for names in TILED_CHAINS:
+        qualities = SOBEL_QUALITIES if 'sobel' in names else ('exact',)
+        for quality in qualities:
+            suffix = f"[{quality}]" if 'sobel' in names and quality != 'exact' else ""
+            variants.append(('+'.join(names) + suffix, FilterChain(names, sobel_quality=quality)))
+    for name, chain in variants:
+        reference = chain(frame.copy())
+        base = bench_case(chain, frame, repeat, warmup)
+        results[f"tiled:{name}[serial]"] = base
+        for threads in threads_list:
+            executor = TiledExecutor(threads)
+            try:
+                exact = bool(np.array_equal(executor.run(chain, frame.copy()), reference))
+                r = bench_case(lambda f: executor.run(chain, f), frame, repeat, warmup)
+            finally:
+                executor.close()
+            r["threads"] = threads
+            r["speedup"] = base["p50_ms"] / r["p50_ms"] if r["p50_ms"] > 0 else 0.0
+            r["exact"] = exact
+            results[f"tiled:{name}[t={threads}]"] = r
+            log(
+                f"tiled:{name:<24} threads {threads:2d}  p50 {r['p50_ms']:8.2f} ms  "
+                f"(serial {base['p50_ms']:8.2f} ms)  ganho {r['speedup']:5.2f}x  "
+                f"{'idêntico' if exact else 'DIFERENTE'}"
+            )
+    return results
+
+
+def run(resolutions, dtypes, repeat, warmup, only=None, tiled_threads=None, log=print):
+    cases = build_cases()
+    if only:
+        cases = [(name, fn) for name, fn in cases if name in only or name.split(':')[-1] in only]
+
+    results = {}
+    for res in resolutions:
+        width, height = RESOLUTIONS[res]
+        for dtype_name in dtypes:
+            frame = make_frame(width, height, DTYPES[dtype_name])
+            for name, fn in cases:
+                key = f"{name}|{res}|{dtype_name}"
+                # Cada caso recebe sua própria cópia (sal e pimenta altera o quadro)
+                results[key] = bench_case(fn, frame.copy(), repeat, warmup)
+                r = results[key]
+                r.update(blur_error(fn, frame))
+                line = (
+                    f"{key:<36} p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+                    f"p99 {r['p99_ms']:8.2f} ms  alloc {r['alloc_peak_bytes'] / 1e6:8.2f} MB"
+                )
+                if "route" in r:
+                    psnr = "exato" if r["psnr_db"] is None else f"PSNR {r['psnr_db']:5.1f} dB"
+                    line += f"  [{r['route']}] erro médio {r['mae']:.3f}  máx {r['max_error']:.0f}  {psnr}"
+                log(line)
+            if tiled_threads:
+                for name, r in bench_tiled(frame, tiled_threads, repeat, warmup, log=log).items():
+                    results[f"{name}|{res}|{dtype_name}"] = r
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "cv2_threads": cv2.getNumThreads(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold, metric="p50_ms", log=print):
+    """
+    Compara dois resultados. Retorna a lista de casos que ficaram mais lentos
+    que o limite (ex.: threshold=0.10 => 10% mais lento que a referência).
+    """
+    regressions = []
+    for key, base in baseline["results"].items():
+        cur = current["results"].get(key)
+        if cur is None or base[metric] <= 0:
+            continue
+        ratio = cur[metric] / base[metric] - 1.0
+        status = "LENTO" if ratio > threshold else "ok"
+        log(f"{key:<36} {base[metric]:8.2f} -> {cur[metric]:8.2f} ms ({ratio:+.1%}) {status}")
+        if ratio > threshold:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos filtros do WebCamMax")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--dtypes", nargs="+", default=["uint8"], choices=list(DTYPES))
+    parser.add_argument("--filters", nargs="+", default=None, help="Limita aos filtros/casos informados ('none': nenhum)")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--tiled-threads", nargs="+", type=int, default=None,
+                        help="Mede a execução em faixas com estas quantidades de threads")
+    parser.add_argument("--cv2-threads", type=int, default=None,
+                        help="cv2.setNumThreads antes de medir (isola o paralelismo interno do OpenCV)")
+    parser.add_argument("--save", help="Salva os resultados em JSON")
+    parser.add_argument("--compare", help="JSON de referência para comparar")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Tolerância de lentidão (0.10 = 10%%)")
+    parser.add_argument("--metric", default="p50_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+    args = parser.parse_args(argv)
+
+    if args.cv2_threads is not None:
+        cv2.setNumThreads(args.cv2_threads)
+    current = run(
+        args.resolutions, args.dtypes, args.repeat, args.warmup,
+        only=args.filters, tiled_threads=args.tiled_threads
+    )
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=4)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold, args.metric)
+        if regressions:
+            print(f"{len(regressions)} caso(s) acima do limite de {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import cv2
+import numpy as np
+
+# Rotas do desfoque:
+#   'exact'     -> cv2.GaussianBlur com kernel (2r+1)x(2r+1) na resolução cheia
+#   'box'       -> 3 filtros de caixa empilhados (aproxima a gaussiana; custo independe do raio)
+#   'downscale' -> desfoca uma cópia reduzida e amplia de volta
+#   'auto'      -> 'exact' enquanto não há redução possível, 'downscale' a partir daí
+# 'box' fica só como modo explícito: a partir do raio em que a redução é
+# possível a rota 'downscale' é mais rápida, e abaixo dele o kernel exato
+# ainda cabe no tempo de um quadro.
+BLUR_MODES = ('auto', 'exact', 'box', 'downscale')
+
+# Raio alvo (na imagem reduzida) da rota 'downscale'; abaixo do dobro dele
+# não há redução possível e a rota 'auto' usa o kernel exato
+DOWNSCALE_TARGET_RADIUS = 6
+
+
+def gaussian_sigma(ksize):
+    """Mesmo sigma que o OpenCV usa quando sigma=0 é passado ao GaussianBlur."""
+    return 0.3 * ((ksize - 1) * 0.5 - 1) + 0.8
+
+
+def box_sizes(sigma, passes=3):
+    """
+    Larguras (ímpares) de `passes` filtros de caixa cuja composição aproxima
+    uma gaussiana de desvio `sigma`.
+    """
+    ideal = np.sqrt(12.0 * sigma * sigma / passes + 1.0)
+    lower = int(np.floor(ideal))
+    if lower % 2 == 0:
+        lower -= 1
+    upper = lower + 2
+    # Quantos filtros usam a largura menor para acertar a variância total
+    m = round((12.0 * sigma * sigma - passes * lower * lower - 4 * passes * lower - 3 * passes) / (-4 * lower - 4))
+    return [lower if i < m else upper for i in range(passes)]
+
+
+class BlurEngine:
+    """
+    Desfoque gaussiano com raio configurável.
+
+    Para raios grandes a rota 'auto' troca o kernel exato (custo cresce com o
+    raio e com a resolução) pelo desfoque em resolução reduzida. `measure_error` informa o erro de cada rota em relação
+    ao desfoque exato.
+    """
+
+    def __init__(self, radius=7, mode='auto'):
+        self.radius = radius
+        self.mode = mode
+        if mode not in BLUR_MODES:
+            raise ValueError(f"Modo de desfoque desconhecido: {mode}")
+
+    def set_radius(self, radius):
+        self.radius = max(0, int(radius))
+
+    def set_mode(self, mode):
+        if mode not in BLUR_MODES:
+            raise ValueError(f"Modo de desfoque desconhecido: {mode}")
+        self.mode = mode
+
+    def route(self):
+        """Rota efetivamente usada para o raio/modo atuais."""
+        if self.mode != 'auto':
+            return self.mode
+        if self.radius < 2 * DOWNSCALE_TARGET_RADIUS:
+            return 'exact'
+        return 'downscale'
+
+    def halo(self):
+        """
+        Quantos pixels vizinhos (para cada lado) influenciam um pixel de saída.
+        Usado para processar regiões/faixas do quadro sem diferença nas bordas.
+        """
+        if self.radius <= 0:
+            return 0
+        route = self.route()
+        if route == 'exact':
+            return self.radius
+        if route == 'box':
+            return sum(size // 2 for size in box_sizes(gaussian_sigma(2 * self.radius + 1)))
+        # 'downscale': kernel reduzido + interpolação na ampliação (2 pixels reduzidos)
+        factor = max(1, self.radius // DOWNSCALE_TARGET_RADIUS)
+        return (max(1, round(self.radius / factor)) + 2) * factor
+
+    def apply(self, frame, route=None):
+        if self.radius <= 0:
+            return frame
+        route = route or self.route()
+        ksize = 2 * self.radius + 1
+
+        if route == 'exact':
+            return cv2.GaussianBlur(frame, (ksize, ksize), 0)
+
+        sigma = gaussian_sigma(ksize)
+        if route == 'box':
+            out = frame
+            for size in box_sizes(sigma):
+                out = cv2.blur(out, (size, size))
+            return out
+
+        if route == 'downscale':
+            height, width = frame.shape[:2]
+            factor = max(1, self.radius // DOWNSCALE_TARGET_RADIUS)
+            small_size = (max(1, width // factor), max(1, height // factor))
+            small = cv2.resize(frame, small_size, interpolation=cv2.INTER_AREA)
+            small_ksize = 2 * max(1, round(self.radius / factor)) + 1
+            small = cv2.GaussianBlur(small, (small_ksize, small_ksize), sigma / factor)
+            return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+        raise ValueError(f"Rota de desfoque desconhecida: {route}")
+
+    def measure_error(self, frame, route=None):
+        """
+        Compara a rota (padrão: a atual) com o desfoque exato.
+        Retorna erro absoluto médio, erro máximo e PSNR (dB).
+        """
+        exact = self.apply(frame, 'exact').astype(np.float32)
+        approx = self.apply(frame, route).astype(np.float32)
+        diff = np.abs(exact - approx)
+        mse = float(np.mean(diff * diff))
+        return {
+            "route": route or self.route(),
+            "mae": float(diff.mean()),
+            "max": float(diff.max()),
+            "psnr": float('inf') if mse == 0 else float(10.0 * np.log10(255.0 * 255.0 / mse)),
+        }
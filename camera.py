@@ -0,0 +1,168 @@
+"""
+Abertura da webcam com formato, resolução, FPS e buffer escolhidos.
+
+`cv2.VideoCapture(0)` usa os padrões do backend; no Linux isso costuma ser
+YUYV sem compressão a poucos FPS e um buffer de driver fundo (latência de
+vários quadros). Aqui as propriedades são aplicadas na ordem que o V4L2 exige
+(FOURCC -> resolução -> FPS -> buffer) e `probe_low_latency` testa os modos
+do dispositivo para achar o de menor latência que atinge um FPS alvo.
+
+A configuração é um dict simples, salvo no .mcam na chave "capture".
+"""
+import time
+
+import cv2
+
+from defaults import CAPTURE_FOURCCS, DEFAULT_CAPTURE_CONFIG
+
+# Backends de captura disponíveis nesta build do OpenCV
+CAPTURE_BACKENDS = {
+    name: getattr(cv2, attr)
+    for name, attr in (
+        ('auto', 'CAP_ANY'),
+        ('v4l2', 'CAP_V4L2'),
+        ('dshow', 'CAP_DSHOW'),
+        ('msmf', 'CAP_MSMF'),
+        ('avfoundation', 'CAP_AVFOUNDATION'),
+    )
+    if hasattr(cv2, attr)
+}
+
+PROBE_RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080))
+
+
+def normalize_capture_config(config=None):
+    """Completa a configuração com os padrões e valida backend e FOURCC."""
+    normalized = dict(DEFAULT_CAPTURE_CONFIG)
+    if config:
+        normalized.update({key: value for key, value in config.items() if key in DEFAULT_CAPTURE_CONFIG})
+    if normalized["backend"] not in CAPTURE_BACKENDS:
+        raise ValueError(f"Backend de captura desconhecido: {normalized['backend']}")
+    if normalized["fourcc"] is not None and normalized["fourcc"] not in CAPTURE_FOURCCS:
+        raise ValueError(f"FOURCC desconhecido: {normalized['fourcc']}")
+    return normalized
+
+
+def _fourcc_name(value):
+    code = int(value)
+    if code <= 0:
+        return None
+    return ''.join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
+
+def open_camera(config=None):
+    """
+    Abre o dispositivo e aplica as propriedades configuradas.
+    Retorna o VideoCapture (verifique `isOpened()`).
+    """
+    config = normalize_capture_config(config)
+    cap = cv2.VideoCapture(config["device"], CAPTURE_BACKENDS[config["backend"]])
+    if not cap.isOpened():
+        return cap
+    # A ordem importa no V4L2: o formato define quais resoluções e FPS existem
+    if config["fourcc"]:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config["fourcc"]))
+    if config["width"] and config["height"]:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, config["width"])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config["height"])
+    if config["fps"]:
+        cap.set(cv2.CAP_PROP_FPS, config["fps"])
+    if config["buffer_size"]:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, config["buffer_size"])
+    return cap
+
+
+def negotiated_mode(cap):
+    """Modo realmente aceito pelo driver (pode diferir do pedido)."""
+    return {
+        "fourcc": _fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": cap.get(cv2.CAP_PROP_FPS),
+        "buffer_size": int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+    }
+
+
+def probe_mode(config, frames=20, warmup=5):
+    """
+    Abre a câmera com `config` e mede o modo na prática:
+    intervalo entre quadros (grab) e custo de decodificação (retrieve).
+    A latência estimada é um intervalo de quadro (com buffer de 1 quadro)
+    mais a decodificação. Retorna None se o modo não entregar quadros.
+    """
+    cap = open_camera(config)
+    try:
+        if not cap.isOpened():
+            return None
+        for _ in range(warmup):
+            if not cap.grab():
+                return None
+        # Intervalo = tempo entre quadros entregues (grab), com a decodificação incluída
+        grabbed_at = []
+        decode_times = []
+        for _ in range(frames):
+            if not cap.grab():
+                return None
+            now = time.perf_counter()
+            grabbed_at.append(now)
+            ret, _ = cap.retrieve()
+            if not ret:
+                return None
+            decode_times.append(time.perf_counter() - now)
+        intervals = [b - a for a, b in zip(grabbed_at[:-1], grabbed_at[1:])]
+        interval = sorted(intervals)[len(intervals) // 2]
+        decode = sorted(decode_times)[len(decode_times) // 2]
+        result = negotiated_mode(cap)
+        result.update({
+            "measured_fps": 1.0 / interval if interval > 0 else 0.0,
+            "decode_ms": decode * 1000.0,
+            "latency_ms": (interval + decode) * 1000.0,
+        })
+        return result
+    finally:
+        cap.release()
+
+
+def probe_low_latency(target_fps, device=0, backend='auto', fourccs=CAPTURE_FOURCCS,
+                      resolutions=PROBE_RESOLUTIONS, log=print):
+    """
+    Testa as combinações de FOURCC e resolução (pedindo `target_fps` e buffer
+    de 1 quadro) e escolhe a de menor latência entre as que atingem o FPS alvo
+    (tolerância de 5%). Se nenhuma atingir, fica com a de maior FPS medido.
+    Retorna (configuração escolhida, medição dela), ou (None, None) se nenhum
+    modo entregou quadros.
+    """
+    results = []
+    for fourcc in fourccs:
+        for width, height in resolutions:
+            config = normalize_capture_config({
+                "device": device,
+                "backend": backend,
+                "fourcc": fourcc,
+                "width": width,
+                "height": height,
+                "fps": target_fps,
+                "buffer_size": 1,
+            })
+            measured = probe_mode(config)
+            if measured is None:
+                log(f"{fourcc} {width}x{height}: sem quadros")
+                continue
+            if measured["fourcc"] not in (None, fourcc) or (measured["width"], measured["height"]) != (width, height):
+                # O driver trocou o modo: a mesma medição aparece no modo aceito
+                log(f"{fourcc} {width}x{height}: recusado pelo driver")
+                continue
+            log(
+                f"{fourcc} {width}x{height}: {measured['measured_fps']:.1f} fps, "
+                f"decodificação {measured['decode_ms']:.1f} ms, latência ~{measured['latency_ms']:.1f} ms"
+            )
+            results.append((config, measured))
+
+    if not results:
+        return None, None
+    meets_target = [r for r in results if r[1]["measured_fps"] >= 0.95 * target_fps]
+    if meets_target:
+        best = min(meets_target, key=lambda r: r[1]["latency_ms"])
+    else:
+        best = max(results, key=lambda r: r[1]["measured_fps"])
+    return best
@@ -0,0 +1,174 @@
+"""
+Desfazer/refazer do canvas da DrawingWindow com limite de memória.
+
+Um traço não copia a imagem inteira: o canvas é dividido em blocos fixos
+(TILE_SIZE x TILE_SIZE) e só os blocos que o traço vai alterar são copiados,
+na primeira vez que são tocados (cópia na escrita). Desfazer troca o conteúdo
+desses blocos com a cópia guardada, então a mesma cópia serve para refazer.
+
+Operações na imagem inteira (limpar, abrir, screenshot) guardam a QImage
+anterior sem copiar pixels: a QImage tem compartilhamento implícito, e a
+imagem nova é outro objeto.
+
+Acima de `max_bytes` o histórico mais antigo é descartado primeiro.
+"""
+from PyQt5.QtCore import QRect, QRectF
+from PyQt5.QtGui import QPainter
+
+TILE_SIZE = 128
+DEFAULT_HISTORY_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _image_bytes(image):
+    return image.bytesPerLine() * image.height()
+
+
+class _TileEdit:
+    """Blocos alterados por um traço: {(coluna, linha): (retângulo, conteúdo do outro lado)}."""
+
+    def __init__(self):
+        self.tiles = {}
+        self.nbytes = 0
+
+    def apply(self, image):
+        # Troca cada bloco da imagem pelo guardado (serve para desfazer e refazer)
+        painter = QPainter(image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        for key, (rect, saved) in self.tiles.items():
+            current = image.copy(rect)
+            painter.drawImage(rect.topLeft(), saved)
+            self.tiles[key] = (rect, current)
+        painter.end()
+        return image
+
+
+class _ImageSwap:
+    """Imagem inteira substituída: guarda a QImage do outro lado (sem cópia de pixels)."""
+
+    def __init__(self, image):
+        self.image = image
+        self.nbytes = _image_bytes(image)
+
+    def apply(self, image):
+        previous, self.image = self.image, image
+        self.nbytes = _image_bytes(self.image)
+        return previous
+
+
+class CanvasHistory:
+    """
+    Pilhas de desfazer/refazer de uma QImage.
+
+        history.begin_stroke()
+        history.touch(image, rect)       # antes de pintar em `rect`
+        history.end_stroke()
+        history.replace(old_image)       # antes de trocar a imagem inteira
+        image = history.undo(image)      # devolve a imagem a exibir
+    """
+
+    def __init__(self, max_bytes=DEFAULT_HISTORY_MAX_BYTES, tile_size=TILE_SIZE):
+        self.max_bytes = max_bytes
+        self.tile_size = tile_size
+        self._undo = []
+        self._redo = []
+        self._stroke = None
+        self.evicted = 0
+
+    @property
+    def nbytes(self):
+        return sum(op.nbytes for op in self._undo) + sum(op.nbytes for op in self._redo)
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._stroke = None
+
+    # ------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------
+    def begin_stroke(self):
+        self._stroke = _TileEdit()
+
+    def touch(self, image, rect):
+        """Copia os blocos de `rect` (coordenadas da imagem) ainda não guardados neste traço."""
+        if self._stroke is None:
+            return
+        if isinstance(rect, QRectF):
+            rect = rect.toAlignedRect()
+        rect = rect.intersected(image.rect())
+        if rect.isEmpty():
+            return
+        size = self.tile_size
+        tiles = self._stroke.tiles
+        for row in range(rect.top() // size, rect.bottom() // size + 1):
+            for col in range(rect.left() // size, rect.right() // size + 1):
+                if (col, row) in tiles:
+                    continue
+                tile_rect = QRect(col * size, row * size, size, size).intersected(image.rect())
+                saved = image.copy(tile_rect)
+                tiles[(col, row)] = (tile_rect, saved)
+                self._stroke.nbytes += _image_bytes(saved)
+
+    def end_stroke(self):
+        stroke, self._stroke = self._stroke, None
+        if stroke is not None and stroke.tiles:
+            self._push(stroke)
+
+    def replace(self, previous_image):
+        """Registra a troca da imagem inteira; `previous_image` não deve mais ser pintada."""
+        self.end_stroke()
+        self._push(_ImageSwap(previous_image))
+
+    def _push(self, operation):
+        self._undo.append(operation)
+        # Uma edição nova invalida o que podia ser refeito
+        self._redo.clear()
+        self._evict()
+
+    def _evict(self):
+        total = self.nbytes
+        while self._undo and total > self.max_bytes:
+            total -= self._undo.pop(0).nbytes
+            self.evicted += 1
+
+    # ------------------------------------------------------------
+    # Desfazer / Refazer
+    # ------------------------------------------------------------
+    def undo(self, image):
+        """Desfaz a última operação. Retorna a imagem resultante (pode ser outro objeto)."""
+        self.end_stroke()
+        if not self._undo:
+            return image
+        operation = self._undo.pop()
+        image = operation.apply(image)
+        self._redo.append(operation)
+        return image
+
+    def redo(self, image):
+        self.end_stroke()
+        if not self._redo:
+            return image
+        operation = self._redo.pop()
+        image = operation.apply(image)
+        self._undo.append(operation)
+        self._evict()
+        return image
+
+    def stats(self):
+        return {
+            "undo": len(self._undo),
+            "redo": len(self._redo),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,224 @@
+import threading
+import time
+
+
+class LatestFrameSlot:
+    """
+    Slot de um único quadro entre a thread de captura (produtora) e a GUI (consumidora).
+
+    O produtor sempre sobrescreve o quadro anterior; o consumidor recebe apenas
+    o mais recente. Quadros sobrescritos antes de serem lidos contam como descartados.
+    Isso é o backpressure do pipeline: se o processamento atrasa, quadros são
+    pulados em vez de enfileirados.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+        self._timestamp = 0.0
+        self.captured = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def put(self, frame, timestamp=None):
+        """Guarda o quadro novo (e o instante da captura). Retorna True se o slot estava vazio."""
+        with self._lock:
+            was_empty = self._frame is None
+            if not was_empty:
+                self.dropped += 1
+            self._frame = frame
+            self._timestamp = time.perf_counter() if timestamp is None else timestamp
+            self.captured += 1
+            return was_empty
+
+    def take(self):
+        """
+        Retira o quadro mais recente. Retorna (quadro, instante_da_captura)
+        ou (None, None) se não houver quadro novo.
+        """
+        with self._lock:
+            frame = self._frame
+            self._frame = None
+            if frame is None:
+                return None, None
+            self.delivered += 1
+            return frame, self._timestamp
+
+    def stats(self):
+        with self._lock:
+            return {
+                "captured": self.captured,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+            }
+
+
+# Depois de atrasado, o aviso só some quando o processamento volta abaixo
+# desta fração do intervalo da câmera (evita piscar perto do limite)
+BEHIND_RECOVER_RATIO = 0.8
+
+
+class FramePacer:
+    """
+    Ritmo do pipeline guiado pela câmera.
+
+    Mede o intervalo real entre quadros entregues pelo dispositivo (15, 30, 60 fps...)
+    e, para cada quadro exibido, o custo de processamento e a latência desde a
+    captura. `behind` indica que o custo médio já não cabe no intervalo.
+
+    Atrasado, o pipeline não acumula fila: o LatestFrameSlot já pula os quadros
+    velhos. O que resta é avisar que a captura pede mais do que dá para
+    processar (`warning`).
+
+    Processamento em linha: custo = tempo do quadro na GUI, e um quadro é
+    "atrasado" quando a latência passa de um intervalo da câmera. Em pipeline
+    (pool de processos) a latência de vários intervalos é normal: o custo é o
+    de vazão (`cost` em on_processed) e atrasados são os quadros pulados
+    (`on_skipped`).
+    """
+
+    def __init__(self, smoothing=0.1):
+        self.smoothing = smoothing
+        self.frame_interval = None  # média móvel exponencial, em segundos
+        self.processing_time = None
+        self.latency = None
+        self._last_capture = None
+        self.processed = 0
+        self.late = 0
+        self._warning = False
+
+    def _ema(self, current, value):
+        if current is None:
+            return value
+        return current + self.smoothing * (value - current)
+
+    def on_capture(self, timestamp):
+        """Chamado pela thread de captura a cada quadro lido."""
+        if self._last_capture is not None:
+            self.frame_interval = self._ema(self.frame_interval, timestamp - self._last_capture)
+        self._last_capture = timestamp
+
+    def on_processed(self, captured_at, started_at, finished_at=None, cost=None):
+        """
+        Chamado pela GUI quando um quadro termina de ser processado. `cost` é o
+        custo de vazão de um pipeline (ex.: SharedMemoryFilterPool.frame_cost);
+        sem ele o custo é o tempo de started_at até finished_at.
+        """
+        finished_at = time.perf_counter() if finished_at is None else finished_at
+        pipelined = cost is not None
+        if not pipelined:
+            cost = finished_at - started_at
+        self.processing_time = self._ema(self.processing_time, cost)
+        latency = finished_at - captured_at
+        self.latency = self._ema(self.latency, latency)
+        self.processed += 1
+        if not pipelined and self.frame_interval is not None and latency > self.frame_interval:
+            self.late += 1
+
+    def on_skipped(self):
+        """Quadro descartado por um pipeline sem vaga (ex.: pool de processos ocupado)."""
+        self.late += 1
+
+    @property
+    def behind(self):
+        return (
+            self.frame_interval is not None
+            and self.processing_time is not None
+            and self.processing_time > self.frame_interval
+        )
+
+    def sustainable_fps(self):
+        """Maior taxa de captura que o processamento médio atual acompanha (ou None)."""
+        if not self.processing_time:
+            return None
+        return 1.0 / self.processing_time
+
+    def warning(self):
+        """Linha de aviso enquanto o pipeline está atrasado, ou None."""
+        if self.behind:
+            self._warning = True
+        elif self._warning and self.processing_time < BEHIND_RECOVER_RATIO * self.frame_interval:
+            self._warning = False
+        if not self._warning:
+            return None
+        return (
+            f"atrasado: {self.processing_time * 1000.0:.1f} ms por quadro > "
+            f"{self.frame_interval * 1000.0:.1f} ms da câmera "
+            f"(reduza a captura para até {self.sustainable_fps():.0f} fps)"
+        )
+
+    def stats(self):
+        def ms(value):
+            return None if value is None else value * 1000.0
+
+        return {
+            "camera_fps": 1.0 / self.frame_interval if self.frame_interval else None,
+            "frame_interval_ms": ms(self.frame_interval),
+            "processing_ms": ms(self.processing_time),
+            "latency_ms": ms(self.latency),
+            "processed": self.processed,
+            "late": self.late,
+            "behind": self.behind,
+            "sustainable_fps": self.sustainable_fps(),
+        }
+
+
+class FrameSink:
+    """
+    Destino dos quadros de uma câmera para um consumidor (ex.: uma SecondWindow):
+    o slot do quadro mais recente, o pacer, o StageTimer e o aviso de quadro novo.
+    `on_frame` é chamado (na thread de captura) somente quando o slot estava vazio,
+    ou seja, quando o consumidor já pegou o quadro anterior.
+    """
+
+    def __init__(self, slot, on_frame=None, pacer=None, stage_timer=None):
+        self.slot = slot
+        self.on_frame = on_frame
+        self.pacer = pacer
+        self.stage_timer = stage_timer
+
+    def deliver(self, frame, timestamp, read_time):
+        if self.stage_timer is not None and self.stage_timer.enabled:
+            self.stage_timer.record('capture', read_time)
+        if self.pacer is not None:
+            self.pacer.on_capture(timestamp)
+        if self.slot.put(frame, timestamp) and self.on_frame is not None:
+            self.on_frame()
+
+
+class CaptureThread(threading.Thread):
+    """
+    Thread dedicada que lê a webcam continuamente.
+
+    Assim uma leitura lenta da câmera não bloqueia a pintura, o arraste nem a
+    barra de ferramentas, e o buffer do driver é esvaziado o mais rápido possível.
+    Cada quadro lido é entregue a `deliver(frame, instante, tempo_de_leitura)`.
+    """
+
+    def __init__(self, cap, deliver):
+        super().__init__(name="CaptureThread", daemon=True)
+        self.cap = cap
+        self.deliver = deliver
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                t0 = time.perf_counter()
+                ret, frame = self.cap.read()
+                if not ret:
+                    # Falha momentânea da câmera: evita girar em falso
+                    time.sleep(0.01)
+                    continue
+                # O ritmo vem da própria câmera: read() bloqueia até o próximo quadro
+                timestamp = time.perf_counter()
+                self.deliver(frame, timestamp, timestamp - t0)
+        finally:
+            # A câmera é liberada pela própria thread, nunca durante um read()
+            self.cap.release()
+
+    def stop(self, timeout=2.0):
+        """Sinaliza a parada e aguarda a thread terminar."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
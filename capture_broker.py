@@ -0,0 +1,232 @@
+"""
+Compartilhamento de uma câmera entre várias janelas da webcam.
+
+Cada dispositivo é aberto uma única vez, por uma única CaptureThread; as
+janelas se inscrevem (contagem de referências) e recebem o mesmo quadro no
+próprio LatestFrameSlot. Quando a última inscrição sai, a thread para e o
+dispositivo é liberado.
+
+Com mais de uma janela o quadro é entregue somente leitura: as etapas que
+escrevem no lugar (sal e pimenta) copiam antes. O trabalho comum também é
+feito uma vez só: janelas do mesmo tamanho reaproveitam o mesmo
+`fit_to_display` do quadro (o flip já é só uma transformação da pintura).
+
+    subscription = broker.subscribe(config, FrameSink(slot, on_frame, pacer, timer))
+    shared, captured_at = slot.take()
+    frame = shared.fit_to_display(width, height)
+    subscription.close()
+"""
+import threading
+
+from camera import open_camera, negotiated_mode, normalize_capture_config
+from capture import CaptureThread
+from viewport import fit_to_display
+
+
+class SharedFrame:
+    """Quadro da câmera entregue a todas as janelas, com os redimensionamentos já feitos."""
+
+    def __init__(self, frame, shared=False):
+        self.frame = frame
+        self.shared = shared
+        if shared:
+            frame.setflags(write=False)
+        self._resized = {}
+        self._lock = threading.Lock()
+        self.resize_hits = 0
+
+    def fit_to_display(self, width, height):
+        """`viewport.fit_to_display` calculado uma vez por tamanho de destino."""
+        key = (width, height)
+        # O lock evita que duas janelas do mesmo tamanho redimensionem em paralelo
+        with self._lock:
+            resized = self._resized.get(key)
+            if resized is None:
+                resized = fit_to_display(self.frame, width, height)
+                if self.shared and resized is not self.frame:
+                    resized.setflags(write=False)
+                self._resized[key] = resized
+            else:
+                self.resize_hits += 1
+        return resized
+
+
+class CaptureSubscription:
+    """Inscrição de um consumidor numa câmera do broker (`close()` desfaz)."""
+
+    def __init__(self, broker, device, sink):
+        self.broker = broker
+        self.device = device
+        self.sink = sink
+
+    @property
+    def mode(self):
+        """Modo negociado com o driver, comum a todas as inscrições do dispositivo."""
+        return self.broker.device_mode(self.device)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class _Device:
+    def __init__(self, config):
+        self.config = config
+        self.cap = None
+        self.mode = None
+        self.thread = None
+        # Substituída por inteiro (nunca alterada no lugar): a thread de captura lê sem lock
+        self.sinks = ()
+        self.frames = 0
+        self.resize_hits = 0
+        self._last_frame = None
+        # True enquanto uma inscrição reabre o dispositivo (fora do lock do broker)
+        self.busy = False
+
+    def open(self):
+        self.cap = open_camera(self.config)
+        if not self.cap.isOpened():
+            self.cap = None
+            return False
+        self.mode = negotiated_mode(self.cap)
+        self.thread = CaptureThread(self.cap, self.deliver)
+        self.thread.start()
+        return True
+
+    def close(self):
+        if self.thread is not None:
+            # A própria thread libera a câmera ao sair
+            self.thread.stop()
+            self.thread = None
+        self.cap = None
+        self._last_frame = None
+
+    def reopen(self, config):
+        """
+        Reabre com `config`, mantendo as inscrições. O driver só aceita um modo
+        por câmera, então a captura atual para antes; se a nova configuração
+        não abrir, a anterior volta. Retorna True se a nova entrou, False se
+        a anterior foi restaurada e None se nem ela abriu.
+        """
+        previous = self.config
+        self.close()
+        self.config = config
+        if self.open():
+            return True
+        self.config = previous
+        return False if self.open() else None
+
+    def deliver(self, frame, timestamp, read_time):
+        sinks = self.sinks
+        if self._last_frame is not None:
+            self.resize_hits += self._last_frame.resize_hits
+        shared = SharedFrame(frame, shared=len(sinks) > 1)
+        self._last_frame = shared
+        self.frames += 1
+        for sink in sinks:
+            sink.deliver(shared, timestamp, read_time)
+
+
+class CaptureBroker:
+    """
+    Abre cada dispositivo uma vez e distribui os quadros às inscrições.
+
+    Uma inscrição com configuração diferente (formato, resolução...) reabre
+    o dispositivo com ela para todas as janelas: só existe um modo por câmera.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Abrir uma câmera pode levar segundos: acontece fora de `_lock`, uma por vez
+        self._open_lock = threading.Lock()
+        self._devices = {}
+
+    def _attach(self, key, config, sink):
+        """Com `_lock`: inscreve `sink` se o dispositivo já roda com `config`."""
+        device = self._devices.get(key)
+        if device is None or device.busy or device.config != config:
+            return None
+        device.sinks = device.sinks + (sink,)
+        return CaptureSubscription(self, key, sink)
+
+    def subscribe(self, config, sink):
+        """
+        Inscreve `sink` (um FrameSink). Retorna a inscrição, ou None se a câmera
+        não abriu com `config`; nesse caso as outras inscrições do dispositivo
+        continuam recebendo quadros na configuração anterior.
+        """
+        config = normalize_capture_config(config)
+        key = config["device"]
+        with self._lock:
+            subscription = self._attach(key, config, sink)
+        if subscription is not None:
+            return subscription
+
+        with self._open_lock:
+            with self._lock:
+                # Outro pedido pode ter aberto a câmera neste modo enquanto este esperava
+                subscription = self._attach(key, config, sink)
+                if subscription is not None:
+                    return subscription
+                device = self._devices.get(key)
+                if device is not None:
+                    device.busy = True
+
+            if device is None:
+                device = _Device(config)
+                if not device.open():
+                    return None
+                with self._lock:
+                    device.sinks = (sink,)
+                    self._devices[key] = device
+                return CaptureSubscription(self, key, sink)
+
+            # Formato/resolução só mudam reabrindo o dispositivo, para todas as janelas
+            reopened = device.reopen(config)
+            to_close = False
+            with self._lock:
+                device.busy = False
+                if reopened:
+                    device.sinks = device.sinks + (sink,)
+                    self._devices[key] = device
+                elif reopened is None or not device.sinks:
+                    # A câmera sumiu, ou as outras janelas saíram durante a reabertura
+                    to_close = True
+                    if self._devices.get(key) is device:
+                        del self._devices[key]
+            if to_close:
+                device.close()
+            return CaptureSubscription(self, key, sink) if reopened else None
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            device = self._devices.get(subscription.device)
+            if device is None or subscription.sink not in device.sinks:
+                return
+            device.sinks = tuple(s for s in device.sinks if s is not subscription.sink)
+            if device.sinks or device.busy:
+                # Sem inscrições durante uma reabertura: quem reabre decide o destino
+                return
+            del self._devices[subscription.device]
+        # Última janela: para a captura e libera o dispositivo (fora do lock: espera a thread)
+        device.close()
+
+    def device_mode(self, device):
+        with self._lock:
+            entry = self._devices.get(device)
+            return entry.mode if entry is not None else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                key: {
+                    "subscribers": len(device.sinks),
+                    "frames": device.frames,
+                    "shared_resizes": device.resize_hits,
+                    "mode": device.mode,
+                }
+                for key, device in self._devices.items()
+            }
+
+
+# Broker do processo: todas as SecondWindow compartilham as câmeras por ele
+capture_broker = CaptureBroker()
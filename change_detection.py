@@ -0,0 +1,164 @@
+"""
+Reaproveitamento da saída filtrada quando a cena não muda.
+
+Antes de filtrar, o quadro é reduzido a uma miniatura (INTER_AREA) dividida
+numa grade de blocos. Cada bloco é comparado com a miniatura do quadro que
+gerou a saída guardada:
+  - nenhum bloco mudou      -> a saída anterior é devolvida como está
+  - poucos blocos mudaram   -> só esses blocos são filtrados de novo (com halo)
+  - muitos blocos mudaram   -> o quadro inteiro é filtrado
+
+A referência de cada bloco só é atualizada quando ele é filtrado de novo,
+então mudanças lentas (que nunca passam do limite entre dois quadros
+seguidos) acabam sendo detectadas. Cadeias aleatórias (sal e pimenta)
+nunca são reaproveitadas: o ruído precisa mudar a cada quadro.
+"""
+import time
+
+import cv2
+import numpy as np
+
+# Diferença média (0-255) de um bloco da miniatura acima da qual ele mudou
+DEFAULT_CHANGE_THRESHOLD = 2.0
+# Grade de blocos (colunas, linhas) e pixels da miniatura por bloco
+CHANGE_GRID = (8, 6)
+PROBE_CELL = 8
+# Acima desta fração de blocos alterados é mais barato filtrar o quadro inteiro
+MAX_PARTIAL_FRACTION = 0.5
+
+
+def _grid_edges(size, cells):
+    return np.linspace(0, size, cells + 1).round().astype(int)
+
+
+class FilterCache:
+    """
+    Guarda a última saída da cadeia e decide, a cada quadro, entre reaproveitar,
+    refiltrar blocos ou filtrar tudo.
+
+        cache = FilterCache()
+        output = cache.apply(chain, frame, filter_fn, context=(shape, mode))
+
+    `filter_fn(frame)` filtra o quadro inteiro (ex.: com recorte da elipse);
+    os blocos alterados são refiltrados direto com `chain`. `context` reúne o
+    que muda a saída de `filter_fn` sem mudar a cadeia (formato da janela,
+    modo de processamento): se ele mudar, a saída guardada é descartada.
+    """
+
+    def __init__(self, threshold=DEFAULT_CHANGE_THRESHOLD, grid=CHANGE_GRID):
+        self.threshold = threshold
+        self.grid = grid
+        self._key = None
+        self._reference = None
+        self._output = None
+        self._full_time = None  # média móvel do custo de filtrar o quadro inteiro
+        self.frames = 0
+        self.hits = 0
+        self.partial = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.tiles_refiltered = 0
+        self.time_spent = 0.0
+        self.time_saved = 0.0
+
+    def reset(self):
+        self._key = None
+        self._reference = None
+        self._output = None
+
+    def _probe(self, frame):
+        cols, rows = self.grid
+        return cv2.resize(frame, (cols * PROBE_CELL, rows * PROBE_CELL), interpolation=cv2.INTER_AREA)
+
+    def _changed_tiles(self, probe):
+        cols, rows = self.grid
+        diff = cv2.absdiff(probe, self._reference).astype(np.float32)
+        cells = diff.reshape(rows, PROBE_CELL, cols, PROBE_CELL, -1).mean(axis=(1, 3, 4))
+        return cells > self.threshold
+
+    def apply(self, chain, frame, filter_fn, context=None):
+        self.frames += 1
+        if not chain.deterministic:
+            self.bypassed += 1
+            self.reset()
+            return filter_fn(frame)
+
+        t0 = time.perf_counter()
+        probe = self._probe(frame)
+        # O raio do desfoque muda sem recompilar a cadeia: entra na chave
+        key = (chain, chain.blur.radius, chain.blur.mode, frame.shape, frame.dtype, context)
+        if key != self._key or self._output is None:
+            return self._filter_all(key, probe, frame, filter_fn, t0)
+
+        changed = self._changed_tiles(probe)
+        count = int(changed.sum())
+        if count == 0:
+            self.hits += 1
+            self._account(t0)
+            return self._output
+
+        halos = [chain.stage_halo(name) for name, _ in chain.stages]
+        height, width = frame.shape[:2]
+        cols, rows = self.grid
+        ys = _grid_edges(height, rows)
+        xs = _grid_edges(width, cols)
+        halo = None if None in halos else sum(halos)
+        if halo is None or halo > min(np.diff(ys).min(), np.diff(xs).min()):
+            # Etapa que precisa do quadro inteiro, ou kernel maior que um bloco
+            return self._filter_all(key, probe, frame, filter_fn, t0)
+        if halo:
+            # A saída perto da borda de um bloco depende dos vizinhos (até `halo` pixels)
+            changed = cv2.dilate(changed.astype(np.uint8), np.ones((3, 3), np.uint8)).astype(bool)
+            count = int(changed.sum())
+        if count > MAX_PARTIAL_FRACTION * changed.size:
+            return self._filter_all(key, probe, frame, filter_fn, t0)
+
+        # Refiltra só os blocos alterados (com halo) sobre uma cópia da saída anterior
+        output = self._output.copy()
+        for row, col in zip(*np.nonzero(changed)):
+            y0, y1, x0, x1 = ys[row], ys[row + 1], xs[col], xs[col + 1]
+            ty0, ty1 = max(0, y0 - halo), min(height, y1 + halo)
+            tx0, tx1 = max(0, x0 - halo), min(width, x1 + halo)
+            result = chain(frame[ty0:ty1, tx0:tx1])
+            output[y0:y1, x0:x1] = result[y0 - ty0:y1 - ty0, x0 - tx0:x1 - tx0]
+            py0, px0 = row * PROBE_CELL, col * PROBE_CELL
+            self._reference[py0:py0 + PROBE_CELL, px0:px0 + PROBE_CELL] = \
+                probe[py0:py0 + PROBE_CELL, px0:px0 + PROBE_CELL]
+        self._output = output
+        self.partial += 1
+        self.tiles_refiltered += count
+        self._account(t0)
+        return output
+
+    def _filter_all(self, key, probe, frame, filter_fn, t0):
+        output = filter_fn(frame)
+        elapsed = time.perf_counter() - t0
+        self._full_time = elapsed if self._full_time is None else self._full_time + 0.1 * (elapsed - self._full_time)
+        self._key = key
+        self._reference = probe
+        self._output = output
+        self.misses += 1
+        self.time_spent += elapsed
+        return output
+
+    def _account(self, t0):
+        elapsed = time.perf_counter() - t0
+        self.time_spent += elapsed
+        if self._full_time is not None:
+            # Economia estimada: custo médio do quadro inteiro menos o que foi gasto
+            self.time_saved += max(0.0, self._full_time - elapsed)
+
+    def stats(self):
+        cached = self.frames - self.bypassed
+        total = self.time_spent + self.time_saved
+        return {
+            "frames": self.frames,
+            "hits": self.hits,
+            "partial": self.partial,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": (self.hits + self.partial) / cached if cached else 0.0,
+            "tiles_refiltered": self.tiles_refiltered,
+            "cpu_saved_ms": self.time_saved * 1000.0,
+            "cpu_saved_ratio": self.time_saved / total if total else 0.0,
+        }
@@ -0,0 +1,46 @@
+"""
+Valores padrão das configurações usadas pela MainWindow.
+
+Este módulo não importa OpenCV nem NumPy: a MainWindow o importa na partida
+e os módulos pesados (câmera, filtros, replay, servidor MJPEG) só são
+carregados quando usados pela primeira vez. Os módulos de origem reexportam
+estes nomes (ex.: `from camera import DEFAULT_CAPTURE_CONFIG` continua valendo).
+"""
+
+# Fração dos pixels atingidos por quadro (metade sal, metade pimenta).
+# 0.0003 reproduz a quantidade de pontos do apply_salt_pepper original.
+DEFAULT_SALT_PEPPER_DENSITY = 0.0003
+
+DEFAULT_REPLAY_SECONDS = 30
+
+# MJPG: comprimido pela câmera (FPS alto em resoluções altas, custa decodificar)
+# YUYV: sem compressão (sem decodificação, mas limitado pela banda do USB)
+CAPTURE_FOURCCS = ('MJPG', 'YUYV')
+
+# None = manter o padrão do backend
+DEFAULT_CAPTURE_CONFIG = {
+    "device": 0,
+    "backend": 'auto',
+    "fourcc": None,
+    "width": None,
+    "height": None,
+    "fps": None,
+    "buffer_size": None,
+}
+
+DEFAULT_STREAM_CONFIG = {
+    "enabled": False,
+    "host": '127.0.0.1',
+    "port": 8080,
+    "max_fps": 15,
+    "max_width": 1280,
+    "max_height": 720,
+    "quality": 80,
+}
+
+
+def normalize_stream_config(config=None):
+    normalized = dict(DEFAULT_STREAM_CONFIG)
+    if config:
+        normalized.update({key: value for key, value in config.items() if key in DEFAULT_STREAM_CONFIG})
+    return normalized
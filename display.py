@@ -0,0 +1,34 @@
+import cv2
+import numpy as np
+
+from PyQt5.QtGui import QImage
+
+# Qt >= 5.14 aceita BGR diretamente; sem ele é preciso converter para RGB
+HAS_BGR888 = hasattr(QImage, 'Format_BGR888')
+
+
+def wrap_frame(frame):
+    """
+    Cria uma QImage que aponta para os pixels do array (sem cópia).
+
+    A QImage NÃO é dona do buffer: quem chama deve manter `frame` vivo
+    enquanto a QImage for usada. Retorna (qimage, frame, bytes_copiados),
+    onde `frame` é o array realmente referenciado.
+    """
+    copied = 0
+    if not frame.flags.c_contiguous:
+        frame = np.ascontiguousarray(frame)
+        copied += frame.nbytes
+    height, width = frame.shape[:2]
+
+    if frame.ndim == 2:
+        fmt = QImage.Format_Grayscale8
+    elif HAS_BGR888:
+        fmt = QImage.Format_BGR888
+    else:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        copied += frame.nbytes
+        fmt = QImage.Format_RGB888
+
+    image = QImage(frame.data, width, height, frame.strides[0], fmt)
+    return image, frame, copied
@@ -1,5 +1,5 @@
-from PyQt5.QtCore import Qt, QPoint
-from PyQt5.QtGui import QPainter, QPen, QImage
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QPainter, QPen, QImage, QPolygonF, QKeySequence
 from PyQt5.QtWidgets import (
     QMainWindow,
     QAction,
@@ -12,6 +12,8 @@ from PyQt5.QtWidgets import (
 # Import QtWidgets
 from PyQt5 import QtWidgets
 
+from canvas_history import CanvasHistory, DEFAULT_HISTORY_MAX_BYTES
+
 
 class DrawingWindow(QMainWindow):
     """
@@ -20,8 +22,17 @@ class DrawingWindow(QMainWindow):
       - Paleta de cores.
       - Funções de abrir, salvar, limpar.
       - Screenshot da tela para 'colar' no canvas.
+
+    Cada traço usa um único QPainter (aberto no clique, fechado ao soltar).
+    Os pontos do mouse/tablet são acumulados e desenhados juntos, como uma
+    polilinha, no próximo paintEvent; só o retângulo do trecho novo (com a
+    largura do pincel) é repintado. Quando a janela não tem o tamanho da
+    imagem, uma cópia redimensionada do canvas fica em cache.
+
+    Desfazer/Refazer (Ctrl+Z / Ctrl+Y) guardam só os blocos alterados por
+    cada traço, com limite de memória (canvas_history.py).
     """
-    def __init__(self):
+    def __init__(self, history_max_bytes=DEFAULT_HISTORY_MAX_BYTES):
         super().__init__()
         self.setWindowTitle("Janela de Desenho")
         self.setGeometry(200, 100, 800, 600)
@@ -34,7 +45,14 @@ class DrawingWindow(QMainWindow):
         self.drawing = False       # Se o mouse está pressionado
         self.brush_size = 3
         self.brush_color = Qt.black
-        self.last_point = QPoint() # Último ponto usado para "ligar" as linhas
+        self.last_point = QPointF() # Último ponto usado para "ligar" as linhas (coordenadas da imagem)
+        self._stroke_painter = None  # QPainter do traço atual
+        self._pending_points = []    # Pontos ainda não desenhados (o primeiro já foi)
+        # Canvas no tamanho da janela (None = refazer; não usado se os tamanhos coincidem)
+        self._scaled_canvas = None
+        self._stale_rect = QRectF()  # trecho da imagem ainda não copiado para o cache
+        # Desfazer/refazer por blocos (o mais antigo sai primeiro acima do limite)
+        self.history = CanvasHistory(history_max_bytes)
 
         # Cria barra de ferramentas com ações
         self.create_toolbar()
@@ -68,35 +86,142 @@ class DrawingWindow(QMainWindow):
         action_screenshot.triggered.connect(self.take_screenshot)
         toolbar.addAction(action_screenshot)
 
+        # Ações para desfazer/refazer
+        action_undo = QAction("Desfazer", self)
+        action_undo.setShortcut(QKeySequence.Undo)
+        action_undo.triggered.connect(self.undo)
+        toolbar.addAction(action_undo)
+
+        action_redo = QAction("Refazer", self)
+        action_redo.setShortcut(QKeySequence.Redo)
+        action_redo.triggered.connect(self.redo)
+        toolbar.addAction(action_redo)
+
     # ---------------------------------
     # Eventos de mouse
     # ---------------------------------
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
-            self.drawing = True
-            self.last_point = event.pos()
-            # Se quiser desenhar algo imediato ao clicar, pode chamar update()
-            # mas normalmente só desenhamos no moveEvent.
+            self.begin_stroke(self._to_image(event.pos()))
 
     def mouseMoveEvent(self, event):
         if (event.buttons() & Qt.LeftButton) and self.drawing:
-            painter = QPainter(self.image)
-            pen = QPen(self.brush_color, self.brush_size, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
-            painter.setPen(pen)
-            painter.drawLine(self.last_point, event.pos())
-            self.last_point = event.pos()
-            self.update()  # Solicita o repaint() do widget
+            point = self._to_image(event.pos())
+            # Só acumula: o desenho acontece no paintEvent, uma vez para vários eventos
+            self._pending_points.append(point)
+            self._invalidate(QRectF(self.last_point, point).normalized())
+            self.last_point = point
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton:
-            self.drawing = False
+            self.end_stroke()
+
+    # ---------------------------------
+    # Traços
+    # ---------------------------------
+    def begin_stroke(self, point):
+        self.end_stroke()
+        self.drawing = True
+        self._stroke_painter = QPainter(self.image)
+        self._stroke_painter.setPen(
+            QPen(self.brush_color, self.brush_size, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
+        )
+        self.last_point = point
+        self._pending_points = [point]
+        self.history.begin_stroke()
+
+    def end_stroke(self):
+        if self._stroke_painter is None:
+            return
+        self._flush_stroke()
+        self._stroke_painter.end()
+        self._stroke_painter = None
+        self._pending_points = []
+        self.drawing = False
+        self.history.end_stroke()
+
+    def _flush_stroke(self):
+        """Desenha os pontos acumulados desde o último paintEvent numa única polilinha."""
+        if self._stroke_painter is None or len(self._pending_points) < 2:
+            return
+        self._stroke_painter.drawPolyline(QPolygonF(self._pending_points))
+        # O último ponto continua o próximo trecho
+        self._pending_points = self._pending_points[-1:]
+
+    def _invalidate(self, image_rect):
+        """Repinta só o trecho da imagem alterado, com folga da largura do pincel."""
+        margin = self.brush_size / 2.0 + 2
+        image_rect = image_rect.adjusted(-margin, -margin, margin, margin)
+        # Guarda os blocos antes de o trecho ser pintado (no próximo paintEvent)
+        self.history.touch(self.image, image_rect)
+        self._stale_rect = self._stale_rect.united(image_rect)
+        self.update(self._to_widget(image_rect).toAlignedRect())
+
+    def _to_image(self, pos):
+        """Posição na janela -> posição na imagem (o canvas é esticado para a janela)."""
+        return QPointF(
+            pos.x() * self.image.width() / max(1, self.width()),
+            pos.y() * self.image.height() / max(1, self.height())
+        )
+
+    def _to_widget(self, image_rect):
+        sx = self.width() / max(1, self.image.width())
+        sy = self.height() / max(1, self.image.height())
+        return QRectF(image_rect.x() * sx, image_rect.y() * sy, image_rect.width() * sx, image_rect.height() * sy)
+
+    def _replace_image(self, image):
+        """Troca a imagem inteira como uma operação que pode ser desfeita (sem copiar a anterior)."""
+        self.end_stroke()
+        self.history.replace(self.image)
+        self.image = image
+        self._canvas_replaced()
+
+    def undo(self):
+        self.end_stroke()
+        self.image = self.history.undo(self.image)
+        self._canvas_replaced()
+
+    def redo(self):
+        self.end_stroke()
+        self.image = self.history.redo(self.image)
+        self._canvas_replaced()
+
+    def set_history_limit(self, max_bytes):
+        self.history.set_max_bytes(max_bytes)
+
+    def _canvas_replaced(self):
+        """A imagem inteira mudou (abrir, limpar, screenshot): refaz o cache e repinta tudo."""
+        self._scaled_canvas = None
+        self._stale_rect = QRectF()
+        self.update()
 
     # ---------------------------------
     # paintEvent -> desenha o self.image
     # ---------------------------------
     def paintEvent(self, event):
+        self._flush_stroke()
+        source = self._display_canvas()
         canvas_painter = QPainter(self)
-        canvas_painter.drawImage(self.rect(), self.image, self.image.rect())
+        # Só a área pedida (o retângulo sujo do traço, ou a janela toda)
+        canvas_painter.drawImage(event.rect(), source, event.rect())
+        canvas_painter.end()
+
+    def _display_canvas(self):
+        """Canvas no tamanho da janela: a própria imagem ou o cache redimensionado."""
+        if self.image.size() == self.size():
+            self._scaled_canvas = None
+            self._stale_rect = QRectF()
+            return self.image
+        if self._scaled_canvas is None or self._scaled_canvas.size() != self.size():
+            self._scaled_canvas = self.image.scaled(self.size(), Qt.IgnoreAspectRatio, Qt.FastTransformation)
+        elif not self._stale_rect.isEmpty():
+            # Atualiza no cache só o trecho desenhado desde a última pintura
+            image_rect = self._stale_rect.intersected(QRectF(self.image.rect()))
+            cache_painter = QPainter(self._scaled_canvas)
+            cache_painter.drawImage(self._to_widget(image_rect), self.image, image_rect)
+            cache_painter.end()
+        self._stale_rect = QRectF()
+        return self._scaled_canvas
 
     # ---------------------------------
     # Funções de Toolbar
@@ -135,19 +260,21 @@ class DrawingWindow(QMainWindow):
 
             # Redimensiona o canvas para o tamanho da janela, se quiser.
             # Ou substitui a imagem direto e redimensiona a janela.
-            self.image = loaded_image.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.update()
+            self._replace_image(loaded_image.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
 
     def clear_canvas(self):
         """Limpa todo o canvas (preenche de branco)."""
-        self.image.fill(Qt.white)
-        self.update()
+        # Imagem nova em vez de fill(): a anterior fica no histórico sem ser copiada
+        blank = QImage(self.image.size(), QImage.Format_RGB32)
+        blank.fill(Qt.white)
+        self._replace_image(blank)
 
     def take_screenshot(self):
         """
         Faz um screenshot de toda a tela do computador,
         porém sem capturar esta janela de desenho.
         """
+        self.end_stroke()
         # 1) Esconde a janela para que ela não apareça no screenshot
         self.hide()
         # Esconde a janela por 2 segundos. 
@@ -171,15 +298,17 @@ class DrawingWindow(QMainWindow):
         # 5) Converte para QImage
         screenshot_image = pixmap.toImage()
 
-        # 6) Desenha o screenshot no canvas (self.image)
-        painter = QPainter(self.image)
+        # 6) Desenha o screenshot no canvas. A QImage nova compartilha os pixels
+        #    da anterior (que vai para o histórico) até o QPainter escrever nela
+        canvas = QImage(self.image)
+        painter = QPainter(canvas)
         # Se quiser redimensionar proporcionalmente para caber no canvas:
         scaled_shot = screenshot_image.scaled(
-            self.image.size(),
+            canvas.size(),
             Qt.KeepAspectRatio,
             Qt.SmoothTransformation
         )
         painter.drawImage(0, 0, scaled_shot)
         painter.end()
 
-        self.update()
+        self._replace_image(canvas)
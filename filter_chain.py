@@ -0,0 +1,103 @@
+import cv2
+
+from filters import FILTERS, sobel_magnitude
+from blur import BlurEngine
+from noise import SaltPepperNoise
+
+
+class FilterChain:
+    """
+    Cadeia ordenada de filtros, compilada uma única vez quando muda.
+
+    A compilação acompanha a representação da imagem entre as etapas
+    (BGR ou cinza) e funde o que é compartilhado: se 'gray' e 'sobel' estão
+    na cadeia, o cvtColor para cinza roda uma vez só, e a conversão de volta
+    para BGR acontece apenas no final.
+
+        chain = FilterChain(['gray', 'sobel', 'gaussian'])
+        frame = chain(frame)
+    """
+
+    def __init__(self, names, sobel_quality='exact', blur=None, salt_pepper=None):
+        unknown = [name for name in names if name not in FILTERS]
+        if unknown:
+            raise ValueError(f"Filtro(s) desconhecido(s): {', '.join(unknown)}")
+        self.names = list(names)
+        self.sobel_quality = sobel_quality
+        self.blur = blur if blur is not None else BlurEngine()
+        self.salt_pepper = salt_pepper if salt_pepper is not None else SaltPepperNoise()
+        self.stages = self._compile()
+
+    def _compile(self):
+        """Gera a lista de etapas (nome, função) já com as conversões de cor fundidas."""
+        stages = []
+        is_gray = False
+
+        def to_gray():
+            stages.append(('bgr2gray', lambda img: cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)))
+
+        for name in self.names:
+            if name == 'gray':
+                if not is_gray:
+                    to_gray()
+                    is_gray = True
+            elif name == 'sobel':
+                if not is_gray:
+                    to_gray()
+                    is_gray = True
+                quality = self.sobel_quality
+                stages.append(('sobel', lambda img, q=quality: sobel_magnitude(img, q)))
+            elif name == 'gaussian':
+                # Desfocar o cinza e depois converter equivale a desfocar os 3 canais iguais
+                stages.append(('gaussian', self.blur.apply))
+            elif name == 'salt_pepper':
+                stages.append(('salt_pepper', self.salt_pepper.apply))
+
+        if is_gray:
+            stages.append(('gray2bgr', lambda img: cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)))
+        return stages
+
+    def halo(self):
+        """
+        Borda extra (em pixels) que uma região precisa para que o resultado
+        filtrado dentro dela seja igual ao do quadro inteiro.
+        Calculada na hora porque o raio do desfoque pode mudar sem recompilar.
+        """
+        halo = 0
+        for name, _ in self.stages:
+            if name == 'sobel':
+                halo += 1
+            elif name == 'gaussian':
+                halo += self.blur.halo()
+        return halo
+
+    @property
+    def deterministic(self):
+        """False se a cadeia tem etapas aleatórias (a saída muda mesmo com a entrada igual)."""
+        return all(name != 'salt_pepper' for name, _ in self.stages)
+
+    def stage_halo(self, name):
+        """
+        Borda exata que uma etapa exige para rodar em faixas do quadro, ou None
+        se ela precisa do quadro inteiro: o sal e pimenta é aleatório e a rota
+        'downscale' do desfoque depende do tamanho da imagem.
+        """
+        if name == 'sobel':
+            return 1
+        if name == 'gaussian':
+            return None if self.blur.route() == 'downscale' else self.blur.halo()
+        if name == 'salt_pepper':
+            return None
+        # Conversões de cor: pixel a pixel
+        return 0
+
+    def __call__(self, frame):
+        for _, stage in self.stages:
+            frame = stage(frame)
+        return frame
+
+    def __bool__(self):
+        return bool(self.stages)
+
+    def __repr__(self):
+        return f"FilterChain({' -> '.join(name for name, _ in self.stages) or 'vazia'})"
@@ -1,34 +1,83 @@
 import cv2
 import numpy as np
 
-def apply_sobel(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-    sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-    sobel = cv2.sqrt(sobelx**2 + sobely**2)
-    sobel = cv2.convertScaleAbs(sobel)
-    return cv2.cvtColor(sobel, cv2.COLOR_GRAY2BGR)
+from blur import BlurEngine
+from noise import SaltPepperNoise
+
+# Níveis de qualidade do Sobel:
+#   'exact'  -> saída original (gradientes em float64, sqrt(gx² + gy²))
+#   'fast'   -> gradientes em float32 e magnitude em float32
+#   'l1'     -> gradientes em 16 bits e aproximação |gx| + |gy|
+#   'scharr' -> kernel Scharr 3x3 (mais isotrópico) em float32
+SOBEL_QUALITIES = ('exact', 'fast', 'l1', 'scharr')
+
+def _exact_magnitude(gx, gy):
+    # sqrt(gx² + gy²) com raiz corretamente arredondada. O cv2.magnitude (IPP)
+    # pode errar o último bit conforme o tamanho da imagem; no Scharr a escala
+    # de 1/4 põe magnitudes inteiras (4k + 2) exatamente no meio do
+    # arredondamento para uint8, e esse bit muda o pixel de saída (e faria as
+    # faixas de tiling.py divergirem do quadro inteiro)
+    return cv2.sqrt(cv2.add(cv2.multiply(gx, gx), cv2.multiply(gy, gy)))
 
-def apply_gaussian(frame):
-    return cv2.GaussianBlur(frame, (15, 15), 0)
+def sobel_magnitude(gray, quality='exact'):
+    """Magnitude do gradiente (uint8) de uma imagem em tons de cinza."""
+    if quality == 'exact':
+        sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
+        sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
+        sobel = cv2.sqrt(sobelx**2 + sobely**2)
+        return cv2.convertScaleAbs(sobel)
 
-def apply_salt_pepper(frame):
-    row, col, ch = frame.shape
-    s_vs_p = 0.0001
-    amount = s_vs_p
+    ddepth = cv2.CV_64F if gray.dtype == np.float64 else cv2.CV_32F
+    if quality == 'fast':
+        sobelx = cv2.Sobel(gray, ddepth, 1, 0, ksize=3)
+        sobely = cv2.Sobel(gray, ddepth, 0, 1, ksize=3)
+        # Sem escala o arredondamento para uint8 nunca cai a um bit do meio:
+        # o cv2.magnitude dá o mesmo resultado em qualquer recorte
+        return cv2.convertScaleAbs(cv2.magnitude(sobelx, sobely))
+    if quality == 'l1':
+        # CV_16S só é aceito para entrada uint8
+        if gray.dtype == np.uint8:
+            ddepth = cv2.CV_16S
+        absx = cv2.convertScaleAbs(cv2.Sobel(gray, ddepth, 1, 0, ksize=3))
+        absy = cv2.convertScaleAbs(cv2.Sobel(gray, ddepth, 0, 1, ksize=3))
+        return cv2.add(absx, absy)
+    if quality == 'scharr':
+        scharrx = cv2.Scharr(gray, ddepth, 1, 0)
+        scharry = cv2.Scharr(gray, ddepth, 0, 1)
+        # Os pesos do Scharr (3, 10, 3) somam 16 contra 4 do Sobel (1, 2, 1):
+        # escala por 1/4 para manter o mesmo brilho das bordas
+        return cv2.convertScaleAbs(_exact_magnitude(scharrx, scharry), alpha=0.25)
+    raise ValueError(f"Qualidade de Sobel desconhecida: {quality}")
 
-    # Sal
-    num_salt = int(np.ceil(amount * frame.size * 0.5))
-    coords_salt = [np.random.randint(0, i - 1, num_salt) for i in frame.shape]
-    frame[coords_salt[0], coords_salt[1], :] = 255
+def apply_sobel(frame, quality='exact'):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    sobel = sobel_magnitude(gray, quality)
+    return cv2.cvtColor(sobel, cv2.COLOR_GRAY2BGR)
 
-    # Pimenta
-    num_pepper = int(np.ceil(amount * frame.size * 0.5))
-    coords_pepper = [np.random.randint(0, i - 1, num_pepper) for i in frame.shape]
-    frame[coords_pepper[0], coords_pepper[1], :] = 0
+def apply_gaussian(frame, radius=7, mode='exact'):
+    # radius=7 => kernel 15x15 (desfoque original); para raios grandes use mode='auto'
+    return BlurEngine(radius, mode).apply(frame)
 
-    return frame
+# Motor padrão do sal e pimenta, criado no primeiro uso (assim cada processo
+# do modo em lote ganha sua própria semente)
+_salt_pepper_noise = None
+
+def apply_salt_pepper(frame, density=None):
+    global _salt_pepper_noise
+    if _salt_pepper_noise is None:
+        _salt_pepper_noise = SaltPepperNoise()
+    if density is not None:
+        _salt_pepper_noise.set_density(density)
+    return _salt_pepper_noise.apply(frame)
 
 def apply_gray(frame):
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+# Registro dos filtros por nome (mesmos nomes usados em filter_selected / .mcam)
+FILTERS = {
+    'sobel': apply_sobel,
+    'gaussian': apply_gaussian,
+    'salt_pepper': apply_salt_pepper,
+    'gray': apply_gray,
+}
@@ -1,12 +1,79 @@
 import sys
-from PyQt5 import QtWidgets
-from main_window import MainWindow
+import argparse
 
-def main():
-    app = QtWidgets.QApplication(sys.argv)
+# Primeiro import: marca o início do processo para o relatório de partida
+from profiling import startup_report
+
+# Imprime no terminal o relatório de partida ao exibir o primeiro quadro
+STARTUP_REPORT_FLAG = "--startup-report"
+
+
+def run_gui(argv):
+    if STARTUP_REPORT_FLAG in argv:
+        argv = [arg for arg in argv if arg != STARTUP_REPORT_FLAG]
+        startup_report.enabled = True
+    from PyQt5 import QtWidgets
+    from main_window import MainWindow
+
+    startup_report.mark('imports')
+    app = QtWidgets.QApplication(argv)
     window = MainWindow()
     window.show()
+    startup_report.mark('main_window')
     sys.exit(app.exec_())
 
+
+def run_batch_command(args):
+    # Importado aqui para que o modo em lote não dependa de PyQt5 nem de display
+    from batch import run_batch
+
+    try:
+        run_batch(
+            args.inputs,
+            args.output,
+            args.filter or [],
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            sobel_quality=args.sobel_quality,
+            blur_radius=args.blur_radius
+        )
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="WebCamMax")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Aplica filtros em vídeos/pastas de imagens sem interface gráfica"
+    )
+    batch_parser.add_argument("inputs", nargs="+", help="Arquivos de vídeo, imagens ou pastas de imagens")
+    batch_parser.add_argument("-o", "--output", required=True, help="Pasta de saída")
+    batch_parser.add_argument(
+        "-f", "--filter",
+        action="append",
+        help="Filtro da cadeia, na ordem (sobel, gaussian, salt_pepper, gray). Pode repetir."
+    )
+    batch_parser.add_argument("-w", "--workers", type=int, default=None, help="Número de processos (padrão: núcleos)")
+    batch_parser.add_argument("--chunk-size", type=int, default=240, help="Quadros por bloco de vídeo")
+    batch_parser.add_argument(
+        "--sobel-quality",
+        default="exact",
+        choices=["exact", "fast", "l1", "scharr"],
+        help="Qualidade do Sobel"
+    )
+    batch_parser.add_argument("--blur-radius", type=int, default=7, help="Raio do Gaussiano (7 => kernel 15x15)")
+    return parser
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        run_batch_command(build_parser().parse_args())
+    else:
+        run_gui(sys.argv)
+
 if __name__ == "__main__":
     main()
@@ -1,4 +1,7 @@
+import threading
+
 from PyQt5 import QtWidgets
+from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import (
     QMainWindow,
     QAction,
@@ -6,8 +9,16 @@ from PyQt5.QtWidgets import (
 )
 
 from settings import save_mcam, load_mcam
-from second_window import SecondWindow
-from drawing_window import DrawingWindow
+from profiling import startup_report
+# Só constantes leves: OpenCV, NumPy e as janelas são importados no primeiro uso
+from defaults import (
+    DEFAULT_SALT_PEPPER_DENSITY,
+    DEFAULT_REPLAY_SECONDS,
+    CAPTURE_FOURCCS,
+    DEFAULT_CAPTURE_CONFIG,
+    normalize_stream_config
+)
+from canvas_history import DEFAULT_HISTORY_MAX_BYTES
 
 
 class MainWindow(QMainWindow):
@@ -17,6 +28,9 @@ class MainWindow(QMainWindow):
         caneta e salvar/carregar configurações.
       - Botão "Abrir Webcam" que lança a Tela Secundária (SecondWindow).
     """
+    # Emitido pela thread de detecção do modo da câmera: (configuração ou None, medição ou erro)
+    capture_probe_finished = pyqtSignal(object, object)
+
     def __init__(self):
         super().__init__()
 
@@ -24,14 +38,30 @@ class MainWindow(QMainWindow):
         self.resize(600, 200)
 
         # Variáveis de estado
-        self.filter_selected = None     # 'sobel', 'gaussian', 'salt_pepper', 'gray', None
+        self.filter_chain = []          # lista ordenada: 'sobel', 'gaussian', 'salt_pepper', 'gray'
         self.shape_selected = 'square'  # 'square' ou 'circle'
         self.window_locked = True
         self.whiteboard_mode = False
         self.is_flipped = False
-
-        # Referência à Tela Secundária (inicialmente None)
+        self.sobel_quality = 'exact'    # 'exact', 'fast', 'l1' ou 'scharr'
+        self.noise_density = DEFAULT_SALT_PEPPER_DENSITY  # fração dos pixels com sal/pimenta
+        self.blur_radius = 7            # raio do Gaussiano (7 => kernel 15x15)
+        self.processing_mode = 'display'  # 'display' (tamanho da janela) ou 'full' (resolução da câmera)
+        self.execution_mode = 'inline'  # 'inline' (thread da GUI), 'threads' (faixas) ou 'processes' (pool de processos)
+        self.capture_config = dict(DEFAULT_CAPTURE_CONFIG)  # backend, FOURCC, resolução, FPS e buffer da câmera
+        self.recording_policy = 'drop'  # fila da gravação cheia: 'drop' (descarta) ou 'block' (espera)
+        self.replay_seconds = 0  # duração do replay instantâneo (0 = desligado)
+        self.change_detection = False  # reaproveitar a saída dos filtros com a cena parada
+        self.undo_max_bytes = DEFAULT_HISTORY_MAX_BYTES  # memória máxima do desfazer do desenho
+        self.stream_config = normalize_stream_config()  # servidor MJPEG local (porta, FPS e resolução máximos)
+        self.capture_probe_finished.connect(self.on_capture_probe_finished)
+
+        # Referência à Tela Secundária ativa (os menus agem nela; inicialmente None)
         self.second_window = None
+        # Todas as janelas da webcam abertas (compartilham a câmera)
+        self.webcam_windows = []
+        # Janela que hospeda o servidor MJPEG (uma porta: no máximo uma janela)
+        self.stream_window = None
 
         # Botão "Abrir Webcam"
         self.btn_open_webcam = QPushButton("Abrir Webcam", self)
@@ -97,34 +127,181 @@ class MainWindow(QMainWindow):
         action_unlock.triggered.connect(self.unlock_window)
         menu_window.addAction(action_unlock)
 
+        # Resolução em que os filtros são aplicados
+        menu_processing = menu_window.addMenu("Resolução de Processamento")
+        action_display_res = QAction("Tamanho da Janela (mais rápido)", self)
+        action_display_res.triggered.connect(lambda: self.set_processing_mode('display'))
+        menu_processing.addAction(action_display_res)
+
+        action_full_res = QAction("Resolução da Câmera", self)
+        action_full_res.triggered.connect(lambda: self.set_processing_mode('full'))
+        menu_processing.addAction(action_full_res)
+
+        # Onde a cadeia de filtros roda
+        menu_execution = menu_window.addMenu("Execução dos Filtros")
+        action_inline = QAction("Na Interface (padrão)", self)
+        action_inline.triggered.connect(lambda: self.set_execution_mode('inline'))
+        menu_execution.addAction(action_inline)
+
+        action_threads = QAction("Faixas em Paralelo (threads)", self)
+        action_threads.triggered.connect(lambda: self.set_execution_mode('threads'))
+        menu_execution.addAction(action_threads)
+
+        action_processes = QAction("Processos Paralelos", self)
+        action_processes.triggered.connect(lambda: self.set_execution_mode('processes'))
+        menu_execution.addAction(action_processes)
+
+        # Detecção de mudanças antes de filtrar
+        self.action_change_detection = QAction("Reaproveitar Filtro com Cena Parada", self)
+        self.action_change_detection.setCheckable(True)
+        self.action_change_detection.triggered.connect(self.set_change_detection)
+        menu_window.addAction(self.action_change_detection)
+
+        # O que fazer quando a fila do gravador enche
+        menu_recording = menu_window.addMenu("Fila da Gravação")
+        action_rec_drop = QAction("Descartar Quadros (prévia nunca trava)", self)
+        action_rec_drop.triggered.connect(lambda: self.set_recording_policy('drop'))
+        menu_recording.addAction(action_rec_drop)
+
+        action_rec_block = QAction("Esperar (nenhum quadro perdido)", self)
+        action_rec_block.triggered.connect(lambda: self.set_recording_policy('block'))
+        menu_recording.addAction(action_rec_block)
+
+        # Replay instantâneo: guarda os últimos segundos para salvar depois (Ctrl+E)
+        menu_replay = menu_window.addMenu("Replay Instantâneo")
+        replay_options = [
+            ("Desligado", 0),
+            ("Últimos 10 s", 10),
+            (f"Últimos {DEFAULT_REPLAY_SECONDS} s", DEFAULT_REPLAY_SECONDS),
+            ("Últimos 60 s", 60),
+        ]
+        for label, seconds in replay_options:
+            action_replay = QAction(label, self)
+            action_replay.triggered.connect(lambda checked, sec=seconds: self.set_replay_seconds(sec))
+            menu_replay.addAction(action_replay)
+
         # Menu Mostrar barra de ferramentas
         action_show_toolbar = QAction("Mostrar Barra de Ferramentas", self)
         action_show_toolbar.triggered.connect(self.show_toolbar)
         menu_window.addAction(action_show_toolbar)
 
-
+        # Outra janela da webcam (mesma câmera, filtros próprios)
+        action_new_webcam = QAction("Nova Janela da Webcam", self)
+        action_new_webcam.triggered.connect(self.open_new_webcam_window)
+        menu_window.addAction(action_new_webcam)
+
+
+        # Menu Captura (formato da câmera; None = padrão do backend)
+        menu_capture = menu_bar.addMenu("Captura")
+        # Os backends dependem da build do OpenCV: a lista é montada ao abrir o submenu
+        menu_backend = menu_capture.addMenu("Backend")
+        menu_backend.aboutToShow.connect(lambda: self._populate_backend_menu(menu_backend))
+        capture_options = [
+            ("Formato", "fourcc", [("Padrão", None)] + [(fourcc, fourcc) for fourcc in CAPTURE_FOURCCS]),
+            ("Resolução", "resolution", [
+                ("Padrão", None),
+                ("640x480", (640, 480)),
+                ("1280x720", (1280, 720)),
+                ("1920x1080", (1920, 1080)),
+            ]),
+            ("FPS", "fps", [("Padrão", None), ("15", 15), ("30", 30), ("60", 60)]),
+            ("Buffer do Driver", "buffer_size", [
+                ("Padrão", None),
+                ("1 quadro (menor latência)", 1),
+                ("2 quadros", 2),
+                ("4 quadros", 4),
+            ]),
+        ]
+        for menu_label, key, options in capture_options:
+            submenu = menu_capture.addMenu(menu_label)
+            for label, value in options:
+                action_option = QAction(label, self)
+                action_option.triggered.connect(lambda checked, k=key, v=value: self.set_capture_option(k, v))
+                submenu.addAction(action_option)
+
+        menu_capture.addSeparator()
+        self.action_probe_capture = QAction("Detectar Modo de Menor Latência...", self)
+        self.action_probe_capture.triggered.connect(self.detect_low_latency_mode)
+        menu_capture.addAction(self.action_probe_capture)
+
+        # Menu Transmissão (servidor MJPEG em localhost)
+        menu_stream = menu_bar.addMenu("Transmissão")
+        self.action_stream = QAction(f"Servidor MJPEG (localhost:{self.stream_config['port']})", self)
+        self.action_stream.setCheckable(True)
+        self.action_stream.triggered.connect(lambda checked: self.set_stream_option("enabled", checked))
+        menu_stream.addAction(self.action_stream)
+
+        menu_stream_fps = menu_stream.addMenu("FPS Máximo")
+        for fps in (10, 15, 30, 60):
+            action_fps = QAction(str(fps), self)
+            action_fps.triggered.connect(lambda checked, f=fps: self.set_stream_option("max_fps", f))
+            menu_stream_fps.addAction(action_fps)
+
+        menu_stream_size = menu_stream.addMenu("Resolução Máxima")
+        for width, height in ((640, 480), (1280, 720), (1920, 1080)):
+            action_size = QAction(f"{width}x{height}", self)
+            action_size.triggered.connect(lambda checked, w=width, h=height: self.set_stream_option("max_size", (w, h)))
+            menu_stream_size.addAction(action_size)
 
         # Menu Filtros
+        # Os filtros são empilhados: marcar adiciona ao fim da cadeia, desmarcar remove
         menu_filters = menu_bar.addMenu("Filtros")
-        action_sobel = QAction("Sobel", self)
-        action_sobel.triggered.connect(lambda: self.set_filter("sobel"))
-        menu_filters.addAction(action_sobel)
-
-        action_gauss = QAction("Gaussiano", self)
-        action_gauss.triggered.connect(lambda: self.set_filter("gaussian"))
-        menu_filters.addAction(action_gauss)
-
-        action_salt = QAction("Sal e Pimenta", self)
-        action_salt.triggered.connect(lambda: self.set_filter("salt_pepper"))
-        menu_filters.addAction(action_salt)
-
-        action_gray = QAction("Preto e Branco", self)
-        action_gray.triggered.connect(lambda: self.set_filter("gray"))
-        menu_filters.addAction(action_gray)
+        self.filter_actions = {}
+        filter_labels = [
+            ("Sobel", "sobel"),
+            ("Gaussiano", "gaussian"),
+            ("Sal e Pimenta", "salt_pepper"),
+            ("Preto e Branco", "gray"),
+        ]
+        for label, filter_name in filter_labels:
+            action_filter = QAction(label, self)
+            action_filter.setCheckable(True)
+            action_filter.triggered.connect(lambda checked, f=filter_name: self.toggle_filter(f, checked))
+            menu_filters.addAction(action_filter)
+            self.filter_actions[filter_name] = action_filter
+
+        # Submenu de qualidade do Sobel (exato ou aproximações mais rápidas)
+        menu_sobel_quality = menu_filters.addMenu("Qualidade do Sobel")
+        sobel_qualities = [
+            ("Exato", 'exact'),
+            ("Rápido (float32)", 'fast'),
+            ("Rápido L1 (16 bits)", 'l1'),
+            ("Scharr", 'scharr'),
+        ]
+        for label, quality in sobel_qualities:
+            action_quality = QAction(label, self)
+            action_quality.triggered.connect(lambda checked, q=quality: self.set_sobel_quality(q))
+            menu_sobel_quality.addAction(action_quality)
+
+        # Submenu de intensidade do Gaussiano (raios grandes usam desfoque aproximado)
+        menu_blur_radius = menu_filters.addMenu("Intensidade do Gaussiano")
+        blur_radii = [
+            ("Padrão (raio 7)", 7),
+            ("Forte (raio 15)", 15),
+            ("Muito forte (raio 31)", 31),
+            ("Máxima (raio 63)", 63),
+        ]
+        for label, radius in blur_radii:
+            action_radius = QAction(label, self)
+            action_radius.triggered.connect(lambda checked, r=radius: self.set_blur_radius(r))
+            menu_blur_radius.addAction(action_radius)
+
+        # Submenu de densidade do sal e pimenta
+        menu_noise_density = menu_filters.addMenu("Densidade do Sal e Pimenta")
+        noise_densities = [
+            ("Padrão (0,03%)", DEFAULT_SALT_PEPPER_DENSITY),
+            ("Baixa (0,1%)", 0.001),
+            ("Média (1%)", 0.01),
+            ("Alta (5%)", 0.05),
+        ]
+        for label, density in noise_densities:
+            action_density = QAction(label, self)
+            action_density.triggered.connect(lambda checked, d=density: self.set_noise_density(d))
+            menu_noise_density.addAction(action_density)
 
         menu_filters.addSeparator()
         action_reset = QAction("Resetar", self)
-        action_reset.triggered.connect(lambda: self.set_filter(None))
+        action_reset.triggered.connect(lambda: self.set_filter_chain([]))
         menu_filters.addAction(action_reset)
 
         # Menu Caneta
@@ -137,6 +314,13 @@ class MainWindow(QMainWindow):
         action_pen_off.triggered.connect(lambda: self.set_whiteboard_mode(False))
         menu_pen.addAction(action_pen_off)
 
+        # Memória máxima do Desfazer/Refazer do desenho (o mais antigo sai primeiro)
+        menu_undo = menu_pen.addMenu("Memória do Desfazer")
+        for megabytes in (16, 64, 256):
+            action_undo = QAction(f"{megabytes} MB", self)
+            action_undo.triggered.connect(lambda checked, mb=megabytes: self.set_undo_max_bytes(mb * 1024 * 1024))
+            menu_undo.addAction(action_undo)
+
         # Menu Sobre
         menu_about = menu_bar.addMenu("Sobre")
         action_about = QAction("Sobre este projeto", self)
@@ -148,34 +332,265 @@ class MainWindow(QMainWindow):
     # ----------------------------
     def open_second_window(self):
         if self.second_window is None:
-            self.second_window = SecondWindow(
-                filter_selected=self.filter_selected,
-                shape_selected=self.shape_selected,
-                window_locked=self.window_locked
-            )
+            self.second_window = self._create_second_window(stream_config=self.stream_config)
         else:
             # Atualiza as configurações da janela caso ela já exista
-            self.second_window.set_filter(self.filter_selected)
-            self.second_window.set_shape(self.shape_selected)
-            self.second_window.set_lock(self.window_locked)
+            self.second_window.set_filter_chain(self.filter_chain)
+            self.second_window.set_sobel_quality(self.sobel_quality)
+            self.second_window.set_noise_density(self.noise_density)
+            self.second_window.set_blur_radius(self.blur_radius)
+            self.second_window.set_processing_mode(self.processing_mode)
+            self.second_window.set_execution_mode(self.execution_mode)
+            self.second_window.set_capture_config(self.capture_config)
+            self.second_window.set_recording_policy(self.recording_policy)
+            self.second_window.set_replay_seconds(self.replay_seconds)
+            self.set_stream_config(self.stream_config)
+            self.second_window.set_change_detection(self.change_detection)
+            # Formato e trava num passo só (flags da janela só mudam se preciso)
+            self.second_window.set_window_state(shape=self.shape_selected, locked=self.window_locked)
+
+        self.second_window.show()
+        startup_report.mark('webcam_window')
 
+    def open_new_webcam_window(self):
+        """Abre mais uma janela da webcam; a câmera é aberta uma vez só (capture_broker.py)."""
+        if self.second_window is None:
+            self.open_second_window()
+            return
+        # O servidor MJPEG (uma porta) continua só na janela em que foi ligado
+        self.second_window = self._create_second_window()
         self.second_window.show()
 
+    def _create_second_window(self, stream_config=None):
+        # Importado aqui: carrega OpenCV/NumPy só quando a webcam é aberta
+        from second_window import SecondWindow
+        window = SecondWindow(
+            filter_chain=self.filter_chain,
+            shape_selected=self.shape_selected,
+            window_locked=self.window_locked,
+            sobel_quality=self.sobel_quality,
+            noise_density=self.noise_density,
+            blur_radius=self.blur_radius,
+            processing_mode=self.processing_mode,
+            execution_mode=self.execution_mode,
+            capture_config=self.capture_config,
+            recording_policy=self.recording_policy,
+            replay_seconds=self.replay_seconds,
+            stream_config=stream_config,
+            change_detection=self.change_detection
+        )
+        window.activated.connect(self.on_second_window_activated)
+        window.closed.connect(self.on_second_window_closed)
+        self.webcam_windows.append(window)
+        if stream_config and stream_config["enabled"]:
+            if window.stream_server is not None:
+                self.stream_window = window
+            else:
+                # A porta não abriu (a janela já mostrou o erro)
+                self.stream_config["enabled"] = False
+                self.action_stream.setChecked(False)
+        return window
+
+    def on_second_window_activated(self, window):
+        if window is self.second_window or window not in self.webcam_windows:
+            return
+        # Os menus passam a agir nesta janela: o estado mostrado e salvo passa a ser o dela
+        self.second_window = window
+        self._sync_from_window(window)
+
+    def _sync_from_window(self, window):
+        """Copia o estado próprio de cada janela para a MainWindow (menus e .mcam)."""
+        self.filter_chain = list(window.filter_chain)
+        for filter_name, action in self.filter_actions.items():
+            action.setChecked(filter_name in self.filter_chain)
+        self.sobel_quality = window.sobel_quality
+        self.noise_density = window.salt_pepper.density
+        self.blur_radius = window.blur.radius
+        self.processing_mode = window.processing_mode
+        self.execution_mode = window.execution_mode
+        self.recording_policy = window.recording_policy
+        self.replay_seconds = window.replay_buffer.seconds if window.replay_buffer is not None else 0
+        self.change_detection = window.filter_cache is not None
+        self.action_change_detection.setChecked(self.change_detection)
+        self.shape_selected = window.shape_selected
+        self.window_locked = window.window_locked
+        self.is_flipped = window.is_flipped
+        # Câmera (uma por dispositivo) e servidor MJPEG (self.stream_window) não são por janela
+
+    def on_second_window_closed(self, window):
+        if window in self.webcam_windows:
+            self.webcam_windows.remove(window)
+        if window is self.second_window:
+            self.second_window = self.webcam_windows[-1] if self.webcam_windows else None
+            if self.second_window is not None:
+                self._sync_from_window(self.second_window)
+        if window is self.stream_window:
+            # A janela parou o servidor ao fechar: ele passa para a janela ativa, se houver
+            self.stream_window = None
+            if self.stream_config["enabled"] and self.second_window is not None:
+                self.set_stream_config(self.stream_config)
+
     # ----------------------------
     # Fechamento da Tela Secundária
     # ----------------------------
     def close_second_window(self):
         if self.second_window:
+            # on_second_window_closed escolhe a próxima janela ativa
             self.second_window.close()
-            self.second_window = None
 
     # ----------------------------
     # Métodos para menus
     # ----------------------------
     def set_filter(self, filter_name):
-        self.filter_selected = filter_name
+        self.set_filter_chain([filter_name] if filter_name else [])
+
+    def set_filter_chain(self, filter_chain):
+        self.filter_chain = list(filter_chain)
+        for filter_name, action in self.filter_actions.items():
+            action.setChecked(filter_name in self.filter_chain)
         if self.second_window:
-            self.second_window.set_filter(filter_name)
+            self.second_window.set_filter_chain(self.filter_chain)
+
+    def toggle_filter(self, filter_name, enabled):
+        chain = [f for f in self.filter_chain if f != filter_name]
+        if enabled:
+            chain.append(filter_name)
+        self.set_filter_chain(chain)
+
+    def set_sobel_quality(self, quality):
+        self.sobel_quality = quality
+        if self.second_window:
+            self.second_window.set_sobel_quality(quality)
+
+    def set_processing_mode(self, mode):
+        self.processing_mode = mode
+        if self.second_window:
+            self.second_window.set_processing_mode(mode)
+
+    def set_capture_option(self, key, value):
+        config = dict(self.capture_config)
+        if key == "resolution":
+            config["width"], config["height"] = value if value else (None, None)
+        else:
+            config[key] = value
+        self.set_capture_config(config)
+
+    def _populate_backend_menu(self, menu):
+        if not menu.isEmpty():
+            return
+        from camera import CAPTURE_BACKENDS
+        options = [("Automático", 'auto')] + [(name.upper(), name) for name in CAPTURE_BACKENDS if name != 'auto']
+        for label, value in options:
+            action_option = QAction(label, self)
+            action_option.triggered.connect(lambda checked, v=value: self.set_capture_option("backend", v))
+            menu.addAction(action_option)
+
+    def set_capture_config(self, config):
+        from camera import normalize_capture_config
+        self.capture_config = normalize_capture_config(config)
+        # Um modo por câmera: vale para todas as janelas
+        for window in self.webcam_windows:
+            window.set_capture_config(self.capture_config)
+
+    def detect_low_latency_mode(self):
+        target_fps, ok = QtWidgets.QInputDialog.getInt(
+            self, "Detectar Modo da Câmera", "FPS desejado:", 30, 5, 240
+        )
+        if not ok:
+            return
+        # O dispositivo precisa estar livre durante os testes (todas as janelas soltam a câmera)
+        for window in self.webcam_windows:
+            window.stop_webcam()
+        self.action_probe_capture.setEnabled(False)
+        self.statusBar().showMessage("Testando os modos da câmera...")
+
+        def probe():
+            try:
+                from camera import probe_low_latency
+                config, measured = probe_low_latency(
+                    target_fps,
+                    device=self.capture_config["device"],
+                    backend=self.capture_config["backend"]
+                )
+            except Exception as e:
+                config, measured = None, e
+            self.capture_probe_finished.emit(config, measured)
+
+        threading.Thread(target=probe, name="CaptureProbe", daemon=True).start()
+
+    def on_capture_probe_finished(self, config, measured):
+        self.action_probe_capture.setEnabled(True)
+        self.statusBar().clearMessage()
+        if config is not None:
+            self.capture_config = config
+        # Reabre a câmera das janelas (com o modo novo, se houver)
+        for window in self.webcam_windows:
+            if not window.webcam_active:
+                window.capture_config = self.capture_config
+                window.start_webcam()
+
+        if isinstance(measured, Exception):
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao testar a câmera:\n{measured}")
+        elif config is None:
+            QtWidgets.QMessageBox.warning(self, "Detectar Modo da Câmera", "Nenhum modo da câmera entregou quadros.")
+        else:
+            QtWidgets.QMessageBox.information(
+                self,
+                "Detectar Modo da Câmera",
+                f"Modo escolhido: {config['fourcc']} {config['width']}x{config['height']} "
+                f"a {measured['measured_fps']:.1f} fps (latência ~{measured['latency_ms']:.0f} ms)."
+            )
+
+    def set_recording_policy(self, policy):
+        self.recording_policy = policy
+        if self.second_window:
+            self.second_window.set_recording_policy(policy)
+
+    def set_replay_seconds(self, seconds):
+        self.replay_seconds = seconds
+        if self.second_window:
+            self.second_window.set_replay_seconds(seconds)
+
+    def set_stream_option(self, key, value):
+        config = dict(self.stream_config)
+        if key == "max_size":
+            config["max_width"], config["max_height"] = value
+        else:
+            config[key] = value
+        self.set_stream_config(config)
+
+    def set_stream_config(self, config):
+        self.stream_config = normalize_stream_config(config)
+        # O servidor fica na janela onde foi ligado (desligar ou mudar limites age nela,
+        # qualquer que seja a janela ativa); ligado sem dono, sobe na janela ativa.
+        # Sem janela aberta ele sobe junto com a próxima.
+        target = self.stream_window or self.second_window
+        if target is not None:
+            if not target.set_stream_config(self.stream_config):
+                self.stream_config["enabled"] = False
+            self.stream_window = target if self.stream_config["enabled"] else None
+        self.action_stream.setChecked(self.stream_config["enabled"])
+
+    def set_change_detection(self, enabled):
+        self.change_detection = enabled
+        self.action_change_detection.setChecked(enabled)
+        if self.second_window:
+            self.second_window.set_change_detection(enabled)
+
+    def set_execution_mode(self, mode):
+        self.execution_mode = mode
+        if self.second_window:
+            self.second_window.set_execution_mode(mode)
+
+    def set_blur_radius(self, radius):
+        self.blur_radius = radius
+        if self.second_window:
+            self.second_window.set_blur_radius(radius)
+
+    def set_noise_density(self, density):
+        self.noise_density = density
+        if self.second_window:
+            self.second_window.set_noise_density(density)
 
     def set_shape(self, shape):
         self.shape_selected = shape
@@ -211,9 +626,15 @@ class MainWindow(QMainWindow):
 
     def open_drawing_window(self):
         if not hasattr(self, 'drawing_window') or self.drawing_window is None:
-            self.drawing_window = DrawingWindow()
+            from drawing_window import DrawingWindow
+            self.drawing_window = DrawingWindow(history_max_bytes=self.undo_max_bytes)
         self.drawing_window.show()
 
+    def set_undo_max_bytes(self, max_bytes):
+        self.undo_max_bytes = max_bytes
+        if getattr(self, 'drawing_window', None):
+            self.drawing_window.set_history_limit(max_bytes)
+
     def close_drawing_window(self):
         if self.drawing_window:
             self.drawing_window.close()
@@ -224,10 +645,23 @@ class MainWindow(QMainWindow):
     # ----------------------------
     def save_config(self):
         config_data = {
-            "filter_selected": self.filter_selected,
+            "filter_chain": self.filter_chain,
+            # Mantido para arquivos lidos por versões antigas (só um filtro)
+            "filter_selected": self.filter_chain[-1] if self.filter_chain else None,
             "shape_selected": self.shape_selected,
             "window_locked": self.window_locked,
-            "is_flipped": self.second_window.is_flipped
+            "is_flipped": self.second_window.is_flipped if self.second_window else self.is_flipped,
+            "sobel_quality": self.sobel_quality,
+            "salt_pepper_density": self.noise_density,
+            "blur_radius": self.blur_radius,
+            "processing_mode": self.processing_mode,
+            "execution_mode": self.execution_mode,
+            "capture": self.capture_config,
+            "recording_policy": self.recording_policy,
+            "replay_seconds": self.replay_seconds,
+            "mjpeg_server": self.stream_config,
+            "change_detection": self.change_detection,
+            "undo_max_bytes": self.undo_max_bytes
         }
         file_path, _ = QtWidgets.QFileDialog.getSaveFileName(
             self,
@@ -252,17 +686,38 @@ class MainWindow(QMainWindow):
         if file_path:
             try:
                 config_data = load_mcam(file_path)
-                self.filter_selected = config_data.get("filter_selected", None)
                 self.shape_selected = config_data.get("shape_selected", "square")
                 self.window_locked = config_data.get("window_locked", False)
                 self.is_flipped = config_data.get("is_flipped", False)
-
-                # Se a segunda tela existir, atualiza:
+                self.sobel_quality = config_data.get("sobel_quality", 'exact')
+                self.noise_density = config_data.get("salt_pepper_density", DEFAULT_SALT_PEPPER_DENSITY)
+                self.blur_radius = config_data.get("blur_radius", 7)
+                self.processing_mode = config_data.get("processing_mode", 'display')
+                self.execution_mode = config_data.get("execution_mode", 'inline')
+                from camera import normalize_capture_config
+                self.capture_config = normalize_capture_config(config_data.get("capture"))
+                self.recording_policy = config_data.get("recording_policy", 'drop')
+                self.replay_seconds = config_data.get("replay_seconds", 0)
+                self.set_stream_config(config_data.get("mjpeg_server"))
+                self.set_change_detection(config_data.get("change_detection", False))
+                self.set_undo_max_bytes(config_data.get("undo_max_bytes", DEFAULT_HISTORY_MAX_BYTES))
+
+                # Atualiza o menu e, se a segunda tela existir, a cadeia dela
+                self.set_filter_chain(config_data["filter_chain"])
                 if self.second_window:
-                    self.second_window.set_filter(self.filter_selected)
-                    self.second_window.set_shape(self.shape_selected)
-                    self.second_window.set_lock(self.window_locked)
-                    self.second_window.set_flip(self.is_flipped)
+                    self.second_window.set_sobel_quality(self.sobel_quality)
+                    self.second_window.set_noise_density(self.noise_density)
+                    self.second_window.set_blur_radius(self.blur_radius)
+                    self.second_window.set_processing_mode(self.processing_mode)
+                    self.second_window.set_execution_mode(self.execution_mode)
+                    self.set_capture_config(self.capture_config)
+                    self.second_window.set_recording_policy(self.recording_policy)
+                    self.second_window.set_replay_seconds(self.replay_seconds)
+                    self.second_window.set_window_state(
+                        shape=self.shape_selected,
+                        locked=self.window_locked,
+                        flipped=self.is_flipped
+                    )
 
                 QtWidgets.QMessageBox.information(self, "Carregar Configurações", "Configurações carregadas com sucesso!")
             except Exception as e:
@@ -291,6 +746,6 @@ class MainWindow(QMainWindow):
     # Fechar
     # ----------------------------
     def closeEvent(self, event):
-        if self.second_window:
-            self.second_window.close()
+        for window in list(self.webcam_windows):
+            window.close()
         super().closeEvent(event)
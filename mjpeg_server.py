@@ -0,0 +1,245 @@
+"""
+Servidor HTTP MJPEG local com o vídeo processado da SecondWindow
+(ex.: fonte "navegador" do OBS ou scripts de teste).
+
+Cada quadro é comprimido uma única vez, numa thread própria, e o mesmo JPEG
+vai para todos os clientes. Cada cliente envia sempre o JPEG mais recente:
+um cliente lento pula quadros em vez de segurar o pipeline ou os demais.
+
+    http://127.0.0.1:8080/             página simples com o vídeo
+    http://127.0.0.1:8080/stream.mjpg  multipart/x-mixed-replace
+    http://127.0.0.1:8080/snapshot.jpg último quadro
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from capture import LatestFrameSlot
+from defaults import DEFAULT_STREAM_CONFIG, normalize_stream_config
+
+BOUNDARY = "webcammaxframe"
+
+
+def fit_within(frame, max_width, max_height):
+    """Reduz mantendo a proporção para caber em max_width x max_height (nunca amplia)."""
+    height, width = frame.shape[:2]
+    scale = min(1.0, max_width / width if max_width else 1.0, max_height / height if max_height else 1.0)
+    if scale >= 1.0:
+        return frame
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+class MjpegServer:
+    """
+    Servidor MJPEG em localhost.
+
+        server = MjpegServer(normalize_stream_config({"port": 8080}))
+        server.start()
+        server.publish(frame, flipped)   # GUI: não comprime nem espera
+        server.stop()
+
+    `publish` respeita o FPS máximo e não faz nada enquanto não houver clientes.
+    """
+
+    def __init__(self, config=None):
+        self.config = normalize_stream_config(config)
+        self._slot = LatestFrameSlot()
+        self._frame_event = threading.Event()
+        self._jpeg_ready = threading.Condition()
+        self._jpeg = None
+        self._seq = 0
+        self._running = False
+        self._last_published = 0.0
+        self._httpd = None
+        self._threads = []
+        self._clients_lock = threading.Lock()
+        self.clients = 0
+        self.encoded = 0
+        self.sent = 0
+        self.client_drops = 0
+        self.encode_time = 0.0
+
+    @property
+    def url(self):
+        return f"http://{self.config['host']}:{self.config['port']}/"
+
+    # ------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------
+    def start(self):
+        """Abre a porta (OSError se ela estiver em uso) e inicia as threads."""
+        self._httpd = ThreadingHTTPServer((self.config["host"], self.config["port"]), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._httpd.serve_forever, name="MjpegHttp", daemon=True),
+            threading.Thread(target=self._encode, name="MjpegEncoder", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        if self._httpd is None:
+            return
+        self._running = False
+        self._frame_event.set()
+        with self._jpeg_ready:
+            self._jpeg_ready.notify_all()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        for thread in self._threads:
+            thread.join(2.0)
+        self._httpd = None
+        self._threads = []
+
+    def set_limits(self, max_fps, max_width, max_height):
+        self.config.update({"max_fps": max_fps, "max_width": max_width, "max_height": max_height})
+
+    # ------------------------------------------------------------
+    # Produção (GUI) e compressão (thread própria)
+    # ------------------------------------------------------------
+    def publish(self, frame, flipped=False):
+        """Oferece o quadro exibido. Retorna True se ele será comprimido."""
+        if not self._running or self.clients == 0:
+            return False
+        now = time.perf_counter()
+        max_fps = self.config["max_fps"]
+        if max_fps and now - self._last_published < 1.0 / max_fps:
+            return False
+        self._last_published = now
+        # Se o codificador ainda não pegou o anterior, ele é substituído
+        self._slot.put((frame, flipped), now)
+        self._frame_event.set()
+        return True
+
+    def _encode(self):
+        while self._running:
+            self._frame_event.wait(0.5)
+            self._frame_event.clear()
+            item, _ = self._slot.take()
+            if item is None:
+                continue
+            frame, flipped = item
+            t0 = time.perf_counter()
+            frame = fit_within(frame, self.config["max_width"], self.config["max_height"])
+            if flipped:
+                frame = cv2.flip(frame, 1)
+            ok, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.config["quality"]])
+            if not ok:
+                continue
+            self.encode_time += time.perf_counter() - t0
+            self.encoded += 1
+            with self._jpeg_ready:
+                self._jpeg = data.tobytes()
+                self._seq += 1
+                self._jpeg_ready.notify_all()
+
+    def _add_client(self, delta):
+        with self._clients_lock:
+            self.clients += delta
+
+    def _count_sent(self, drops):
+        # Vários clientes (uma thread cada) somam nos mesmos contadores
+        with self._clients_lock:
+            self.sent += 1
+            self.client_drops += drops
+
+    def _wait_jpeg(self, last_seq, timeout=1.0):
+        """Bloqueia (na thread do cliente) até existir um JPEG mais novo que `last_seq`."""
+        with self._jpeg_ready:
+            if self._seq == last_seq and self._running:
+                self._jpeg_ready.wait(timeout)
+            return self._jpeg, self._seq
+
+    # ------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                # Sem log por requisição no terminal
+                pass
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/':
+                    self._send_page()
+                elif path == '/stream.mjpg':
+                    self._send_stream()
+                elif path == '/snapshot.jpg':
+                    self._send_snapshot()
+                else:
+                    self.send_error(404)
+
+            def _send_page(self):
+                body = b"<html><body style='margin:0;background:#000'><img src='/stream.mjpg'></body></html>"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_snapshot(self):
+                # Um snapshot conta como cliente até um quadro novo ser comprimido
+                server._add_client(1)
+                try:
+                    last_seq = server._seq
+                    jpeg, seq = server._wait_jpeg(last_seq, timeout=2.0)
+                finally:
+                    server._add_client(-1)
+                if jpeg is None or seq == last_seq:
+                    self.send_error(503, "Nenhum quadro disponível")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(jpeg)))
+                self.end_headers()
+                self.wfile.write(jpeg)
+
+            def _send_stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                server._add_client(1)
+                last_seq = server._seq
+                frames_sent = 0
+                try:
+                    while server._running:
+                        jpeg, seq = server._wait_jpeg(last_seq)
+                        if seq == last_seq or jpeg is None:
+                            continue
+                        # Quadros comprimidos enquanto este cliente ainda enviava o anterior
+                        drops = seq - last_seq - 1 if frames_sent else 0
+                        last_seq = seq
+                        self.wfile.write(
+                            f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                            f"Content-Length: {len(jpeg)}\r\n\r\n".encode('ascii')
+                        )
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                        frames_sent += 1
+                        server._count_sent(drops)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    server._add_client(-1)
+
+        return Handler
+
+    def stats(self):
+        with self._clients_lock:
+            clients, sent, client_drops = self.clients, self.sent, self.client_drops
+        return {
+            "url": self.url,
+            "clients": clients,
+            "encoded": self.encoded,
+            "sent": sent,
+            "client_drops": client_drops,
+            "encode_ms": self.encode_time / self.encoded * 1000.0 if self.encoded else None,
+        }
@@ -0,0 +1,69 @@
+import numpy as np
+
+from defaults import DEFAULT_SALT_PEPPER_DENSITY
+
+
+class SaltPepperNoise:
+    """
+    Motor de ruído sal e pimenta com pool pré-calculado.
+
+    Para cada resolução/densidade é gerado um pool rotativo de vetores de índices
+    planos de pixels (e os valores 255/0 correspondentes). Em cada quadro o ruído
+    vira um único scatter vetorizado e in-place, sem sortear coordenadas por eixo.
+    O pool só é refeito quando o tamanho do quadro ou a densidade mudam; alguns
+    tamanhos ficam em cache (ex.: as faixas do processamento por região).
+    Com `seed` definido a saída é reproduzível.
+    """
+
+    # Quantos tamanhos de quadro diferentes mantêm seus pools em memória
+    MAX_CACHED_SIZES = 16
+
+    def __init__(self, density=DEFAULT_SALT_PEPPER_DENSITY, pool_size=16, seed=None):
+        self.density = density
+        self.pool_size = pool_size
+        self._rng = np.random.default_rng(seed)
+        self._pools = {}
+        self._next = 0
+
+    def set_density(self, density):
+        if density != self.density:
+            self.density = density
+            self._pools.clear()
+
+    def _build_pool(self, height, width):
+        num_pixels = height * width
+        num_points = int(np.ceil(self.density * num_pixels))
+        num_salt = num_points // 2 + num_points % 2
+
+        # Valores: a primeira metade é sal (255), o resto pimenta (0)
+        values = np.zeros((num_points, 1), np.uint8)
+        values[:num_salt] = 255
+        if len(self._pools) >= self.MAX_CACHED_SIZES:
+            # Descarta o tamanho mais antigo
+            del self._pools[next(iter(self._pools))]
+        pool = [
+            (self._rng.integers(0, num_pixels, num_points, dtype=np.intp), values)
+            for _ in range(self.pool_size)
+        ]
+        self._pools[(height, width)] = pool
+        return pool
+
+    def apply(self, frame):
+        """Aplica o ruído no próprio quadro (quando possível) e o retorna."""
+        height, width = frame.shape[:2]
+        pool = self._pools.get((height, width))
+        if pool is None:
+            pool = self._build_pool(height, width)
+
+        if not frame.flags.c_contiguous or not frame.flags.writeable:
+            # reshape de um array não contíguo geraria uma cópia e perderia a escrita;
+            # quadros somente leitura são compartilhados entre janelas (capture_broker.py)
+            frame = frame.copy()
+
+        indices, values = pool[self._next]
+        # Avança o pool com passo aleatório para o padrão não se repetir em ciclo fixo
+        self._next = (self._next + 1 + int(self._rng.integers(self.pool_size - 1 or 1))) % self.pool_size
+
+        flat = frame.reshape(height * width, -1)
+        flat[indices] = values
+        return frame
@@ -0,0 +1,273 @@
+"""
+Execução dos filtros em processos, com os pixels trafegando por memória
+compartilhada (multiprocessing.shared_memory) em vez de pickle.
+
+O pool mantém um anel de N slots de entrada e N de saída, cada um com capacidade
+para o maior quadro visto. Só o número do slot, o formato do quadro e a configuração
+da cadeia passam pelas filas;
+os workers leem e escrevem direto nos buffers compartilhados. Os resultados
+são devolvidos na ordem dos quadros, mesmo que os workers terminem fora de ordem.
+"""
+import os
+import threading
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Suavização da média do tempo de cada worker por quadro
+COMPUTE_SMOOTHING = 0.1
+
+
+def _worker_main(task_queue, result_queue, in_names, out_names):
+    # Importados aqui: o processo filho (spawn) não precisa de Qt
+    import cv2
+    from filter_chain import FilterChain
+    from blur import BlurEngine
+    from noise import SaltPepperNoise
+
+    # Cada processo usa um núcleo; threads internas do OpenCV só competiriam entre si
+    cv2.setNumThreads(1)
+    in_blocks = [shared_memory.SharedMemory(name=name) for name in in_names]
+    out_blocks = [shared_memory.SharedMemory(name=name) for name in out_names]
+
+    chain = None
+    chain_config = None
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            seq, slot, shape, dtype, config = task
+            frame = output = None
+            elapsed = 0.0
+            try:
+                if config != chain_config:
+                    names, sobel_quality, blur_radius, noise_density = config
+                    chain = FilterChain(
+                        names,
+                        sobel_quality=sobel_quality,
+                        blur=BlurEngine(blur_radius),
+                        salt_pepper=SaltPepperNoise(noise_density)
+                    )
+                    chain_config = config
+                # Views sobre os buffers compartilhados (o quadro pode ser menor que o slot)
+                frame = np.ndarray(shape, dtype, buffer=in_blocks[slot].buf)
+                output = np.ndarray(shape, dtype, buffer=out_blocks[slot].buf)
+                # O sal e pimenta altera a entrada in-place: tudo bem, o slot é só deste quadro
+                started_at = time.perf_counter()
+                output[...] = chain(frame)
+                elapsed = time.perf_counter() - started_at
+                error = None
+            except Exception as e:
+                error = repr(e)
+            # As views precisam sumir antes de os blocos serem fechados
+            frame = output = None
+            result_queue.put((seq, slot, shape, dtype, error, elapsed))
+    finally:
+        for block in in_blocks + out_blocks:
+            block.close()
+
+
+class SharedMemoryFilterPool:
+    """
+    Pool de processos para cadeias de filtros pesadas.
+
+        pool = SharedMemoryFilterPool(on_result=callback)
+        pool.configure(['gray', 'sobel'], 'exact', 7, 0.0003)
+        pool.submit(frame, tag)   # False se todos os slots estiverem ocupados (quadro pulado)
+        ...
+        pool.close()
+
+    `on_result(frame, tag)` é chamado uma vez por quadro enviado e em ordem, com
+    uma cópia da saída (o slot é liberado logo em seguida) ou None se o worker
+    falhou naquele quadro ou se o quadro foi descartado pelo close() (inclusive
+    o de um reserve() que aumenta o anel). `tag` é o valor passado no submit
+    (ex.: o instante de captura) e nunca sai deste processo.
+    """
+
+    def __init__(self, on_result, workers=None, slots=None):
+        self.on_result = on_result
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.num_slots = slots or self.workers * 2
+        self._ctx = mp.get_context('spawn')
+        self._config = ((), 'exact', 7, 0.0)
+        self._capacity = 0
+        self._processes = []
+        self._in_blocks = []
+        self._out_blocks = []
+        self._free_slots = []
+        self._lock = threading.Lock()
+        self._collector = None
+        self._next_seq = 0
+        self._next_to_deliver = 0
+        self._pending = {}
+        self._tags = {}
+        self.submitted = 0
+        self.delivered = 0
+        self.skipped = 0
+        self.errors = 0
+        self.discarded = 0
+        self.last_error = None
+        # Tempo de um worker por quadro (média móvel exponencial, em segundos)
+        self.compute_time = None
+
+    def configure(self, filter_names, sobel_quality, blur_radius, noise_density):
+        """Cadeia usada nos próximos quadros (enviada junto com cada tarefa)."""
+        self._config = (tuple(filter_names), sobel_quality, blur_radius, noise_density)
+
+    # ------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------
+    def _start(self, capacity):
+        self._capacity = capacity
+        self._in_blocks = [shared_memory.SharedMemory(create=True, size=capacity) for _ in range(self.num_slots)]
+        self._out_blocks = [shared_memory.SharedMemory(create=True, size=capacity) for _ in range(self.num_slots)]
+        self._free_slots = list(range(self.num_slots))
+
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        in_names = [b.name for b in self._in_blocks]
+        out_names = [b.name for b in self._out_blocks]
+        self._processes = [
+            self._ctx.Process(
+                target=_worker_main,
+                args=(self._task_queue, self._result_queue, in_names, out_names),
+                daemon=True
+            )
+            for _ in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self._next_seq = 0
+        self._next_to_deliver = 0
+        self._pending = {}
+        self._tags = {}
+        self._collector = threading.Thread(target=self._collect, name="FilterPoolCollector", daemon=True)
+        self._collector.start()
+
+    def close(self):
+        """Encerra os workers e libera a memória compartilhada."""
+        if not self._processes:
+            return
+        for _ in self._processes:
+            self._task_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        # Sinal de parada para a thread coletora
+        self._result_queue.put(None)
+        self._collector.join(timeout=2.0)
+        self._processes = []
+
+        # Quadros que não chegaram a ser entregues: quem esperava por eles recebe None
+        with self._lock:
+            discarded = sorted(self._tags.items(), key=lambda item: item[0])
+            self._tags = {}
+        for _, tag in discarded:
+            self.discarded += 1
+            self.on_result(None, tag)
+
+        for block in self._in_blocks + self._out_blocks:
+            block.close()
+            block.unlink()
+        self._in_blocks = []
+        self._out_blocks = []
+        self._task_queue.close()
+        self._result_queue.close()
+        self._capacity = 0
+
+    # ------------------------------------------------------------
+    # Envio e coleta
+    # ------------------------------------------------------------
+    def reserve(self, nbytes):
+        """
+        Garante slots de pelo menos `nbytes`. Recriar o anel reinicia os workers
+        (e os quadros em andamento são entregues como None), então vale reservar
+        de uma vez o maior quadro esperado (ex.: o modo negociado com a câmera).
+        """
+        if nbytes > self._capacity:
+            self.close()
+            self._start(nbytes)
+
+    def submit(self, frame, tag=None):
+        """
+        Copia o quadro para um slot livre e agenda o processamento.
+        Retorna False (quadro pulado) se todos os slots estiverem em uso.
+        """
+        self.reserve(frame.nbytes)
+
+        with self._lock:
+            if not self._free_slots:
+                self.skipped += 1
+                return False
+            slot = self._free_slots.pop()
+            seq = self._next_seq
+            self._next_seq += 1
+            self._tags[seq] = tag
+
+        np.ndarray(frame.shape, frame.dtype, buffer=self._in_blocks[slot].buf)[...] = frame
+        self._task_queue.put((seq, slot, frame.shape, frame.dtype.str, self._config))
+        self.submitted += 1
+        return True
+
+    def _collect(self):
+        while True:
+            try:
+                item = self._result_queue.get()
+            except (EOFError, OSError):
+                break
+            if item is None:
+                break
+            seq = item[0]
+            self._pending[seq] = item[1:]
+            # Entrega em ordem: só avança quando o próximo número chegou
+            while self._next_to_deliver in self._pending:
+                seq = self._next_to_deliver
+                slot, shape, dtype, error, elapsed = self._pending.pop(seq)
+                self._next_to_deliver += 1
+                if self.compute_time is None:
+                    self.compute_time = elapsed
+                else:
+                    self.compute_time += COMPUTE_SMOOTHING * (elapsed - self.compute_time)
+                if error is None:
+                    frame = np.ndarray(shape, dtype, buffer=self._out_blocks[slot].buf).copy()
+                else:
+                    frame = None
+                    self.errors += 1
+                    self.last_error = error
+                with self._lock:
+                    self._free_slots.append(slot)
+                    tag = self._tags.pop(seq, None)
+                if frame is not None:
+                    self.delivered += 1
+                self.on_result(frame, tag)
+
+    def frame_cost(self):
+        """
+        Custo de vazão por quadro: o tempo de um worker dividido pelo número de
+        workers. Diferente da latência (envio -> resultado), que num pipeline
+        passa de um intervalo da câmera mesmo quando o pool acompanha o ritmo.
+        """
+        if self.compute_time is None:
+            return None
+        return self.compute_time / self.workers
+
+    def stats(self):
+        with self._lock:
+            busy = self.num_slots - len(self._free_slots) if self._capacity else 0
+        return {
+            "workers": self.workers,
+            "slots": self.num_slots,
+            "busy_slots": busy,
+            "submitted": self.submitted,
+            "delivered": self.delivered,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "discarded": self.discarded,
+            "last_error": self.last_error,
+            "compute_ms": None if self.compute_time is None else self.compute_time * 1000.0,
+        }
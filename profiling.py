@@ -0,0 +1,122 @@
+import time
+from collections import deque
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class StageTimer:
+    """
+    Tempos por etapa do pipeline (captura, redimensionamento, filtro, conversão, pintura).
+
+    Com `enabled = False` as sondas custam só uma checagem de atributo:
+    `start()` devolve 0.0 e `stop()` retorna logo em seguida.
+
+        t0 = timer.start()
+        ...
+        timer.stop('filter', t0)
+
+    `snapshot()` devolve FPS e p50/p95 (ms) de cada etapa, para o overlay ou para log.
+    """
+
+    def __init__(self, window=120):
+        self.enabled = False
+        self.window = window
+        self._samples = {}
+        self._frames = deque(maxlen=window)
+
+    def start(self):
+        return time.perf_counter() if self.enabled else 0.0
+
+    def stop(self, stage, t0):
+        if not t0:
+            return
+        self.record(stage, time.perf_counter() - t0)
+
+    def record(self, stage, seconds):
+        """Registra uma duração já medida (ex.: a leitura da câmera, medida uma vez para todas as janelas)."""
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = deque(maxlen=self.window)
+        # deque.append é atômico: a thread de captura também registra aqui
+        samples.append(seconds)
+
+    def mark_frame(self):
+        """Registra um quadro exibido (base do FPS móvel)."""
+        if self.enabled:
+            self._frames.append(time.perf_counter())
+
+    def reset(self):
+        self._samples.clear()
+        self._frames.clear()
+
+    def fps(self):
+        frames = list(self._frames)
+        if len(frames) < 2 or frames[-1] <= frames[0]:
+            return None
+        return (len(frames) - 1) / (frames[-1] - frames[0])
+
+    def snapshot(self):
+        stages = {}
+        for stage, samples in list(self._samples.items()):
+            values = sorted(samples)
+            stages[stage] = {
+                "p50_ms": _percentile(values, 50) * 1000.0 if values else None,
+                "p95_ms": _percentile(values, 95) * 1000.0 if values else None,
+                "count": len(values),
+            }
+        return {"fps": self.fps(), "stages": stages}
+
+    def format_lines(self):
+        """Texto do overlay: uma linha de FPS e uma por etapa."""
+        snap = self.snapshot()
+        fps = snap["fps"]
+        lines = [f"FPS: {fps:.1f}" if fps else "FPS: --"]
+        for stage, values in snap["stages"].items():
+            if values["p50_ms"] is None:
+                continue
+            lines.append(f"{stage}: p50 {values['p50_ms']:.2f} ms  p95 {values['p95_ms']:.2f} ms")
+        return lines
+
+
+class StartupReport:
+    """
+    Marcos da partida do aplicativo, em ms desde o início do processo
+    (o main.py importa este módulo antes de qualquer outro).
+
+        startup_report.mark('main_window')
+        startup_report.mark('first_frame')   # imprime o relatório, se `enabled`
+
+    Cada marco é registrado só na primeira vez. Os marcos sempre ficam em
+    `stats()`; o terminal só recebe o relatório com `enabled` (main.py
+    --startup-report).
+    """
+
+    # Ao atingir este marco o relatório é impresso no terminal
+    FINAL_MARK = 'first_frame'
+
+    def __init__(self, started_at=None, enabled=False):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.enabled = enabled
+        self.marks = {}
+
+    def mark(self, name):
+        if name in self.marks:
+            return
+        self.marks[name] = (time.perf_counter() - self.started_at) * 1000.0
+        if name == self.FINAL_MARK and self.enabled:
+            print("Partida:", self.format())
+
+    def format(self):
+        return ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.marks.items())
+
+    def stats(self):
+        return dict(self.marks)
+
+
+# Relógio da partida do processo (compartilhado pela MainWindow e pelas janelas da webcam)
+startup_report = StartupReport()
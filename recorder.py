@@ -0,0 +1,134 @@
+"""
+Gravação do vídeo processado em arquivo, fora da thread da GUI.
+
+A GUI só coloca o quadro numa fila limitada; uma thread codificadora
+aplica o flip, ajusta o tamanho e chama `cv2.VideoWriter.write`. Com a fila
+cheia a política decide o que acontece:
+  'drop'  -> o quadro novo é descartado (a pré-visualização nunca espera)
+  'block' -> a GUI espera uma vaga (nenhum quadro se perde, mas a
+             pré-visualização trava se o disco/codec não acompanhar)
+"""
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+RECORDING_POLICIES = ('drop', 'block')
+
+# Codec usado para cada extensão de arquivo
+RECORDING_FOURCCS = {
+    '.mp4': 'mp4v',
+    '.avi': 'MJPG',
+    '.mkv': 'XVID',
+}
+
+
+class VideoRecorder:
+    """
+    Grava quadros BGR (ou em tons de cinza) com tamanho e FPS fixos.
+
+        recorder = VideoRecorder('saida.mp4', fps=30, frame_size=(1280, 720))
+        recorder.start()
+        recorder.write(frame, flipped=False)   # chamado pela GUI a cada quadro
+        recorder.stop()                        # esvazia a fila e fecha o arquivo
+
+    Quadros de outro tamanho (ex.: janela redimensionada no modo 'display')
+    são redimensionados na thread codificadora.
+    """
+
+    def __init__(self, path, fps, frame_size, queue_size=64, policy='drop', fourcc=None):
+        if policy not in RECORDING_POLICIES:
+            raise ValueError(f"Política de gravação desconhecida: {policy}")
+        self.path = path
+        self.fps = fps
+        self.frame_size = tuple(frame_size)  # (largura, altura)
+        self.policy = policy
+        extension = os.path.splitext(path)[1].lower()
+        self.fourcc = fourcc or RECORDING_FOURCCS.get(extension, 'mp4v')
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+        self.encode_time = 0.0
+
+    def start(self):
+        """Abre o arquivo (erros aparecem aqui, na thread que chamou) e inicia o codificador."""
+        self._writer = cv2.VideoWriter(
+            self.path,
+            cv2.VideoWriter_fourcc(*self.fourcc),
+            self.fps,
+            self.frame_size
+        )
+        if not self._writer.isOpened():
+            self._writer = None
+            raise IOError(f"Não foi possível criar o vídeo: {self.path}")
+        self._thread = threading.Thread(target=self._encode, name="VideoRecorder", daemon=True)
+        self._thread.start()
+
+    @property
+    def recording(self):
+        return self._thread is not None
+
+    def write(self, frame, flipped=False):
+        """
+        Enfileira um quadro. Retorna False se ele foi descartado (fila cheia
+        com a política 'drop'). O array não é copiado: quem chama não deve
+        alterá-lo depois (os quadros do pipeline não são reutilizados).
+        """
+        if self._thread is None:
+            return False
+        if self.policy == 'drop':
+            try:
+                self._queue.put_nowait((frame, flipped))
+            except queue.Full:
+                self.dropped += 1
+                return False
+        else:
+            self._queue.put((frame, flipped))
+        return True
+
+    def stop(self, timeout=10.0):
+        """Grava o que restou na fila e fecha o arquivo."""
+        if self._thread is None:
+            return
+        # O sentinela sempre entra: a thread codificadora continua esvaziando a fila
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _encode(self):
+        width, height = self.frame_size
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                frame, flipped = item
+                t0 = time.perf_counter()
+                if frame.shape[1] != width or frame.shape[0] != height:
+                    frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+                if frame.ndim == 2:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+                if flipped:
+                    # Na tela o flip é só uma transformação da pintura
+                    frame = cv2.flip(frame, 1)
+                self._writer.write(frame)
+                self.encode_time += time.perf_counter() - t0
+                self.written += 1
+        finally:
+            self._writer.release()
+            self._writer = None
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "policy": self.policy,
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "written": self.written,
+            "dropped": self.dropped,
+            "encode_ms": self.encode_time / self.written * 1000.0 if self.written else None,
+        }
@@ -0,0 +1,183 @@
+"""
+Replay instantâneo: os últimos N segundos do vídeo processado, prontos
+para serem salvos depois que algo acontece.
+
+Os quadros são comprimidos em JPEG (cv2.imencode) numa thread própria e
+guardados num anel com limite rígido de memória; os mais antigos saem
+primeiro (por idade ou por falta de espaço). A exportação decodifica o anel
+e grava o clipe numa thread de fundo.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from defaults import DEFAULT_REPLAY_SECONDS
+from recorder import RECORDING_FOURCCS
+
+DEFAULT_REPLAY_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_REPLAY_QUALITY = 80
+
+
+class ReplayBuffer:
+    """
+    Anel de quadros JPEG com duração e memória máximas.
+
+        replay = ReplayBuffer(seconds=30)
+        replay.start()
+        replay.push(frame, flipped, timestamp)   # GUI: só enfileira, nunca espera
+        replay.export('replay.mp4', on_done=callback)
+        replay.stop()
+
+    Quadros que chegam com a fila do codificador cheia são descartados.
+    """
+
+    def __init__(self, seconds=DEFAULT_REPLAY_SECONDS, max_bytes=DEFAULT_REPLAY_MAX_BYTES,
+                 quality=DEFAULT_REPLAY_QUALITY, queue_size=8):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._frames = deque()  # (instante, bytes JPEG)
+        self._bytes = 0
+        self._thread = None
+        self.encoded = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.encode_time = 0.0
+
+    def set_seconds(self, seconds):
+        self.seconds = seconds
+        with self._lock:
+            self._evict()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._encode, name="ReplayEncoder", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=2.0):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def push(self, frame, flipped=False, timestamp=None):
+        """Enfileira um quadro para compressão. Retorna False se ele foi descartado."""
+        if self._thread is None:
+            return False
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        try:
+            self._queue.put_nowait((frame, flipped, timestamp))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _encode(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, flipped, timestamp = item
+            t0 = time.perf_counter()
+            if flipped:
+                frame = cv2.flip(frame, 1)
+            ok, data = cv2.imencode('.jpg', frame, params)
+            if not ok:
+                continue
+            data = data.tobytes()
+            self.encode_time += time.perf_counter() - t0
+            self.encoded += 1
+            with self._lock:
+                self._frames.append((timestamp, data))
+                self._bytes += len(data)
+                self._evict()
+
+    def _evict(self):
+        # Chamado com o lock: remove os quadros velhos demais ou além do limite de memória
+        if not self._frames:
+            return
+        newest = self._frames[-1][0]
+        while self._frames and (
+            self._bytes > self.max_bytes or newest - self._frames[0][0] > self.seconds
+        ):
+            _, data = self._frames.popleft()
+            self._bytes -= len(data)
+            self.evicted += 1
+
+    def snapshot(self):
+        """Cópia da lista de (instante, JPEG) atual; os bytes são imutáveis e não são copiados."""
+        with self._lock:
+            return list(self._frames)
+
+    def export(self, path, fourcc=None, on_done=None):
+        """
+        Grava o conteúdo atual do anel em `path` numa thread de fundo
+        (codec escolhido pela extensão, como na gravação).
+        `on_done(path, quadros, erro)` é chamado nessa thread ao terminar.
+        """
+        frames = self.snapshot()
+        fourcc = fourcc or RECORDING_FOURCCS.get(os.path.splitext(path)[1].lower(), 'mp4v')
+        thread = threading.Thread(
+            target=_export_clip,
+            args=(frames, path, fourcc, on_done),
+            name="ReplayExport",
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def stats(self):
+        with self._lock:
+            count = len(self._frames)
+            buffered = self._frames[-1][0] - self._frames[0][0] if count > 1 else 0.0
+            size = self._bytes
+        return {
+            "frames": count,
+            "seconds": buffered,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "queue_depth": self._queue.qsize(),
+            "encoded": self.encoded,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+            "encode_ms": self.encode_time / self.encoded * 1000.0 if self.encoded else None,
+        }
+
+
+def _export_clip(frames, path, fourcc, on_done):
+    written = 0
+    error = None
+    try:
+        if not frames:
+            raise ValueError("O buffer de replay está vazio.")
+        # FPS real do trecho guardado (a câmera e o processamento ditam o ritmo)
+        duration = frames[-1][0] - frames[0][0]
+        fps = (len(frames) - 1) / duration if duration > 0 else 30.0
+        # O tamanho do vídeo é o do quadro mais recente (a janela pode ter sido redimensionada)
+        last = cv2.imdecode(np.frombuffer(frames[-1][1], np.uint8), cv2.IMREAD_COLOR)
+        height, width = last.shape[:2]
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+        if not writer.isOpened():
+            raise IOError(f"Não foi possível criar o vídeo: {path}")
+        try:
+            for _, data in frames:
+                frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+                if frame.shape[0] != height or frame.shape[1] != width:
+                    frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+                writer.write(frame)
+                written += 1
+        finally:
+            writer.release()
+    except Exception as e:
+        error = e
+    if on_done is not None:
+        on_done(path, written, error)
@@ -1,17 +1,80 @@
-import cv2
+import threading
+import time
+from functools import lru_cache
 
 from PyQt5 import QtCore, QtWidgets
-from PyQt5.QtCore import Qt, QTimer, QEvent
-from PyQt5.QtGui import QImage, QPixmap, QIcon, QRegion
+from PyQt5.QtCore import Qt, QEvent, QTimer, pyqtSignal
+from PyQt5.QtGui import QIcon, QRegion
 from PyQt5.QtWidgets import QToolButton, QShortcut
 from PyQt5.QtGui import QKeySequence
 
-from filters import (
-    apply_sobel,
-    apply_gaussian,
-    apply_salt_pepper,
-    apply_gray
-)
+from filter_chain import FilterChain
+from capture import LatestFrameSlot, FramePacer, FrameSink
+from capture_broker import capture_broker
+from profiling import StageTimer, startup_report
+from process_pool import SharedMemoryFilterPool
+from tiling import TiledExecutor
+from camera import normalize_capture_config
+from recorder import VideoRecorder
+from replay import ReplayBuffer
+from mjpeg_server import MjpegServer, normalize_stream_config
+from change_detection import FilterCache
+from video_widget import VideoWidget
+from viewport import ellipse_regions, apply_in_regions
+from noise import SaltPepperNoise, DEFAULT_SALT_PEPPER_DENSITY
+from blur import BlurEngine
+
+# Sem quadros chegando (câmera abrindo/parada), o resize pendente sai por este timer
+RESIZE_FALLBACK_MS = 50
+
+
+# Folha de estilo de cada formato (montada uma vez)
+SHAPE_STYLESHEETS = {
+    'circle': (
+        "QWidget#Form {"
+        "    background-color: rgba(255, 255, 255, 0);"
+        "    border: 5px solid grey;"
+        "    border-radius: 250px;"
+        "}"
+        "QFrame#mainFrame {"
+        "    border: 5px solid grey;"
+        "    border-radius: 245px;"
+        "    background-color: rgba(255, 0, 0, 50);"
+        "}"
+        "QFrame#toolBarFrame {"
+        "    background-color: rgba(230, 230, 230, 180);"
+        "    border-radius: 0px;"
+        "}"
+    ),
+    'square': (
+        "QWidget#Form {"
+        "    background-color: rgba(255, 255, 255, 0);"
+        "    border: 5px solid grey;"
+        "    border-radius: 0px;"
+        "}"
+        "QFrame#mainFrame {"
+        "    border: 5px solid grey;"
+        "    border-radius: 0px;"
+        "    background-color: rgba(255, 0, 0, 50);"
+        "}"
+        "QFrame#toolBarFrame {"
+        "    background-color: rgba(230, 230, 230, 180);"
+        "    border-radius: 0px;"
+        "}"
+    ),
+}
+
+
+def _shape_stylesheet(shape):
+    return SHAPE_STYLESHEETS['circle' if shape == 'circle' else 'square']
+
+
+@lru_cache(maxsize=64)
+def _shape_mask(shape, width, height):
+    """Máscara da janela por formato e tamanho (a elipse do QRegion é cara de montar)."""
+    kind = QRegion.Ellipse if shape == 'circle' else QRegion.Rectangle
+    return QRegion(0, 0, width, height, kind)
+
  
 class SecondWindow(QtWidgets.QWidget):
     """
@@ -21,7 +84,9 @@ class SecondWindow(QtWidgets.QWidget):
         (3) Ocultar Barra (Ctrl+N / Ctrl+M para mostrar)
         (4) Flip Horizontal da webcam
         (5) Maximizar/Restaurar
-        (6,7,8) Placeholders
+        (6) Gravar/Parar gravação (Ctrl+R)
+        (7) Salvar replay dos últimos segundos (Ctrl+E)
+        (8) Placeholder
         (9) Travar/Destravar (janela sempre no topo)
         (10) Redimensionar (arrastando o botão)
 
@@ -30,11 +95,34 @@ class SecondWindow(QtWidgets.QWidget):
         - "square": janela quadrada, barra na base.
     """
 
+    # Emitido pela thread de captura quando há um quadro novo no slot
+    frame_ready = pyqtSignal()
+    # Emitido pela thread coletora do pool de processos: (quadro filtrado ou None, instantes)
+    frame_processed = pyqtSignal(object, object)
+    # Emitido pela thread de exportação do replay: (caminho, quadros, erro ou None)
+    replay_exported = pyqtSignal(object, object, object)
+    # Emitido pela thread que abre a câmera: (geração do pedido, inscrição ou None)
+    webcam_started = pyqtSignal(object, object)
+    # Avisam a MainWindow (que pode ter várias janelas) da ativação e do fechamento
+    activated = pyqtSignal(object)
+    closed = pyqtSignal(object)
+
     def __init__(
         self,
         filter_selected=None,
         shape_selected="circle",
-        window_locked=False
+        window_locked=False,
+        sobel_quality='exact',
+        noise_density=DEFAULT_SALT_PEPPER_DENSITY,
+        blur_radius=7,
+        filter_chain=None,
+        processing_mode='display',
+        execution_mode='inline',
+        capture_config=None,
+        recording_policy='drop',
+        replay_seconds=0,
+        stream_config=None,
+        change_detection=False
     ):
         super().__init__()
 
@@ -44,14 +132,55 @@ class SecondWindow(QtWidgets.QWidget):
         self.setObjectName("Form")
 
         # Estados
-        self.filter_selected = filter_selected
+        if filter_chain is None:
+            filter_chain = [filter_selected] if filter_selected else []
+        self.filter_chain = list(filter_chain)  # ex.: ['gray', 'sobel']
         self.shape_selected = shape_selected
         self.window_locked = window_locked
         self.is_flipped = False
-
-        # Controle de webcam
-        self.cap = None
-        self.timer = None
+        self.sobel_quality = sobel_quality  # 'exact', 'fast', 'l1' ou 'scharr'
+        self.salt_pepper = SaltPepperNoise(noise_density)
+        self.blur = BlurEngine(blur_radius)  # rota 'auto': raios grandes usam aproximações
+        # 'inline': filtra na thread da GUI; 'threads': faixas do quadro em paralelo;
+        # 'processes': pool de processos com memória compartilhada
+        self.execution_mode = 'inline'
+        self.filter_pool = None
+        self.tiled_executor = None
+        self.set_execution_mode(execution_mode)
+        self.compiled_chain = None
+        self._compile_filter_chain()
+        # 'display': filtra no tamanho real do vídeo na tela; 'full': resolução da câmera
+        self.processing_mode = processing_mode
+        # Reaproveita a saída (ou refiltra só os blocos alterados) com a cena parada
+        self.filter_cache = FilterCache() if change_detection else None
+
+        # Controle de webcam: a câmera é compartilhada entre as janelas (capture_broker.py)
+        self.capture_subscription = None
+        # Cada start/stop invalida uma abertura ainda em andamento na thread de fundo
+        self._webcam_generation = 0
+        self._webcam_opening = False
+        self._first_frame_shown = False
+        self.capture_config = normalize_capture_config(capture_config)
+        self.capture_mode = None  # modo negociado com o driver
+        self._capture_size = None  # (largura, altura) do último quadro da câmera
+        # Gravação: fila limitada + thread codificadora ('drop' nunca trava a prévia)
+        self.recorder = None
+        self.recording_policy = recording_policy
+        # Replay instantâneo (0 = desligado): anel de JPEGs comprimidos fora da GUI
+        self.replay_buffer = None
+        self.set_replay_seconds(replay_seconds)
+        # Servidor MJPEG local (comprime uma vez por quadro para todos os clientes)
+        self.stream_server = None
+        self.stream_config = normalize_stream_config()
+        self.frame_slot = LatestFrameSlot()
+        self.pacer = FramePacer()
+        # Tempos por etapa (overlay Ctrl+T); desligado não custa quase nada
+        self.stage_timer = StageTimer()
+        self._overlay_refreshed_at = 0.0
+        self.frame_ready.connect(self.update_frame)
+        self.frame_processed.connect(self._show_processed_frame)
+        self.replay_exported.connect(self._on_replay_exported)
+        self.webcam_started.connect(self._on_webcam_started)
 
         # Variáveis auxiliares para arrastar e redimensionar a janela
         self._is_dragging = False
@@ -59,6 +188,18 @@ class SecondWindow(QtWidgets.QWidget):
         self._is_resizing = False
         self._resize_origin = QtCore.QPoint()
         self._initial_size = self.size()
+        # Resize do arraste: no máximo um por quadro exibido (o último pedido vence)
+        self._pending_side = None
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(RESIZE_FALLBACK_MS)
+        self._resize_timer.timeout.connect(self._apply_pending_resize)
+        self.resize_requests = 0
+        self.resizes_applied = 0
+        self._mask_key = None  # (formato, largura, altura) da máscara aplicada
+        # Estado já aplicado à janela nativa (None = nunca aplicado)
+        self._applied_flags = None
+        self._applied_shape = None
 
         # Variável de controle para Maximizar/Restaurar
         self.is_maximized = False
@@ -69,10 +210,10 @@ class SecondWindow(QtWidgets.QWidget):
         self.mainFrame.setObjectName("mainFrame")
         self.mainFrame.setGeometry(0, 0, self.width(), self.height())
 
-        # Label de vídeo
-        self.video_label = QtWidgets.QLabel(self.mainFrame)
-        self.video_label.setScaledContents(True)
-        self.video_label.setGeometry(0, 0, self.mainFrame.width(), self.mainFrame.height())
+        # Widget de vídeo (pinta o quadro direto; flip feito na pintura)
+        self.video_widget = VideoWidget(self.mainFrame)
+        self.video_widget.setGeometry(0, 0, self.mainFrame.width(), self.mainFrame.height())
+        self.video_widget.stage_timer = self.stage_timer
 
         # Barra de ferramentas
         self.toolBarFrame = QtWidgets.QFrame(self.mainFrame)
@@ -140,6 +281,17 @@ class SecondWindow(QtWidgets.QWidget):
             self.toolBarLayout.addWidget(btn)
             self.placeholder_buttons.append(btn)
 
+        # (6) Gravar: usa o primeiro espaço reservado
+        self.btnRecord = self.placeholder_buttons[0]
+        self.btnRecord.setToolTip("Gravar (Ctrl+R)")
+        self.btnRecord.setCheckable(True)
+        self.btnRecord.clicked.connect(self.toggle_recording)
+
+        # (7) Salvar replay: segundo espaço reservado
+        self.btnReplay = self.placeholder_buttons[1]
+        self.btnReplay.setToolTip("Salvar Replay (Ctrl+E)")
+        self.btnReplay.clicked.connect(self.export_replay)
+
         # (9) Travar/Destravar
         self.btnLock = QToolButton(self.toolBarFrame)
         self.btnLock.setFixedSize(50, 50)
@@ -172,6 +324,15 @@ class SecondWindow(QtWidgets.QWidget):
         self.shortcut_hide.activated.connect(self.hide_toolbar)
         self.shortcut_show = QShortcut(QKeySequence("Ctrl+M"), self)
         self.shortcut_show.activated.connect(self.show_toolbar)
+        # Atalho do overlay de tempos por etapa
+        self.shortcut_timing = QShortcut(QKeySequence("Ctrl+T"), self)
+        self.shortcut_timing.activated.connect(self.toggle_timing_overlay)
+        # Atalho da gravação
+        self.shortcut_record = QShortcut(QKeySequence("Ctrl+R"), self)
+        self.shortcut_record.activated.connect(self.toggle_recording)
+        # Atalho do replay
+        self.shortcut_replay = QShortcut(QKeySequence("Ctrl+E"), self)
+        self.shortcut_replay.activated.connect(self.export_replay)
 
         # Instala event filters
         self.installEventFilter(self)
@@ -180,10 +341,12 @@ class SecondWindow(QtWidgets.QWidget):
         # Inicia webcam
         self.start_webcam()
 
-        # Aplica formato (circle ou square) e lock (janela sempre no topo)
-        self.apply_shape()
-        self.apply_lock()
-        self.update_lock_icon()
+        # Servidor MJPEG (precisa da janela pronta para exibir erros)
+        if stream_config:
+            self.set_stream_config(stream_config)
+
+        # Aplica formato (circle ou square) e lock (janela sempre no topo) de uma vez
+        self.set_window_state()
 
     # --------------------------------------------------------
     # 1) Ocultar/Mostrar a Barra
@@ -198,41 +361,392 @@ class SecondWindow(QtWidgets.QWidget):
     # 2) Webcam e Filtros
     # --------------------------------------------------------
     def start_webcam(self):
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
+        # Abrir o dispositivo pode levar segundos (V4L2): acontece numa thread de
+        # fundo enquanto a janela já aparece com um texto de espera.
+        # A leitura da câmera roda em uma thread própria (uma por dispositivo, comum
+        # a todas as janelas); a GUI só é avisada (via sinal) quando existe um
+        # quadro novo para pintar.
+        self._webcam_generation += 1
+        generation = self._webcam_generation
+        self._webcam_opening = True
+        config = self.capture_config
+        sink = FrameSink(
+            self.frame_slot,
+            on_frame=self.frame_ready.emit,
+            pacer=self.pacer,
+            stage_timer=self.stage_timer
+        )
+        self.video_widget.set_placeholder("Abrindo a câmera...")
+
+        def open_device():
+            self.webcam_started.emit(generation, capture_broker.subscribe(config, sink))
+
+        threading.Thread(target=open_device, name="CameraOpen", daemon=True).start()
+
+    def _on_webcam_started(self, generation, subscription):
+        if generation != self._webcam_generation:
+            # A janela parou ou trocou de câmera enquanto esta abertura acontecia
+            if subscription is not None:
+                subscription.close()
+            return
+        self._webcam_opening = False
+        if subscription is None:
+            self.video_widget.set_placeholder("Webcam indisponível")
             QtWidgets.QMessageBox.critical(self, "Erro", "Não foi possível acessar a webcam.")
             return
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)
+        self.capture_subscription = subscription
+        self.capture_mode = subscription.mode
+        startup_report.mark('camera_open')
+        self._reserve_filter_pool()
+
+    @property
+    def webcam_active(self):
+        """True com a câmera aberta ou sendo aberta."""
+        return self.capture_subscription is not None or self._webcam_opening
+
+    def stop_webcam(self):
+        self._webcam_generation += 1
+        self._webcam_opening = False
+        if self.capture_subscription is not None:
+            # A câmera só é liberada quando a última janela sai
+            self.capture_subscription.close()
+            self.capture_subscription = None
 
     def update_frame(self):
-        if self.cap and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if ret:
-                if self.is_flipped:
-                    frame = cv2.flip(frame, 1)
-                frame = self.apply_filter(frame)
-                # Converte para QImage
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb.shape
-                qt_img = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qt_img)
-                self.video_label.setPixmap(pixmap)
+        # Pega apenas o quadro mais recente; quadros antigos já foram descartados
+        shared, captured_at = self.frame_slot.take()
+        if shared is None:
+            return
+        started_at = time.perf_counter()
+        timer = self.stage_timer
+        frame = shared.frame
+        self._capture_size = (frame.shape[1], frame.shape[0])
+        if self.execution_mode == 'processes' and self.compiled_chain:
+            # Slots do tamanho do quadro da câmera: redimensionar a janela não reinicia o pool
+            self._ensure_filter_pool(frame.nbytes)
+        if self.processing_mode == 'display':
+            # Reduz antes de filtrar: o Qt reduziria de qualquer forma na pintura
+            t0 = timer.start()
+            # Janelas do mesmo tamanho recebem o mesmo quadro reduzido
+            frame = shared.fit_to_display(*self._display_pixel_size())
+            timer.stop('resize', t0)
+        if self.execution_mode == 'processes' and self.compiled_chain:
+            # O quadro segue para os workers; a exibição acontece em _show_processed_frame
+            if not self.filter_pool.submit(frame, (captured_at, started_at)):
+                self.pacer.on_skipped()
+            return
+        t0 = timer.start()
+        frame = self.process_frame(frame)
+        timer.stop('filter', t0)
+        self._show_frame(frame, captured_at, started_at)
+
+    def _show_processed_frame(self, frame, timestamps):
+        if frame is None or self.filter_pool is None:
+            return
+        # Custo de vazão do pool: a latência de um pipeline passa de um intervalo mesmo em dia
+        self._show_frame(frame, *timestamps, cost=self.filter_pool.frame_cost())
+
+    def _show_frame(self, frame, captured_at, started_at, cost=None):
+        # Entrega o BGR direto ao widget (sem cvtColor, sem cópia); o flip é aplicado na pintura
+        self.video_widget.set_frame(frame)
+        # O resize pedido pelo arraste acompanha o ritmo dos quadros
+        self._apply_pending_resize()
+        if not self._first_frame_shown:
+            self._first_frame_shown = True
+            startup_report.mark('first_frame')
+        if self.recorder is not None:
+            # Só enfileira: a codificação roda na thread do gravador
+            self.recorder.write(frame, self.is_flipped)
+        if self.replay_buffer is not None:
+            self.replay_buffer.push(frame, self.is_flipped, captured_at)
+        if self.stream_server is not None:
+            self.stream_server.publish(frame, self.is_flipped)
+        self.pacer.on_processed(captured_at, started_at, cost=cost)
+        if self.stage_timer.enabled:
+            self.stage_timer.mark_frame()
+        self._refresh_timing_overlay()
+
+    def _reserve_filter_pool(self):
+        """
+        No modo de processos, reserva os slots do pool para o modo negociado
+        com a câmera: o anel não é recriado (nem os workers reiniciados) quando
+        o primeiro quadro chega.
+        """
+        mode = self.capture_mode or {}
+        if self.execution_mode == 'processes' and self.compiled_chain and mode.get("width") and mode.get("height"):
+            self._ensure_filter_pool(mode["width"] * mode["height"] * 3)
+
+    def _ensure_filter_pool(self, nbytes):
+        if self.filter_pool is None:
+            self.filter_pool = SharedMemoryFilterPool(on_result=self.frame_processed.emit)
+            self._sync_filter_pool()
+        self.filter_pool.reserve(nbytes)
+
+    def _sync_filter_pool(self):
+        if self.filter_pool is not None:
+            self.filter_pool.configure(
+                self.filter_chain,
+                self.sobel_quality,
+                self.blur.radius,
+                self.salt_pepper.density
+            )
+
+    def _stop_filter_pool(self):
+        if self.filter_pool is not None:
+            self.filter_pool.close()
+            self.filter_pool = None
+
+    def pipeline_stats(self):
+        """
+        Quadros capturados, entregues à GUI e descartados por estarem velhos,
+        o ritmo real da câmera, quadros atrasados e os bytes copiados por quadro
+        no caminho de exibição.
+        """
+        stats = self.frame_slot.stats()
+        stats["pacing"] = self.pacer.stats()
+        stats["display"] = self.video_widget.stats()
+        stats["capture_mode"] = self.capture_mode
+        stats["capture_broker"] = capture_broker.stats()
+        stats["startup_ms"] = startup_report.stats()
+        if self.filter_pool is not None:
+            stats["filter_pool"] = self.filter_pool.stats()
+        if self.recorder is not None:
+            stats["recording"] = self.recorder.stats()
+        if self.replay_buffer is not None:
+            stats["replay"] = self.replay_buffer.stats()
+        if self.stream_server is not None:
+            stats["stream"] = self.stream_server.stats()
+        stats["resize"] = {"requested": self.resize_requests, "applied": self.resizes_applied}
+        if self.filter_cache is not None:
+            stats["change_detection"] = self.filter_cache.stats()
+        return stats
+
+    # --------------------------------------------------------
+    # 3) Overlay de tempos por etapa (Ctrl+T)
+    # --------------------------------------------------------
+    def toggle_timing_overlay(self):
+        self.set_timing_overlay(not self.stage_timer.enabled)
+
+    def set_timing_overlay(self, enabled):
+        self.stage_timer.reset()
+        self.stage_timer.enabled = enabled
+        self.video_widget.set_overlay([])
+
+    def _refresh_timing_overlay(self):
+        # Atualiza o texto no máximo 4x por segundo
+        now = time.perf_counter()
+        if now - self._overlay_refreshed_at >= 0.25:
+            self._overlay_refreshed_at = now
+            warning = self.pacer.warning()
+            if not self.stage_timer.enabled:
+                # Overlay desligado: só o aviso de atraso aparece (e some quando passa)
+                self.video_widget.set_overlay([warning] if warning else [])
+                return
+            lines = self.stage_timer.format_lines()
+            if warning:
+                lines.append(warning)
+            if self.recorder is not None:
+                rec = self.recorder.stats()
+                lines.append(
+                    f"gravação: fila {rec['queue_depth']}/{rec['queue_size']}  "
+                    f"gravados {rec['written']}  descartados {rec['dropped']}"
+                )
+            if self.filter_cache is not None:
+                cache = self.filter_cache.stats()
+                lines.append(
+                    f"reuso: acertos {cache['hit_rate']:.0%}  CPU economizada {cache['cpu_saved_ratio']:.0%}"
+                )
+            if self.replay_buffer is not None:
+                replay = self.replay_buffer.stats()
+                lines.append(
+                    f"replay: {replay['seconds']:.0f} s  {replay['bytes'] / 1e6:.0f} MB  "
+                    f"descartados {replay['dropped']}"
+                )
+            self.video_widget.set_overlay(lines)
+
+    def timing_stats(self):
+        """FPS e p50/p95 (ms) de cada etapa; vazio se o overlay estiver desligado."""
+        return self.stage_timer.snapshot()
+
+    def process_frame(self, frame):
+        """
+        Aplica a cadeia. Com a detecção de mudanças ligada, quadros iguais ao
+        anterior reaproveitam a saída e só os blocos alterados são refiltrados.
+        """
+        if self.filter_cache is not None and self.compiled_chain:
+            # Saída só da elipse (cantos pretos) ou do quadro inteiro: não podem se misturar
+            context = self._crop_to_ellipse()
+            return self.filter_cache.apply(self.compiled_chain, frame, self._filter_frame, context)
+        return self._filter_frame(frame)
+
+    def _crop_to_ellipse(self):
+        """
+        True se basta filtrar a elipse visível: modo 'display', janela circular
+        e nenhuma saída que use o quadro inteiro (gravação, replay, transmissão),
+        já que fora da elipse o resultado fica preto e só a máscara o esconde.
+        """
+        return (
+            self.processing_mode == 'display'
+            and self.shape_selected == 'circle'
+            and self.recorder is None
+            and self.replay_buffer is None
+            and self.stream_server is None
+        )
+
+    def _filter_frame(self, frame):
+        """
+        Filtra o quadro inteiro, ou só as faixas que cobrem a elipse visível
+        quando isso sai mais barato (ver _crop_to_ellipse).
+        """
+        if self.compiled_chain and self._crop_to_ellipse():
+            h, w = frame.shape[:2]
+            halo = self.compiled_chain.halo()
+            regions = ellipse_regions(w, h, halo)
+            if regions:
+                return apply_in_regions(frame, self.apply_filter, regions, halo)
+        return self.apply_filter(frame)
+
+    def _display_pixel_size(self):
+        """Tamanho do vídeo na tela em pixels físicos (considera devicePixelRatio)."""
+        ratio = self.video_widget.devicePixelRatioF()
+        return round(self.video_widget.width() * ratio), round(self.video_widget.height() * ratio)
 
     def apply_filter(self, frame):
-        if self.filter_selected == 'sobel':
-            return apply_sobel(frame)
-        elif self.filter_selected == 'gaussian':
-            return apply_gaussian(frame)
-        elif self.filter_selected == 'salt_pepper':
-            return apply_salt_pepper(frame)
-        elif self.filter_selected == 'gray':
-            return apply_gray(frame)
-        return frame
+        # A cadeia já vem compilada: nada é interpretado por quadro
+        if self.tiled_executor is not None:
+            return self.tiled_executor.run(self.compiled_chain, frame)
+        return self.compiled_chain(frame)
+
+    def _compile_filter_chain(self):
+        self.compiled_chain = FilterChain(
+            self.filter_chain,
+            sobel_quality=self.sobel_quality,
+            blur=self.blur,
+            salt_pepper=self.salt_pepper
+        )
+        self._sync_filter_pool()
 
     def flip_webcam(self):
-        self.is_flipped = not self.is_flipped
+        self.set_flip(not self.is_flipped)
+
+    # --------------------------------------------------------
+    # 3.1) Gravação (Ctrl+R)
+    # --------------------------------------------------------
+    def toggle_recording(self):
+        if self.recorder is None:
+            self.start_recording()
+        else:
+            self.stop_recording()
+
+    def start_recording(self, path=None):
+        if self._capture_size is None:
+            self.btnRecord.setChecked(False)
+            QtWidgets.QMessageBox.warning(self, "Gravar Vídeo", "Nenhum quadro da webcam para gravar.")
+            return
+        if path is None:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                self,
+                "Gravar Vídeo",
+                "gravacao.mp4",
+                "Vídeos (*.mp4 *.avi *.mkv);;Todos Arquivos (*)"
+            )
+        if not path:
+            self.btnRecord.setChecked(False)
+            return
+        # No modo 'display' os quadros seguem o tamanho da janela; o arquivo
+        # usa o tamanho da câmera (grave com 'full' para não perder detalhe)
+        fps = self.pacer.stats()["camera_fps"] or (self.capture_mode or {}).get("fps") or 30.0
+        recorder = VideoRecorder(path, fps, self._capture_size, policy=self.recording_policy)
+        try:
+            recorder.start()
+        except Exception as e:
+            self.btnRecord.setChecked(False)
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao iniciar a gravação:\n{e}")
+            return
+        self.recorder = recorder
+        self.btnRecord.setChecked(True)
+
+    def stop_recording(self):
+        if self.recorder is None:
+            return
+        recorder = self.recorder
+        self.recorder = None
+        recorder.stop()
+        self.btnRecord.setChecked(False)
+
+    def set_recording_policy(self, policy):
+        # Vale para a próxima gravação
+        self.recording_policy = policy
+
+    # --------------------------------------------------------
+    # 3.2) Replay instantâneo (Ctrl+E)
+    # --------------------------------------------------------
+    def set_replay_seconds(self, seconds):
+        if not seconds:
+            if self.replay_buffer is not None:
+                self.replay_buffer.stop()
+                self.replay_buffer = None
+            return
+        if self.replay_buffer is None:
+            self.replay_buffer = ReplayBuffer(seconds)
+            self.replay_buffer.start()
+        else:
+            self.replay_buffer.set_seconds(seconds)
+
+    def export_replay(self, path=None):
+        if self.replay_buffer is None:
+            QtWidgets.QMessageBox.information(
+                self, "Salvar Replay", "O replay está desligado (Janela > Replay Instantâneo)."
+            )
+            return
+        if path is None:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                self,
+                "Salvar Replay",
+                "replay.mp4",
+                "Vídeos (*.mp4 *.avi *.mkv);;Todos Arquivos (*)"
+            )
+        if path:
+            # Decodificar e gravar o clipe fica numa thread de fundo
+            self.replay_buffer.export(path, on_done=self.replay_exported.emit)
+
+    def _on_replay_exported(self, path, frames, error):
+        if error is not None:
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao salvar o replay:\n{error}")
+        else:
+            # A exportação roda em segundo plano: avisa quando o arquivo fica pronto
+            QtWidgets.QMessageBox.information(self, "Salvar Replay", f"Replay salvo em {path} ({frames} quadros).")
+
+    # --------------------------------------------------------
+    # 3.3) Servidor MJPEG local
+    # --------------------------------------------------------
+    def set_stream_config(self, config):
+        """Liga, desliga ou ajusta o servidor. Retorna False se ele não pôde ser iniciado."""
+        config = normalize_stream_config(config)
+        server = self.stream_server
+        # Endereço e qualidade exigem reabrir o servidor; FPS e resolução não
+        if server is not None and (
+            not config["enabled"]
+            or any(config[key] != server.config[key] for key in ("host", "port", "quality"))
+        ):
+            server.stop()
+            self.stream_server = server = None
+        self.stream_config = config
+        if not config["enabled"]:
+            return True
+        if server is not None:
+            # Só os limites mudaram: o servidor continua no ar
+            server.set_limits(config["max_fps"], config["max_width"], config["max_height"])
+            return True
+        server = MjpegServer(config)
+        try:
+            server.start()
+        except OSError as e:
+            self.stream_config["enabled"] = False
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao iniciar o servidor MJPEG:\n{e}")
+            return False
+        self.stream_server = server
+        return True
 
     # --------------------------------------------------------
     # 4) Maximizar / Restaurar
@@ -287,9 +801,7 @@ class SecondWindow(QtWidgets.QWidget):
     # 5) Travar/Destravar (Janela sempre no topo)
     # --------------------------------------------------------
     def toggle_lock_state(self):
-        self.window_locked = not self.window_locked
-        self.update_lock_icon()
-        self.apply_lock()
+        self.set_window_state(locked=not self.window_locked)
 
     def update_lock_icon(self):
         if self.window_locked:
@@ -298,11 +810,7 @@ class SecondWindow(QtWidgets.QWidget):
             self.btnLock.setIcon(QIcon("ICONS/icon_unlock.png"))
 
     def apply_lock(self):
-        if self.window_locked:
-            self.setWindowFlags(self.windowFlags() | QtCore.Qt.WindowStaysOnTopHint)
-        else:
-            self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowStaysOnTopHint)
-        self.show()
+        self.set_window_state(locked=self.window_locked)
 
     # --------------------------------------------------------
     # 6) Formato (Circle / Square)
@@ -312,77 +820,53 @@ class SecondWindow(QtWidgets.QWidget):
         Aplica o formato escolhido (circle ou square) e,
         em seguida, reposiciona a barra de ferramentas.
         """
-        self.setWindowFlags(QtCore.Qt.FramelessWindowHint | QtCore.Qt.WindowStaysOnTopHint)
+        self.set_window_state(shape=self.shape_selected)
 
-        if self.shape_selected == 'circle':
-            self.set_circular_style()
-        else:
-            self.set_square_style()
-
-        self._adjust_toolbar_position()
-        self.show()
+    def apply_shape_change(self):
+        """Alterna entre circle e square (botão da barra)."""
+        shape = 'square' if self.shape_selected == 'circle' else 'circle'
+        print(f"Mudando para {shape}")
+        self.set_window_state(shape=shape)
 
     # --------------------------------------------------------
-    # 6) Formato (Circle / Square)
+    # 6.1) Estado da janela (formato, trava e flip num passo só)
     # --------------------------------------------------------
-    def apply_shape_change(self):
+    def set_window_state(self, shape=None, locked=None, flipped=None):
         """
-        Aplica o formato escolhido (circle ou square) e,
-        em seguida, reposiciona a barra de ferramentas.
+        Aplica formato, trava e flip de uma vez, mexendo só no que mudou
+        (None = manter). Só a trava muda as flags da janela, e só quando
+        ela muda de fato: setWindowFlags recria a janela nativa (esconde,
+        perde a máscara e precisa de show()).
         """
-        self.setWindowFlags(QtCore.Qt.FramelessWindowHint | QtCore.Qt.WindowStaysOnTopHint)
-
-        if self.shape_selected == 'circle':
-            self.shape_selected = 'square'
-            print("Mudando para square")
-            self.set_square_style()
-        else:
-            self.shape_selected = 'circle'
-            print("Mudando para circle")
-            self.set_circular_style()
-
+        if shape is not None:
+            self.shape_selected = shape
+        if locked is not None:
+            self.window_locked = locked
+        if flipped is not None:
+            self.is_flipped = flipped
+
+        flags = QtCore.Qt.FramelessWindowHint
+        if self.window_locked:
+            flags |= QtCore.Qt.WindowStaysOnTopHint
+        if flags != self._applied_flags:
+            first_time = self._applied_flags is None
+            visible = self.isVisible()
+            self.setWindowFlags(flags)
+            self._applied_flags = flags
+            # A janela nativa nova não tem máscara
+            self._mask_key = None
+            self.update_lock_icon()
+            if visible or first_time:
+                self.show()
+
+        if self.shape_selected != self._applied_shape:
+            # Trocar a folha de estilo força o Qt a reprocessá-la em todos os filhos
+            self.setStyleSheet(_shape_stylesheet(self.shape_selected))
+            self._applied_shape = self.shape_selected
+        # Barra e máscara (nada acontece se formato e tamanho não mudaram)
         self._adjust_toolbar_position()
-        self.show()
-
-    def set_circular_style(self):
-        self.setStyleSheet(
-            "QWidget#Form {"
-            "    background-color: rgba(255, 255, 255, 0);"
-            "    border: 5px solid grey;"
-            "    border-radius: 250px;"
-            "}"
-            "QFrame#mainFrame {"
-            "    border: 5px solid grey;"
-            "    border-radius: 245px;"
-            "    background-color: rgba(255, 0, 0, 50);"
-            "}"
-            "QFrame#toolBarFrame {"
-            "    background-color: rgba(230, 230, 230, 180);"
-            "    border-radius: 0px;"
-            "}"
-        )
-        region = QRegion(self.rect(), QRegion.Ellipse)
-        self.setMask(region)
-
-    def set_square_style(self):
-        self.setStyleSheet(
-            "QWidget#Form {"
-            "    background-color: rgba(255, 255, 255, 0);"
-            "    border: 5px solid grey;"
-            "    border-radius: 0px;"
-            "}"
-            "QFrame#mainFrame {"
-            "    border: 5px solid grey;"
-            "    border-radius: 0px;"
-            "    background-color: rgba(255, 0, 0, 50);"
-            "}"
-            "QFrame#toolBarFrame {"
-            "    background-color: rgba(230, 230, 230, 180);"
-            "    border-radius: 0px;"
-            "}"
-        )
-        region = QRegion(self.rect(), QRegion.Rectangle)
-        self.setMask(region)
+
+        self.video_widget.set_flipped(self.is_flipped)
 
     def _adjust_toolbar_position(self):
         """
@@ -396,16 +880,21 @@ class SecondWindow(QtWidgets.QWidget):
             bar_x = (self.width() - bar_width) // 2
             bar_y = (self.height() - toolbar_height) // 2
             self.toolBarFrame.setGeometry(bar_x, bar_y, bar_width, toolbar_height)
-            region = QRegion(self.rect(), QRegion.Ellipse)
-            self.setMask(region)
         else:
             # Na base (rodapé)
             self.toolBarFrame.setGeometry(
                 0, self.height() - toolbar_height,
                 self.width(), toolbar_height
             )
-            region = QRegion(self.rect(), QRegion.Rectangle)
-            self.setMask(region)
+        self._apply_mask()
+
+    def _apply_mask(self):
+        """Aplica a máscara do formato atual só quando formato ou tamanho mudaram."""
+        key = (self.shape_selected, self.width(), self.height())
+        if key == self._mask_key:
+            return
+        self._mask_key = key
+        self.setMask(_shape_mask(*key))
 
     # --------------------------------------------------------
     # 7) Eventos de Mouse (Arraste, Resize)
@@ -429,15 +918,39 @@ class SecondWindow(QtWidgets.QWidget):
             new_h = self._initial_size.height() + delta.y()
             # Força w == h para manter forma
             side = max(new_w, new_h, self.minimumWidth(), self.minimumHeight())
-            self.resize(side, side)
+            self._request_resize(side)
         super().mouseMoveEvent(event)
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton:
             self._is_dragging = False
             self._is_resizing = False
+            # O tamanho final não espera o próximo quadro
+            self._apply_pending_resize()
         super().mouseReleaseEvent(event)
 
+    def _request_resize(self, side):
+        """Guarda o tamanho pedido; ele é aplicado no próximo quadro exibido (ou pelo timer)."""
+        self.resize_requests += 1
+        self._pending_side = side
+        if not self._resize_timer.isActive():
+            self._resize_timer.start()
+
+    def _apply_pending_resize(self):
+        side = self._pending_side
+        if side is None:
+            return
+        self._pending_side = None
+        self._resize_timer.stop()
+        if side == self.width() and side == self.height():
+            return
+        self.resizes_applied += 1
+        # Geometria, máscara e barra num passo só (o Resize chama _adjust_on_resize):
+        # sem pintura intermediária com a máscara velha
+        self.setUpdatesEnabled(False)
+        self.resize(side, side)
+        self.setUpdatesEnabled(True)
+
     # --------------------------------------------------------
     # 8) eventFilter (Resize da janela e Resize do botão)
     # --------------------------------------------------------
@@ -452,16 +965,17 @@ class SecondWindow(QtWidgets.QWidget):
                 return True
             elif event.type() == QtCore.QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
                 self._is_resizing = False
+                self._apply_pending_resize()
                 return True
         return super().eventFilter(obj, event)
 
     def _adjust_on_resize(self):
         """
-        Ajusta frames, label
+        Ajusta frames, vídeo
         Também reposiciona a barra conforme o formato atual.
         """
         self.mainFrame.setGeometry(0, 0, self.width(), self.height())
-        self.video_label.setGeometry(0, 0, self.mainFrame.width(), self.mainFrame.height())
+        self.video_widget.setGeometry(0, 0, self.mainFrame.width(), self.mainFrame.height())
 
         # Reposiciona a barra e a máscara
         self._adjust_toolbar_position()
@@ -478,25 +992,79 @@ class SecondWindow(QtWidgets.QWidget):
     # 10) Métodos de configuração externos
     # --------------------------------------------------------
     def set_filter(self, filter_name):
-        self.filter_selected = filter_name
+        self.set_filter_chain([filter_name] if filter_name else [])
+
+    def set_filter_chain(self, filter_chain):
+        self.filter_chain = list(filter_chain)
+        self._compile_filter_chain()
+
+    def set_sobel_quality(self, quality):
+        self.sobel_quality = quality
+        self._compile_filter_chain()
+
+    def set_noise_density(self, density):
+        self.salt_pepper.set_density(density)
+        self._sync_filter_pool()
+
+    def set_blur_radius(self, radius):
+        self.blur.set_radius(radius)
+        self._sync_filter_pool()
+
+    def set_capture_config(self, config):
+        config = normalize_capture_config(config)
+        if config == self.capture_config:
+            return
+        self.capture_config = config
+        # Formato/resolução só mudam reabrindo o dispositivo (para todas as janelas)
+        if self.webcam_active:
+            self.stop_webcam()
+            self.start_webcam()
+
+    def set_change_detection(self, enabled):
+        if enabled and self.filter_cache is None:
+            self.filter_cache = FilterCache()
+        elif not enabled:
+            self.filter_cache = None
+
+    def set_execution_mode(self, mode):
+        self.execution_mode = mode
+        if mode != 'processes':
+            self._stop_filter_pool()
+        if mode == 'threads':
+            if self.tiled_executor is None:
+                self.tiled_executor = TiledExecutor()
+        elif self.tiled_executor is not None:
+            self.tiled_executor.close()
+            self.tiled_executor = None
+
+    def set_processing_mode(self, mode):
+        self.processing_mode = mode
 
     def set_shape(self, shape):
-        self.shape_selected = shape
-        self.apply_shape()
+        self.set_window_state(shape=shape)
 
     def set_lock(self, locked):
-        self.window_locked = locked
-        self.apply_lock()
+        self.set_window_state(locked=locked)
 
     def set_flip(self, flipped):
-        self.is_flipped = flipped
+        self.set_window_state(flipped=flipped)
+
+    def changeEvent(self, event):
+        # A MainWindow aplica os menus na última janela ativada
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            self.activated.emit(self)
+        super().changeEvent(event)
 
     # --------------------------------------------------------
     # 11) Fechamento da Janela
     # --------------------------------------------------------
     def closeEvent(self, event):
-        if self.cap and self.cap.isOpened():
-            self.cap.release()
+        self.stop_webcam()
+        self.set_execution_mode('inline')
+        self.stop_recording()
+        self.set_replay_seconds(0)
+        self.set_stream_config(None)
+        self.closed.emit(self)
         super().closeEvent(event)
 
 
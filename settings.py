@@ -6,4 +6,9 @@ def save_mcam(config_data, filepath):
 
 def load_mcam(filepath):
     with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        config_data = json.load(f)
+    # Arquivos antigos têm apenas um filtro em filter_selected
+    if "filter_chain" not in config_data:
+        filter_selected = config_data.get("filter_selected")
+        config_data["filter_chain"] = [filter_selected] if filter_selected else []
+    return config_data
@@ -0,0 +1,126 @@
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from batch import _concat_segments, _plan_riffs
+
+
+def _write_segments(tmp_path, frames, per_segment):
+    """Segmentos como os dos workers: JPEGs em sequência e o tamanho de cada um."""
+    segments = []
+    for start in range(0, len(frames), per_segment):
+        path = tmp_path / f"{start:04d}.mjpeg"
+        sizes = []
+        with open(path, 'wb') as segment:
+            for frame in frames[start:start + per_segment]:
+                data = cv2.imencode('.jpg', frame)[1].tobytes()
+                segment.write(data)
+                sizes.append(len(data))
+        segments.append((str(path), sizes, (frames[0].shape[1], frames[0].shape[0])))
+    return segments
+
+
+def _chunks(data, start, end):
+    """{fourcc: [(posição, dados)]} dos chunks entre `start` e `end`; listas entram pelo tipo."""
+    found = {}
+    pos = start
+    while pos < end:
+        fourcc, size = struct.unpack_from('<4sI', data, pos)
+        body = data[pos + 8:pos + 8 + size]
+        if fourcc in (b'RIFF', b'LIST'):
+            fourcc = body[:4]
+        found.setdefault(fourcc, []).append((pos, body))
+        pos += 8 + size + size % 2
+    return found
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (48, 64, 3), np.uint8) for _ in range(12)]
+
+
+def test_joined_avi_headers_and_index(tmp_path, frames):
+    segments = _write_segments(tmp_path, frames, per_segment=5)
+    jpegs = b''.join(open(path, 'rb').read() for path, _, _ in segments)
+    sizes = [n for _, segment_sizes, _ in segments for n in segment_sizes]
+    dst = str(tmp_path / "out.avi")
+
+    assert _concat_segments(segments, dst, 25.0) == 12
+    data = open(dst, 'rb').read()
+
+    riffs = _chunks(data, 0, len(data))
+    assert list(riffs) == [b'AVI ']
+    assert struct.unpack_from('<I', data, 4)[0] == len(data) - 8
+
+    top = _chunks(data, 12, len(data))
+    hdrl = top[b'hdrl'][0][1]
+    avih = _chunks(hdrl, 4, len(hdrl))[b'avih'][0][1]
+    assert struct.unpack_from('<I', avih, 16)[0] == 12                 # dwTotalFrames
+    assert struct.unpack_from('<II', avih, 32) == (64, 48)
+
+    # idx1: deslocamentos relativos ao 'movi', apontando para cada '00dc'
+    movi_pos = top[b'movi'][0][0] + 8
+    idx1 = top[b'idx1'][0][1]
+    entries = [struct.unpack_from('<4sIII', idx1, i) for i in range(0, len(idx1), 16)]
+    assert [length for _, _, _, length in entries] == sizes
+    offset = 0
+    for (fourcc, flags, chunk_offset, length), size in zip(entries, sizes):
+        assert (fourcc, flags) == (b'00dc', 0x10)
+        pos = movi_pos + chunk_offset
+        assert data[pos:pos + 4] == b'00dc'
+        assert data[pos + 8:pos + 8 + length] == jpegs[offset:offset + size]
+        offset += size
+
+    cap = cv2.VideoCapture(dst)
+    assert cap.get(cv2.CAP_PROP_FPS) == pytest.approx(25.0)
+    read = 0
+    while cap.read()[0]:
+        read += 1
+    assert read == 12
+
+
+def test_large_output_is_split_in_opendml_riffs(tmp_path, frames):
+    segments = _write_segments(tmp_path, frames, per_segment=4)
+    sizes = [n for _, segment_sizes, _ in segments for n in segment_sizes]
+    dst = str(tmp_path / "out.avi")
+    # Limite pequeno para forçar várias partes com poucos quadros
+    riff_max = 8 * 1024 + 3 * (max(sizes) + 8)
+    plan = _plan_riffs(sizes, riff_max)
+    assert len(plan) > 1 and sum(plan) == 12
+
+    assert _concat_segments(segments, dst, 25.0, riff_max_bytes=riff_max) == 12
+    data = open(dst, 'rb').read()
+    riffs = _chunks(data, 0, len(data))
+    assert len(riffs[b'AVI ']) == 1 and len(riffs[b'AVIX']) == len(plan) - 1
+    for pos, body in riffs[b'AVI '] + riffs[b'AVIX']:
+        assert 8 + len(body) <= riff_max
+
+    # indx (índice de índices) -> ix00 de cada RIFF -> dados de cada quadro
+    hdrl = _chunks(data, 12, len(data))[b'hdrl'][0][1]
+    strl = _chunks(hdrl, 4, len(hdrl))[b'strl'][0][1]
+    indx = _chunks(strl, 4, len(strl))[b'indx'][0][1]
+    used = struct.unpack_from('<I', indx, 4)[0]
+    assert used == len(plan)
+    counted = []
+    for i in range(used):
+        ix_pos, ix_size, duration = struct.unpack_from('<QII', indx, 24 + 16 * i)
+        assert data[ix_pos:ix_pos + 4] == b'ix00'
+        _, _, _, entries, _, base = struct.unpack_from('<HBBI4sQ', data, ix_pos + 8)
+        assert entries == duration == plan[i]
+        for n in range(entries):
+            offset, length = struct.unpack_from('<II', data, ix_pos + 32 + 8 * n)
+            assert data[base + offset - 8:base + offset - 4] == b'00dc'
+            counted.append(length)
+    assert counted == sizes
+
+    odml = _chunks(hdrl, 4, len(hdrl))[b'odml'][0][1]
+    assert struct.unpack_from('<I', odml, 12)[0] == 12                 # dmlh: total de quadros
+
+    cap = cv2.VideoCapture(dst)
+    read = 0
+    while cap.read()[0]:
+        read += 1
+    assert read == 12
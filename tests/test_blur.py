@@ -0,0 +1,72 @@
+import cv2
+import numpy as np
+import pytest
+
+from blur import BlurEngine, DOWNSCALE_TARGET_RADIUS, box_sizes, gaussian_sigma
+
+
+def _frame(width=320, height=240):
+    # Gradiente suave com um retângulo: bordas fortes sem ser ruído puro
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    frame = np.repeat(((x + y) * 0.5)[..., None], 3, axis=2)
+    frame[height // 4:height // 2, width // 4:width // 2] = 200
+    return frame.astype(np.uint8)
+
+
+@pytest.mark.parametrize("radius, route", [(1, 'exact'), (11, 'exact'), (12, 'downscale'), (63, 'downscale')])
+def test_auto_route_switches_at_radius_12(radius, route):
+    assert 2 * DOWNSCALE_TARGET_RADIUS == 12
+    assert BlurEngine(radius).route() == route
+
+
+@pytest.mark.parametrize("mode", ['exact', 'box', 'downscale'])
+def test_explicit_mode_overrides_auto(mode):
+    assert BlurEngine(31, mode).route() == mode
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        BlurEngine(7, 'fastest')
+    with pytest.raises(ValueError):
+        BlurEngine(7).set_mode('fastest')
+
+
+def test_radius_zero_returns_frame():
+    frame = _frame()
+    assert BlurEngine(0).apply(frame) is frame
+
+
+def test_exact_route_matches_opencv():
+    frame = _frame()
+    np.testing.assert_array_equal(BlurEngine(7).apply(frame), cv2.GaussianBlur(frame, (15, 15), 0))
+
+
+@pytest.mark.parametrize("sigma", [5.0, 9.5, 20.0])
+def test_box_sizes_match_gaussian_variance(sigma):
+    sizes = box_sizes(sigma)
+    assert all(size % 2 == 1 for size in sizes)
+    # Variância de uma caixa de largura n: (n² - 1) / 12; larguras ímpares
+    # deixam um resto que pesa menos quanto maior o sigma
+    variance = sum((n * n - 1) / 12.0 for n in sizes)
+    assert variance == pytest.approx(sigma * sigma, rel=0.1)
+
+
+def test_measure_error_of_exact_route_is_zero():
+    error = BlurEngine(7).measure_error(_frame(), 'exact')
+    assert error == {"route": 'exact', "mae": 0.0, "max": 0.0, "psnr": float('inf')}
+
+
+@pytest.mark.parametrize("radius", [15, 31])
+@pytest.mark.parametrize("route", ['box', 'downscale'])
+def test_measure_error_of_approximate_routes(radius, route):
+    error = BlurEngine(radius).measure_error(_frame(), route)
+    assert error["route"] == route
+    assert 0.0 < error["mae"] < 1.0
+    assert error["max"] >= error["mae"]
+    assert error["psnr"] > 40.0
+
+
+def test_measure_error_defaults_to_current_route():
+    assert BlurEngine(31).measure_error(_frame())["route"] == 'downscale'
+    assert gaussian_sigma(15) == pytest.approx(2.6)
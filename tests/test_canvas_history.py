@@ -0,0 +1,120 @@
+from PyQt5.QtCore import QRect, Qt
+from PyQt5.QtGui import QColor, QImage, QPainter
+
+from canvas_history import CanvasHistory
+
+TILE = 32
+
+
+def _canvas(width=100, height=70, color=Qt.white):
+    image = QImage(width, height, QImage.Format_ARGB32)
+    image.fill(QColor(color))
+    return image
+
+
+def _stroke(history, image, rect, color=Qt.red):
+    history.begin_stroke()
+    history.touch(image, rect)
+    painter = QPainter(image)
+    painter.fillRect(rect, QColor(color))
+    painter.end()
+    history.end_stroke()
+
+
+def test_undo_restores_stroke_pixels_and_redo_reapplies():
+    image = _canvas()
+    before = image.copy()
+    history = CanvasHistory(tile_size=TILE)
+    _stroke(history, image, QRect(20, 10, 50, 30))
+    after = image.copy()
+    assert image != before
+
+    image = history.undo(image)
+    assert image == before
+    assert history.can_redo() and not history.can_undo()
+
+    image = history.redo(image)
+    assert image == after
+    assert history.can_undo() and not history.can_redo()
+
+
+def test_stroke_copies_only_touched_tiles():
+    image = _canvas()
+    history = CanvasHistory(tile_size=TILE)
+    # (20..69, 10..39) toca as colunas 0-2 e as linhas 0-1 de blocos de 32 px
+    _stroke(history, image, QRect(20, 10, 50, 30))
+    assert len(history._undo[0].tiles) == 6
+    assert history.nbytes < image.bytesPerLine() * image.height()
+
+
+def test_touching_a_tile_twice_keeps_first_copy():
+    image = _canvas()
+    before = image.copy()
+    history = CanvasHistory(tile_size=TILE)
+    history.begin_stroke()
+    for x in range(0, 30, 5):
+        rect = QRect(x, 0, 4, 4)
+        history.touch(image, rect)
+        painter = QPainter(image)
+        painter.fillRect(rect, QColor(Qt.blue))
+        painter.end()
+    history.end_stroke()
+    assert len(history._undo[0].tiles) == 1
+    assert history.undo(image) == before
+
+
+def test_empty_stroke_is_not_recorded():
+    image = _canvas()
+    history = CanvasHistory(tile_size=TILE)
+    history.begin_stroke()
+    history.touch(image, QRect(500, 500, 10, 10))
+    history.end_stroke()
+    assert not history.can_undo()
+
+
+def test_replace_and_undo_swap_whole_image():
+    old = _canvas(color=Qt.white)
+    new = _canvas(200, 150, color=Qt.black)
+    history = CanvasHistory(tile_size=TILE)
+    history.replace(old)
+
+    assert history.undo(new) is old
+    assert history.redo(old) is new
+
+
+def test_new_edit_clears_redo():
+    image = _canvas()
+    history = CanvasHistory(tile_size=TILE)
+    _stroke(history, image, QRect(0, 0, 10, 10))
+    image = history.undo(image)
+    assert history.can_redo()
+    _stroke(history, image, QRect(40, 40, 10, 10), Qt.green)
+    assert not history.can_redo()
+    assert history.stats()["undo"] == 1
+
+
+def test_oldest_history_is_evicted_over_the_limit():
+    image = _canvas()
+    tile_bytes = TILE * TILE * 4
+    history = CanvasHistory(max_bytes=2 * tile_bytes, tile_size=TILE)
+    for i in range(3):
+        _stroke(history, image, QRect(i * TILE, 0, 4, 4))
+    assert history.evicted == 1
+    assert history.stats()["undo"] == 2
+    assert history.nbytes <= history.max_bytes
+
+    history.set_max_bytes(tile_bytes // 2)
+    assert history.evicted == 3
+    assert not history.can_undo()
+    assert history.undo(image) is image
+
+
+def test_undo_after_eviction_keeps_recent_edits():
+    image = _canvas()
+    tile_bytes = TILE * TILE * 4
+    history = CanvasHistory(max_bytes=tile_bytes, tile_size=TILE)
+    _stroke(history, image, QRect(0, 0, 4, 4), Qt.red)
+    middle = image.copy()
+    _stroke(history, image, QRect(64, 0, 4, 4), Qt.blue)
+    assert history.evicted == 1
+    assert history.undo(image) == middle
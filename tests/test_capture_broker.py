@@ -0,0 +1,113 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import capture_broker
+from capture_broker import CaptureBroker
+
+
+class FakeCapture:
+    """Câmera falsa: ~200 quadros/s do tamanho pedido na configuração."""
+
+    def __init__(self, config, opened=True):
+        self.config = config
+        self.opened = opened
+        width, height = config["width"] or 64, config["height"] or 48
+        self.frame = np.zeros((height, width, 3), np.uint8)
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self):
+        time.sleep(0.005)
+        return True, self.frame.copy()
+
+    def release(self):
+        self.opened = False
+
+
+class CountingSink:
+    def __init__(self):
+        self.frames = 0
+        self.sizes = set()
+
+    def deliver(self, shared, timestamp, read_time):
+        self.frames += 1
+        self.sizes.add(shared.frame.shape[:2])
+
+    def wait_frames(self, count, timeout=2.0):
+        deadline = time.perf_counter() + timeout
+        start = self.frames
+        while self.frames - start < count and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        return self.frames - start >= count
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    failing = set()
+
+    def open_camera(config):
+        return FakeCapture(config, opened=(config["width"], config["height"]) not in failing)
+
+    monkeypatch.setattr(capture_broker, 'open_camera', open_camera)
+    monkeypatch.setattr(capture_broker, 'negotiated_mode', lambda cap: {"width": cap.config["width"], "height": cap.config["height"]})
+    broker = CaptureBroker()
+    broker.failing = failing
+    return broker
+
+
+def test_failed_reopen_keeps_existing_subscription(broker):
+    first = CountingSink()
+    subscription = broker.subscribe({"device": 0, "width": 64, "height": 48}, first)
+    assert first.wait_frames(3)
+
+    broker.failing.add((1280, 720))
+    second = CountingSink()
+    assert broker.subscribe({"device": 0, "width": 1280, "height": 720}, second) is None
+
+    # A janela que já estava inscrita continua recebendo, na configuração anterior
+    assert first.wait_frames(5)
+    assert first.sizes == {(48, 64)}
+    assert second.frames == 0
+    assert subscription.mode == {"width": 64, "height": 48}
+    subscription.close()
+    assert broker.stats() == {}
+
+
+def test_reopen_moves_every_subscription_to_new_config(broker):
+    first, second = CountingSink(), CountingSink()
+    subscriptions = [broker.subscribe({"device": 0, "width": 64, "height": 48}, first)]
+    subscriptions.append(broker.subscribe({"device": 0, "width": 32, "height": 24}, second))
+    assert second.wait_frames(3)
+    first.sizes.clear()
+    assert first.wait_frames(3)
+    assert first.sizes == {(24, 32)}
+    for subscription in subscriptions:
+        subscription.close()
+    assert broker.stats() == {}
+
+
+def test_slow_open_does_not_block_stats(broker, monkeypatch):
+    sink = CountingSink()
+    subscription = broker.subscribe({"device": 0, "width": 64, "height": 48}, sink)
+    release = threading.Event()
+    fast_open = capture_broker.open_camera
+
+    def slow_open(config):
+        release.wait(2.0)
+        return fast_open(config)
+
+    monkeypatch.setattr(capture_broker, 'open_camera', slow_open)
+    opener = threading.Thread(target=broker.subscribe, args=({"device": 1}, CountingSink()))
+    opener.start()
+    time.sleep(0.05)
+    # Enquanto a câmera 1 abre, o broker continua respondendo
+    started = time.perf_counter()
+    assert list(broker.stats()) == [0]
+    assert time.perf_counter() - started < 0.5
+    release.set()
+    opener.join()
+    subscription.close()
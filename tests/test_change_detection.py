@@ -0,0 +1,40 @@
+import numpy as np
+
+from change_detection import FilterCache
+from filter_chain import FilterChain
+
+
+def _masked_filter(chain, shape):
+    """Como SecondWindow._filter_frame: no formato 'circle' os cantos ficam pretos."""
+    def filter_fn(frame):
+        output = chain(frame)
+        if shape == 'circle':
+            output = output.copy()
+            output[:40, :40] = 0
+        return output
+    return filter_fn
+
+
+def test_shape_change_discards_cached_output():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (240, 320, 3), np.uint8)
+    chain = FilterChain(['gray'])
+    cache = FilterCache()
+
+    circle = cache.apply(chain, frame, _masked_filter(chain, 'circle'), ('circle', 'display'))
+    assert not circle[:40, :40].any()
+
+    # Cena parada: a troca circle -> square não pode reaproveitar os cantos pretos
+    square = cache.apply(chain, frame, _masked_filter(chain, 'square'), ('square', 'display'))
+    np.testing.assert_array_equal(square, chain(frame))
+    assert cache.misses == 2
+
+
+def test_static_scene_reuses_output():
+    frame = np.full((240, 320, 3), 128, np.uint8)
+    chain = FilterChain(['gray'])
+    cache = FilterCache()
+    first = cache.apply(chain, frame, chain, ('square', 'display'))
+    second = cache.apply(chain, frame.copy(), chain, ('square', 'display'))
+    assert second is first
+    assert cache.hits == 1
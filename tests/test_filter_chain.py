@@ -0,0 +1,82 @@
+from functools import reduce
+
+import numpy as np
+import pytest
+
+from benchmark import make_frame
+from blur import BlurEngine
+from filter_chain import FilterChain
+from filters import FILTERS, SOBEL_QUALITIES, apply_sobel
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return make_frame(320, 240, np.uint8)
+
+
+def _unfused(names, frame, blur):
+    """Aplica os filtros um a um, cada um convertendo de e para BGR por conta própria."""
+    def apply(img, name):
+        if name == 'gaussian':
+            return blur.apply(img)
+        return FILTERS[name](img)
+    return reduce(apply, names, frame)
+
+
+@pytest.mark.parametrize("names", [
+    ['gray'],
+    ['gray', 'gray'],
+    ['sobel'],
+    ['gray', 'sobel'],
+    ['sobel', 'gray'],
+    ['sobel', 'sobel'],
+    ['gray', 'sobel', 'gaussian'],
+    ['gaussian', 'gray', 'sobel'],
+    ['sobel', 'gaussian', 'gray'],
+])
+@pytest.mark.parametrize("radius", [7, 31])
+def test_fused_chain_matches_unfused_filters(frame, names, radius):
+    blur = BlurEngine(radius, 'auto')
+    chain = FilterChain(names, blur=blur)
+    np.testing.assert_array_equal(chain(frame.copy()), _unfused(names, frame.copy(), blur))
+
+
+@pytest.mark.parametrize("quality", SOBEL_QUALITIES)
+def test_fused_sobel_matches_filter_in_every_quality(frame, quality):
+    chain = FilterChain(['gray', 'sobel'], sobel_quality=quality)
+    np.testing.assert_array_equal(chain(frame.copy()), apply_sobel(frame.copy(), quality))
+
+
+@pytest.mark.parametrize("names", [
+    ['gray', 'sobel', 'gaussian'],
+    ['sobel', 'gray', 'sobel'],
+    ['gray', 'gaussian', 'gray'],
+])
+def test_color_conversions_run_once(names):
+    stages = [name for name, _ in FilterChain(names).stages]
+    assert stages.count('bgr2gray') == 1
+    assert stages.count('gray2bgr') == 1
+    assert stages[-1] == 'gray2bgr'
+
+
+def test_color_only_chain_has_no_conversions():
+    stages = [name for name, _ in FilterChain(['gaussian', 'salt_pepper']).stages]
+    assert stages == ['gaussian', 'salt_pepper']
+
+
+def test_chain_output_keeps_frame_shape(frame):
+    out = FilterChain(['gray', 'sobel'])(frame.copy())
+    assert out.shape == frame.shape and out.dtype == frame.dtype
+
+
+def test_unknown_filter_is_rejected():
+    with pytest.raises(ValueError):
+        FilterChain(['gray', 'emboss'])
+
+
+def test_halo_follows_blur_radius():
+    blur = BlurEngine(7, 'exact')
+    chain = FilterChain(['sobel', 'gaussian'], blur=blur)
+    assert chain.halo() == 1 + blur.halo()
+    blur.set_radius(11)
+    assert chain.halo() == 1 + blur.halo()
@@ -0,0 +1,59 @@
+import threading
+import time
+from urllib.request import urlopen
+
+import numpy as np
+
+from mjpeg_server import BOUNDARY, MjpegServer
+
+CLIENTS = 4
+
+
+def _read_parts(url, parts, counts, index):
+    marker = f"--{BOUNDARY}".encode('ascii')
+    data = b""
+    with urlopen(url, timeout=5) as response:
+        while counts[index] < parts:
+            chunk = response.read1(65536)
+            if not chunk:
+                break
+            data += chunk
+            # Só partes seguidas de outra marca: o servidor já as contou em `sent`
+            counts[index] = max(0, data.count(marker) - 1)
+
+
+def test_counters_add_up_across_client_threads():
+    server = MjpegServer({"host": "127.0.0.1", "port": 0, "max_fps": 0})
+    server.start()
+    try:
+        port = server._httpd.server_address[1]
+        counts = [0] * CLIENTS
+        readers = [
+            threading.Thread(target=_read_parts, args=(f"http://127.0.0.1:{port}/stream.mjpg", 20, counts, i))
+            for i in range(CLIENTS)
+        ]
+        for reader in readers:
+            reader.start()
+        deadline = time.perf_counter() + 10.0
+        while server.stats()["clients"] < CLIENTS and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+        published = 0
+        while any(reader.is_alive() for reader in readers) and time.perf_counter() < deadline:
+            server.publish(np.full((48, 64, 3), published % 256, np.uint8))
+            published += 1
+            time.sleep(0.005)
+        for reader in readers:
+            reader.join(1.0)
+    finally:
+        server.stop()
+    # Os handlers contam o envio antes de sair; espera todos saírem
+    deadline = time.perf_counter() + 5.0
+    while server.stats()["clients"] and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+    stats = server.stats()
+    assert min(counts) >= 20
+    # Partes enviadas depois que o cliente parou de ler só somam a mais
+    assert stats["sent"] >= sum(counts)
+    assert stats["clients"] == 0
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from noise import SaltPepperNoise
+
+
+def _frames(count, shape=(120, 160, 3)):
+    return [np.full(shape, 128, np.uint8) for _ in range(count)]
+
+
+def test_same_seed_gives_same_sequence():
+    first, second = SaltPepperNoise(0.01, seed=3), SaltPepperNoise(0.01, seed=3)
+    for a, b in zip(_frames(20), _frames(20)):
+        np.testing.assert_array_equal(first.apply(a), second.apply(b))
+
+
+def test_different_seeds_differ():
+    a = SaltPepperNoise(0.01, seed=1).apply(_frames(1)[0])
+    b = SaltPepperNoise(0.01, seed=2).apply(_frames(1)[0])
+    assert not np.array_equal(a, b)
+
+
+@pytest.mark.parametrize("density", [0.001, 0.01, 0.05])
+def test_density_and_salt_pepper_balance(density):
+    noise = SaltPepperNoise(density, seed=0)
+    frame = noise.apply(_frames(1)[0])
+    pixels = frame.shape[0] * frame.shape[1]
+    salt = np.count_nonzero((frame == 255).all(axis=2))
+    pepper = np.count_nonzero((frame == 0).all(axis=2))
+    expected = int(np.ceil(density * pixels))
+    # Índices sorteados com reposição: colisões só podem diminuir a contagem
+    assert 0.9 * expected <= salt + pepper <= expected
+    assert abs(salt - pepper) <= 0.2 * expected + 1
+    # Nenhum pixel fica com canais misturados
+    assert np.count_nonzero(frame != 128) == 3 * (salt + pepper)
+
+
+def test_read_only_frame_is_copied():
+    frame = _frames(1)[0]
+    frame.setflags(write=False)
+    out = SaltPepperNoise(0.05, seed=0).apply(frame)
+    assert out is not frame
+    assert (frame == 128).all()
+    assert not (out == 128).all()
+
+
+def test_density_change_rebuilds_pool():
+    noise = SaltPepperNoise(0.001, seed=0)
+    low = np.count_nonzero(noise.apply(_frames(1)[0]) != 128)
+    noise.set_density(0.05)
+    high = np.count_nonzero(noise.apply(_frames(1)[0]) != 128)
+    assert high > 10 * low
@@ -0,0 +1,78 @@
+import threading
+
+import numpy as np
+import pytest
+
+from filter_chain import FilterChain
+from blur import BlurEngine
+from process_pool import SharedMemoryFilterPool
+
+
+class Results:
+    """Coleta as chamadas de on_result (feitas pela thread coletora do pool)."""
+
+    def __init__(self):
+        self.items = []
+        self.pending_at_first = None
+        self.pool = None
+        self._done = threading.Condition()
+
+    def __call__(self, frame, tag):
+        with self._done:
+            if self.pending_at_first is None:
+                # Quantos quadros posteriores já tinham terminado antes do primeiro
+                self.pending_at_first = len(self.pool._pending)
+            self.items.append((tag, frame))
+            self._done.notify_all()
+
+    def wait(self, count, timeout=30.0):
+        with self._done:
+            return self._done.wait_for(lambda: len(self.items) >= count, timeout)
+
+
+@pytest.fixture
+def pool():
+    results = Results()
+    pool = SharedMemoryFilterPool(on_result=results, workers=2)
+    results.pool = pool
+    pool.results = results
+    yield pool
+    pool.close()
+
+
+def test_results_are_delivered_in_submit_order(pool):
+    rng = np.random.default_rng(0)
+    # O primeiro quadro é bem mais lento: o outro worker termina os seguintes antes
+    slow = rng.integers(0, 255, (1200, 1200, 3), np.uint8)
+    fast = [rng.integers(0, 255, (24, 32, 3), np.uint8) for _ in range(3)]
+    pool.configure(['gaussian'], 'exact', 63, 0.0)
+    pool.reserve(slow.nbytes)
+
+    for tag, frame in enumerate([slow] + fast):
+        assert pool.submit(frame, tag)
+    assert pool.results.wait(4)
+
+    assert [tag for tag, _ in pool.results.items] == [0, 1, 2, 3]
+    assert pool.results.pending_at_first > 0
+    chain = FilterChain(['gaussian'], blur=BlurEngine(63))
+    for (_, output), frame in zip(pool.results.items, [slow] + fast):
+        np.testing.assert_array_equal(output, chain(frame))
+
+
+def test_growing_the_ring_answers_every_submitted_frame(pool):
+    rng = np.random.default_rng(1)
+    small = rng.integers(0, 255, (48, 64, 3), np.uint8)
+    pool.configure(['gaussian'], 'exact', 63, 0.0)
+    for tag in range(3):
+        assert pool.submit(small, tag)
+
+    # Quadro maior que os slots: o anel é recriado com quadros ainda em andamento
+    large = rng.integers(0, 255, (480, 640, 3), np.uint8)
+    assert pool.submit(large, 3)
+    assert pool.results.wait(4)
+
+    tags = [tag for tag, _ in pool.results.items]
+    assert tags == [0, 1, 2, 3]
+    assert pool.results.items[-1][1] is not None
+    delivered = sum(frame is not None for _, frame in pool.results.items)
+    assert delivered + pool.discarded == 4
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from benchmark import make_frame
+from blur import BlurEngine
+from filter_chain import FilterChain
+from filters import SOBEL_QUALITIES
+from tiling import TiledExecutor, strip_bounds
+
+
+@pytest.fixture
+def executor():
+    executor = TiledExecutor(threads=4)
+    yield executor
+    executor.close()
+
+
+@pytest.mark.parametrize("quality", SOBEL_QUALITIES)
+@pytest.mark.parametrize("names", [['sobel'], ['gray', 'sobel'], ['sobel', 'gaussian']])
+def test_strips_match_inline_chain(executor, names, quality):
+    frame = make_frame(640, 480, np.uint8)
+    chain = FilterChain(names, sobel_quality=quality)
+    np.testing.assert_array_equal(executor.run(chain, frame.copy()), chain(frame.copy()))
+
+
+@pytest.mark.parametrize("height, num_strips", [(480, 4), (481, 3), (100, 7), (5, 8), (1, 1)])
+def test_strip_bounds_cover_every_row_once(height, num_strips):
+    bounds = strip_bounds(height, num_strips)
+    assert bounds[0][0] == 0 and bounds[-1][1] == height
+    assert all(y1 > y0 for y0, y1 in bounds)
+    assert all(prev[1] == cur[0] for prev, cur in zip(bounds, bounds[1:]))
+    assert len(bounds) <= num_strips
+
+
+@pytest.mark.parametrize("radius", [1, 5, 11, 24])
+@pytest.mark.parametrize("names", [['gaussian'], ['sobel', 'gaussian'], ['gaussian', 'gray', 'sobel']])
+def test_exact_blur_halo_with_many_strips(names, radius):
+    # Faixas finas (min_rows pequeno) deixam o halo maior que o miolo de cada faixa
+    executor = TiledExecutor(threads=8, min_rows=4)
+    try:
+        frame = make_frame(320, 240, np.uint8)
+        chain = FilterChain(names, blur=BlurEngine(radius, 'exact'))
+        assert chain.stage_halo('gaussian') == radius
+        np.testing.assert_array_equal(executor.run(chain, frame.copy()), chain(frame.copy()))
+    finally:
+        executor.close()
+
+
+def test_downscale_blur_runs_on_whole_frame(executor):
+    frame = make_frame(640, 480, np.uint8)
+    chain = FilterChain(['sobel', 'gaussian', 'gray'], blur=BlurEngine(31, 'auto'))
+    assert [halo for _, halo in executor.segments(chain)] == [1, None, 0]
+    np.testing.assert_array_equal(executor.run(chain, frame.copy()), chain(frame.copy()))
+
+
+def test_strips_are_at_least_twice_the_halo():
+    executor = TiledExecutor(threads=8, min_rows=4)
+    try:
+        assert executor.num_strips(240, 0) == 8
+        assert executor.num_strips(240, 24) == 240 // 48
+        assert executor.num_strips(40, 30) == 1
+    finally:
+        executor.close()
@@ -0,0 +1,114 @@
+"""
+Execução da cadeia de filtros em faixas horizontais numa pool de threads.
+
+cv2.GaussianBlur, cv2.Sobel e companhia liberam o GIL, então faixas do mesmo
+quadro podem ser filtradas ao mesmo tempo. Cada faixa é recortada com as linhas
+extras (halo) que os kernels precisam e só o miolo é escrito na saída, que é
+alocada uma vez por quadro: o resultado é idêntico ao da execução em uma thread.
+
+Etapas que precisam do quadro inteiro (ver FilterChain.stage_halo) rodam
+sem divisão, entre os trechos divididos em faixas.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Faixas menores que isso gastam mais com overhead do que ganham em paralelismo
+MIN_STRIP_ROWS = 32
+
+
+def strip_bounds(height, num_strips):
+    """Limites (y0, y1) de `num_strips` faixas que cobrem `height` linhas."""
+    edges = np.linspace(0, height, num_strips + 1).round().astype(int)
+    return [(int(y0), int(y1)) for y0, y1 in zip(edges[:-1], edges[1:]) if y1 > y0]
+
+
+class TiledExecutor:
+    """
+    Aplica uma FilterChain dividindo o quadro em faixas horizontais.
+
+        executor = TiledExecutor(threads=4)
+        frame = executor.run(chain, frame)
+        ...
+        executor.close()
+    """
+
+    def __init__(self, threads=None, min_rows=MIN_STRIP_ROWS):
+        self.threads = max(1, threads or os.cpu_count() or 1)
+        self.min_rows = min_rows
+        self._pool = None
+        if self.threads > 1:
+            self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="FilterStrip")
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def segments(self, chain):
+        """
+        Agrupa as etapas da cadeia em trechos [(etapas, halo)]. Etapas seguidas
+        que aceitam faixas formam um trecho só, com a soma dos halos;
+        halo None marca uma etapa que roda no quadro inteiro.
+        """
+        segments = []
+        stages, halo = [], 0
+        for name, fn in chain.stages:
+            stage_halo = chain.stage_halo(name)
+            if stage_halo is None:
+                if stages:
+                    segments.append((stages, halo))
+                    stages, halo = [], 0
+                segments.append(([fn], None))
+            else:
+                stages.append(fn)
+                halo += stage_halo
+        if stages:
+            segments.append((stages, halo))
+        return segments
+
+    def num_strips(self, height, halo):
+        """Faixas usadas para um quadro: cada uma com pelo menos `min_rows` e 2x o halo."""
+        rows = max(self.min_rows, 2 * halo)
+        return max(1, min(self.threads, height // rows))
+
+    def run(self, chain, frame):
+        for stages, halo in self.segments(chain):
+            if halo is None or self._pool is None:
+                frame = _run_stages(stages, frame)
+            else:
+                frame = self._run_strips(stages, halo, frame)
+        return frame
+
+    def _run_strips(self, stages, halo, frame):
+        height = frame.shape[0]
+        bounds = strip_bounds(height, self.num_strips(height, halo))
+        if len(bounds) < 2:
+            return _run_stages(stages, frame)
+
+        # A saída é criada pela primeira faixa que termina (formato e tipo só
+        # são conhecidos depois das etapas) e as demais escrevem direto nela
+        lock = threading.Lock()
+        output = []
+
+        def process(y0, y1):
+            ty0, ty1 = max(0, y0 - halo), min(height, y1 + halo)
+            result = _run_stages(stages, frame[ty0:ty1])
+            with lock:
+                if not output:
+                    output.append(np.empty((height,) + result.shape[1:], result.dtype))
+            output[0][y0:y1] = result[y0 - ty0:y1 - ty0]
+
+        futures = [self._pool.submit(process, y0, y1) for y0, y1 in bounds]
+        for future in futures:
+            # Propaga exceções das faixas
+            future.result()
+        return output[0]
+
+
+def _run_stages(stages, frame):
+    for stage in stages:
+        frame = stage(frame)
+    return frame
@@ -0,0 +1,114 @@
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QPainter, QTransform, QColor, QFont
+
+from display import wrap_frame
+
+
+class VideoWidget(QtWidgets.QWidget):
+    """
+    Widget dedicado ao vídeo (substitui QLabel + setPixmap).
+
+    - Desenha o último quadro no paintEvent, direto do array BGR (sem QPixmap).
+    - O retângulo de destino e a transformação do flip são calculados só no
+      resize / troca de flip, não a cada quadro.
+    - O flip horizontal é uma transformação do QPainter: nenhum pixel é copiado.
+    - Só pede repaint quando chega um quadro novo (ou o flip muda).
+    - Opcionalmente desenha um overlay de texto (ex.: tempos por etapa).
+    - Enquanto não há quadro, mostra um texto de espera (ex.: "Abrindo a câmera...").
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._image = None
+        # Mantém vivo o array que a QImage referencia
+        self._frame = None
+        self._target = QRect()
+        self._flipped = False
+        self._flip_transform = QTransform()
+        self._overlay_lines = []
+        self._placeholder = None
+        # StageTimer opcional (mede a conversão e a pintura)
+        self.stage_timer = None
+        self.frames = 0
+        self.bytes_copied = 0
+        self.last_bytes_copied = 0
+
+    def set_frame(self, frame):
+        t0 = self.stage_timer.start() if self.stage_timer is not None else 0.0
+        self._image, self._frame, copied = wrap_frame(frame)
+        if t0:
+            self.stage_timer.stop('convert', t0)
+        self.frames += 1
+        self.last_bytes_copied = copied
+        self.bytes_copied += copied
+        self.update()
+
+    def set_flipped(self, flipped):
+        if flipped != self._flipped:
+            self._flipped = flipped
+            self.update()
+
+    def is_flipped(self):
+        return self._flipped
+
+    def set_placeholder(self, text):
+        """Texto exibido enquanto nenhum quadro chegou (None remove)."""
+        self._placeholder = text
+        self.update()
+
+    def set_overlay(self, lines):
+        self._overlay_lines = list(lines)
+        self.update()
+
+    def resizeEvent(self, event):
+        self._target = self.rect()
+        # Espelha em torno do centro do widget: x' = largura - x
+        self._flip_transform = QTransform(-1, 0, 0, 1, self.width(), 0)
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self._image is None and not self._overlay_lines and not self._placeholder:
+            return
+        t0 = self.stage_timer.start() if self.stage_timer is not None else 0.0
+        painter = QPainter(self)
+        if self._image is None and self._placeholder:
+            painter.fillRect(self.rect(), Qt.black)
+            painter.setPen(Qt.white)
+            painter.drawText(self.rect(), Qt.AlignCenter, self._placeholder)
+        if self._image is not None:
+            if self._image.width() != self._target.width() or self._image.height() != self._target.height():
+                painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            if self._flipped:
+                painter.setTransform(self._flip_transform)
+            painter.drawImage(self._target, self._image)
+        if self._overlay_lines:
+            self._paint_overlay(painter)
+        painter.end()
+        if t0:
+            self.stage_timer.stop('paint', t0)
+
+    def _paint_overlay(self, painter):
+        # O texto nunca é espelhado e fica centralizado (visível também no formato circular)
+        painter.resetTransform()
+        painter.setFont(QFont("Monospace", 9))
+        line_height = painter.fontMetrics().height()
+        box_height = line_height * len(self._overlay_lines) + 8
+        box_width = max(painter.fontMetrics().width(line) for line in self._overlay_lines) + 12
+        box = QRect(
+            (self.width() - box_width) // 2,
+            max(0, self.height() // 4 - box_height // 2),
+            box_width,
+            box_height
+        )
+        painter.fillRect(box, QColor(0, 0, 0, 160))
+        painter.setPen(Qt.white)
+        for i, line in enumerate(self._overlay_lines):
+            painter.drawText(box.x() + 6, box.y() + 4 + line_height * (i + 1) - painter.fontMetrics().descent(), line)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "bytes_copied_last": self.last_bytes_copied,
+            "bytes_copied_per_frame": self.bytes_copied / self.frames if self.frames else 0.0,
+        }
@@ -0,0 +1,94 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# Modos de processamento da SecondWindow:
+#   'display' -> reduz o quadro ao tamanho real (em pixels) do vídeo antes de filtrar
+#   'full'    -> filtra na resolução da câmera (ex.: para gravação)
+PROCESSING_MODES = ('display', 'full')
+
+# Quantidades de faixas horizontais testadas para cobrir a elipse visível
+ELLIPSE_BAND_COUNTS = (2, 3, 4, 6, 8, 12)
+# Só vale a pena recortar se a área filtrada (com bordas) cair abaixo desta fração
+MAX_REGION_AREA_RATIO = 0.9
+
+
+def fit_to_display(frame, width, height):
+    """
+    Reduz o quadro para o tamanho de exibição (sem manter proporção, assim como
+    o setScaledContents do QLabel). Nunca amplia: ampliar antes de filtrar só
+    aumentaria o custo, e o Qt amplia na pintura.
+    """
+    frame_height, frame_width = frame.shape[:2]
+    if width <= 0 or height <= 0 or (width >= frame_width and height >= frame_height):
+        return frame
+    width = min(width, frame_width)
+    height = min(height, frame_height)
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+@lru_cache(maxsize=64)
+def ellipse_bands(width, height, num_bands):
+    """
+    Retângulos (y0, y1, x0, x1) em faixas horizontais que cobrem a elipse inscrita
+    no quadro. Cada faixa vai só até a largura máxima da elipse naquelas linhas,
+    então os cantos escondidos pela máscara circular não são filtrados.
+    """
+    cx = width / 2.0
+    cy = height / 2.0
+    bands = []
+    edges = np.linspace(0, height, num_bands + 1).round().astype(int)
+    for y0, y1 in zip(edges[:-1], edges[1:]):
+        if y1 <= y0:
+            continue
+        # Linha da faixa mais próxima do centro = linha mais larga da elipse
+        nearest = min(max(cy, y0), y1)
+        dy = (nearest - cy) / cy
+        half_width = cx * np.sqrt(max(0.0, 1.0 - dy * dy))
+        x0 = max(0, int(np.floor(cx - half_width)))
+        x1 = min(width, int(np.ceil(cx + half_width)))
+        if x1 > x0:
+            bands.append((int(y0), int(y1), x0, x1))
+    return tuple(bands)
+
+
+def _regions_area(regions, width, height, halo):
+    area = 0
+    for y0, y1, x0, x1 in regions:
+        area += (min(height, y1 + halo) - max(0, y0 - halo)) * (min(width, x1 + halo) - max(0, x0 - halo))
+    return area
+
+
+@lru_cache(maxsize=64)
+def ellipse_regions(width, height, halo):
+    """
+    Escolhe o número de faixas que minimiza a área filtrada, já contando a borda
+    extra (`halo`) de cada faixa. Retorna () quando filtrar o quadro inteiro é
+    mais barato (kernels grandes em janelas pequenas).
+    """
+    best, best_area = (), MAX_REGION_AREA_RATIO * width * height
+    for num_bands in ELLIPSE_BAND_COUNTS:
+        regions = ellipse_bands(width, height, num_bands)
+        area = _regions_area(regions, width, height, halo)
+        if area < best_area:
+            best, best_area = regions, area
+    return best
+
+
+def apply_in_regions(frame, fn, regions, halo):
+    """
+    Aplica `fn` apenas nas regiões dadas. Cada região é recortada com `halo`
+    pixels extras para os kernels dos filtros e só o miolo é copiado para a saída.
+    Fora das regiões a saída fica preta (área escondida pela máscara).
+    """
+    height, width = frame.shape[:2]
+    out = None
+    for y0, y1, x0, x1 in regions:
+        ty0, ty1 = max(0, y0 - halo), min(height, y1 + halo)
+        tx0, tx1 = max(0, x0 - halo), min(width, x1 + halo)
+        result = fn(frame[ty0:ty1, tx0:tx1])
+        if out is None:
+            out = np.zeros((height, width) + result.shape[2:], result.dtype)
+        out[y0:y1, x0:x1] = result[y0 - ty0:y1 - ty0, x0 - tx0:x1 - tx0]
+    return frame if out is None else out